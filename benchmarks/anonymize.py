@@ -0,0 +1,126 @@
+"""
+把归档中的响应匿名化后保存为基准测试的固定语料
+
+视频ID、频道ID、标题、频道名称、简介、链接和continuation token替换为由原值哈希得到的假值，
+同一个原值总是得到同一个假值，保持响应之间的引用关系；观看次数、发布时间、订阅者数等
+计数和时间文本原样保留，用于测量转换函数。跟踪参数等与解析无关的字段直接删除。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.anonymize --day 20240101 --limit 20
+    python -m benchmarks.anonymize --archive archive --output benchmarks/fixtures --limit 50
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import Any
+
+# 值为ID的字段
+ID_KEYS = frozenset(('videoId', 'browseId', 'channelId', 'externalId', 'playlistId', 'entityId'))
+# 值为链接的字段
+URL_KEYS = frozenset(('canonicalBaseUrl', 'canonicalChannelUrl', 'vanityChannelUrl', 'url', 'channelUrl'))
+# 值为自由文本的字段
+TEXT_KEYS = frozenset(('text', 'simpleText', 'content', 'title', 'description', 'label'))
+# 这些字段下的文本是计数或时间，原样保留
+PRESERVE_KEYS = frozenset((
+    'viewCountText', 'shortViewCountText', 'publishedTimeText', 'lengthText', 'secondaryText',
+    'subscriberCountText', 'subscriberCount', 'videoCountText', 'videoCount', 'viewCount', 'joinedDateText',
+    'country', 'style', 'iconType'
+))
+# 与解析无关的字段
+DROP_KEYS = frozenset(('trackingParams', 'clickTrackingParams', 'loggingDirectives', 'accessibility',
+                       'accessibilityData', 'accessibilityText', 'serializedShareEntity'))
+TOKEN_KEYS = frozenset(('token', 'continuation', 'params'))
+
+ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+HANDLE_PATTERN = re.compile(r'@[^/?#]+')
+CHANNEL_ID_PATTERN = re.compile(r'UC[\w-]{22}')
+
+def _digest(value: str) -> bytes:
+    return hashlib.sha256(value.encode('utf-8')).digest()
+
+def fake_id(value: str) -> str:
+    """与原ID长度相同的假ID，频道ID保留UC前缀"""
+    prefix = 'UC' if value.startswith('UC') and len(value) == 24 else ''
+    digest = _digest(value)
+    body = ''.join(ID_ALPHABET[digest[i % len(digest)] % len(ID_ALPHABET)] for i in range(len(value) - len(prefix)))
+    return prefix + body
+
+def fake_text(value: str) -> str:
+    return f"text-{_digest(value).hex()[:10]}" if value else value
+
+def fake_url(value: str) -> str:
+    value = CHANNEL_ID_PATTERN.sub(lambda m: fake_id(m.group(0)), value)
+    return HANDLE_PATTERN.sub(lambda m: '@h' + _digest(m.group(0)).hex()[:10], value)
+
+def anonymize(data: Any, key: str = None, preserve: bool = False) -> Any:
+    """
+    递归匿名化JSON
+    Args:
+        data: 响应JSON
+        key: data所在的字段名
+        preserve: 是否位于计数或时间字段之下
+    Returns:
+        Any: 匿名化后的副本
+    """
+    if isinstance(data, dict):
+        return {
+            k: anonymize(v, k, preserve or k in PRESERVE_KEYS)
+            for k, v in data.items() if k not in DROP_KEYS
+        }
+    if isinstance(data, list):
+        return [anonymize(item, key, preserve) for item in data]
+    if not isinstance(data, str) or preserve:
+        return data
+    if key in ID_KEYS:
+        if data.startswith('shorts-shelf-item-'):
+            return 'shorts-shelf-item-' + fake_id(data[len('shorts-shelf-item-'):])
+        return fake_id(data)
+    if key in URL_KEYS:
+        return fake_url(data)
+    if key in TOKEN_KEYS:
+        return 'tok' + _digest(data).hex()[:24]
+    if key in TEXT_KEYS:
+        return fake_text(data)
+    return data
+
+def anonymize_html(html: str) -> str:
+    """匿名化频道页面：只保留匿名化后的ytInitialData"""
+    from src.utils.youtube_parser import YouTubeParser
+    initial_data = YouTubeParser().extract_initial_data(html)
+    if initial_data is None:
+        return ''
+    return f"<html><script>var ytInitialData = {json.dumps(anonymize(initial_data), ensure_ascii=False)};</script></html>"
+
+def main():
+    from src.utils.response_archive import ArchiveReader
+
+    arg_parser = argparse.ArgumentParser(description='把归档中的响应匿名化为基准语料')
+    arg_parser.add_argument('--archive', default='archive', help='归档目录')
+    arg_parser.add_argument('--day', action='append', dest='days', help='只读取该日期（YYYYMMDD）的段，可重复指定')
+    arg_parser.add_argument('--output', default=os.path.join('benchmarks', 'fixtures'), help='语料目录')
+    arg_parser.add_argument('--limit', type=int, default=20, help='每种类型最多保存的响应数')
+    args = arg_parser.parse_args()
+
+    counts = {}
+    for entry, body in ArchiveReader(args.archive).records(days=args.days, kinds=['search', 'browse', 'page']):
+        kind = entry['kind']
+        if counts.get(kind, 0) >= args.limit:
+            continue
+        directory = os.path.join(args.output, kind)
+        os.makedirs(directory, exist_ok=True)
+        text = body.decode('utf-8')
+        if kind == 'page':
+            content, extension = anonymize_html(text), 'html'
+        else:
+            content, extension = json.dumps(anonymize(json.loads(text)), ensure_ascii=False), 'json'
+        if not content:
+            continue
+        counts[kind] = counts.get(kind, 0) + 1
+        with open(os.path.join(directory, f"{kind}_{counts[kind]:03d}.{extension}"), 'w', encoding='utf-8') as f:
+            f.write(content)
+    print(f"已保存: {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+解析和转换函数的基准测试套件：使用 benchmarks/fixtures 下的匿名化响应语料，
+统计每个函数的吞吐量和内存分配，并与保存的基准值比较
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_suite                      # 运行并与 benchmarks/baseline.json 比较
+    python -m benchmarks.bench_suite --save-baseline      # 把本次结果保存为基准值
+    python -m benchmarks.bench_suite --case convert_view_count --seconds 2
+    python -m benchmarks.bench_suite --threshold 0.1      # 吞吐量下降超过10%时失败
+
+吞吐量低于基准值的 (1 - threshold) 倍时以退出码1结束。基准值与机器相关，
+更换机器或Python版本后应先重新保存基准值。
+"""
+import argparse
+import base64
+import gzip
+import glob
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import brotli
+
+from src.utils.data_converter import DataConverter
+from src.utils.response_processor import ResponseProcessor
+from src.utils.youtube_parser import YouTubeParser
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+def _collect_texts(data: Any, fields: Dict[str, str], out: Dict[str, List[str]]):
+    """收集计数和时间文本：fields为 字段名 -> 文本所在的子字段"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in fields and isinstance(value, dict) and isinstance(value.get(fields[key]), str):
+                    out[key].append(value[fields[key]])
+                else:
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+def _har_response(body: bytes, encoding: str) -> Dict[str, Any]:
+    compressed = brotli.compress(body) if encoding == 'br' else gzip.compress(body)
+    return {
+        'content': {'text': base64.b64encode(compressed).decode('ascii'), 'encoding': 'base64'},
+        'headers': [{'name': 'Content-Type', 'value': 'application/json'},
+                    {'name': 'Content-Encoding', 'value': encoding}]
+    }
+
+def load_corpus(directory: str = FIXTURES_DIR) -> Dict[str, Any]:
+    """
+    读取语料
+    Returns:
+        Dict[str, Any]: search/browse响应、观看次数和相对时间文本，以及压缩后的HAR格式响应
+    """
+    corpus = {'search': [], 'browse': [], 'encoded': []}
+    for kind in ('search', 'browse'):
+        for path in sorted(glob.glob(os.path.join(directory, kind, '*.json'))):
+            with open(path, 'rb') as f:
+                raw = f.read()
+            corpus[kind].append(json.loads(raw))
+            # 浏览器捕获的响应为base64编码的br或gzip压缩内容
+            corpus['encoded'].append(_har_response(raw, 'br' if len(corpus['encoded']) % 2 == 0 else 'gzip'))
+
+    texts = {'viewCountText': [], 'secondaryText': [], 'publishedTimeText': []}
+    fields = {'viewCountText': 'simpleText', 'secondaryText': 'content', 'publishedTimeText': 'simpleText'}
+    for data in corpus['search']:
+        _collect_texts(data, fields, texts)
+    corpus['view_counts'] = texts['viewCountText'] + texts['secondaryText']
+    corpus['relative_times'] = texts['publishedTimeText']
+    return corpus
+
+def build_cases(corpus: Dict[str, Any]) -> Dict[str, Tuple[Callable[[], int], str]]:
+    """
+    构建基准用例
+    Returns:
+        Dict[str, Tuple[Callable[[], int], str]]: 用例名 -> (执行一轮并返回处理单位数的函数, 单位名称)
+    """
+    parser = YouTubeParser()
+    converter = DataConverter()
+    processor = ResponseProcessor()
+
+    def extract_videos():
+        return sum(len(parser.extract_videos_from_json(data)) for data in corpus['search'])
+
+    def analyze_channels():
+        return sum(parser.analyze_channel_json_response(data) is not None for data in corpus['browse'])
+
+    def view_counts():
+        for text in corpus['view_counts']:
+            converter.convert_view_count(text)
+        return len(corpus['view_counts'])
+
+    def relative_times():
+        for text in corpus['relative_times']:
+            converter.convert_relative_time(text)
+        return len(corpus['relative_times'])
+
+    def response_content():
+        for response in corpus['encoded']:
+            processor.process_response_content(response)
+        return len(corpus['encoded'])
+
+    return {
+        'extract_videos_from_json': (extract_videos, '视频'),
+        'analyze_channel_json_response': (analyze_channels, '频道'),
+        'convert_view_count': (view_counts, '条'),
+        'convert_relative_time': (relative_times, '条'),
+        'process_response_content': (response_content, '响应'),
+    }
+
+def measure(func: Callable[[], int], seconds: float = 1.0, repeat: int = 5,
+            track_allocations: bool = True) -> Dict[str, float]:
+    """
+    测量吞吐量和内存分配
+
+    计时使用本进程的CPU时间，总测量时间分为repeat段，取吞吐量最高的一段，减少其他进程的干扰
+    Args:
+        func: 执行一轮并返回处理单位数的函数
+        seconds: 总测量时间（秒）
+        repeat: 分段数
+        track_allocations: 是否统计内存分配
+    Returns:
+        Dict[str, float]: ops_per_second、peak_kb（一轮中的内存峰值增量）、bytes_per_op（每单位的峰值分配）
+    """
+    func()
+    best = 0.0
+    window = seconds / repeat
+    for _ in range(repeat):
+        units = 0
+        started = time.process_time()
+        deadline = started + window
+        while True:
+            units += func()
+            now = time.process_time()
+            if now >= deadline:
+                break
+        best = max(best, units / (now - started))
+    if not track_allocations:
+        return {'ops_per_second': best}
+
+    # tracemalloc会显著拖慢执行，单独执行一轮统计分配
+    tracemalloc.start()
+    try:
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        units = func()
+        peak = tracemalloc.get_traced_memory()[1] - baseline_bytes
+    finally:
+        tracemalloc.stop()
+    return {
+        'ops_per_second': best,
+        'peak_kb': peak / 1024,
+        'bytes_per_op': peak / units if units else 0.0,
+    }
+
+# 校准负载：固定的纯Python字典和字符串操作，与解析代码的开销特征相近
+_CALIBRATION_DATA = [{'id': f'v{i:06d}', 'text': f'{i:,}次观看', 'runs': [{'text': str(i)}]} for i in range(500)]
+
+def _calibration_round() -> int:
+    total = 0
+    for item in _CALIBRATION_DATA:
+        runs = item.get('runs')
+        if runs.__class__ is list and runs:
+            total += len(runs[0].get('text', ''))
+        total += len(item['text'].replace(',', '').replace('次观看', ''))
+    return len(_CALIBRATION_DATA) if total else 0
+
+def calibrate(seconds: float = 0.5) -> float:
+    """测量校准负载的吞吐量，用于把各用例的吞吐量换算为与机器速度无关的相对值"""
+    return measure(_calibration_round, seconds, track_allocations=False)['ops_per_second']
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    与基准值比较：比较相对于校准负载的吞吐量，机器整体变慢或变快不会造成误报
+    Returns:
+        List[str]: 吞吐量下降超过阈值的用例说明，为空表示没有退化
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('cases', {}).get(name, {})
+        if not expected.get('relative'):
+            continue
+        ratio = result['relative'] / expected['relative']
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{name}: {result['ops_per_second']:.0f}/秒，相对值 {result['relative']:.4g}，"
+                f"基准 {expected['relative']:.4g}（{ratio:.0%}）"
+            )
+    return regressions
+
+def _environment() -> Dict[str, str]:
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='解析和转换函数的基准测试')
+    arg_parser.add_argument('--fixtures', default=FIXTURES_DIR, help='语料目录')
+    arg_parser.add_argument('--baseline', default=BASELINE_PATH, help='基准值文件')
+    arg_parser.add_argument('--case', action='append', dest='cases', help='只运行指定用例，可重复指定')
+    arg_parser.add_argument('--seconds', type=float, default=1.0, help='每个用例的测量时间（秒）')
+    arg_parser.add_argument('--threshold', type=float, default=0.2, help='允许的吞吐量下降比例')
+    arg_parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准值')
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus(args.fixtures)
+    if not corpus['search'] or not corpus['browse']:
+        arg_parser.error(f'语料目录中没有search或browse响应: {args.fixtures}')
+    cases = build_cases(corpus)
+    # 基准只关心解析本身，关闭INFO日志（Logger初始化时会重置级别，需在创建解析器之后设置）
+    logging.getLogger().setLevel(logging.WARNING)
+
+    unknown = set(args.cases or ()) - set(cases)
+    if unknown:
+        arg_parser.error(f"未知用例: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name, (func, unit) in cases.items():
+        if args.cases and name not in args.cases:
+            continue
+        # 每个用例前重新校准，抵消运行过程中CPU频率等变化
+        reference = calibrate()
+        results[name] = measure(func, args.seconds)
+        results[name]['relative'] = results[name]['ops_per_second'] / reference
+        print(f"{name:32s} {results[name]['ops_per_second']:>12,.0f} {unit}/秒  相对值 {results[name]['relative']:>8.4g}  "
+              f"峰值 {results[name]['peak_kb']:>8.1f} KB  {results[name]['bytes_per_op']:>8.0f} 字节/{unit}")
+
+    if args.save_baseline:
+        baseline = {'environment': _environment(), 'cases': results}
+        if os.path.exists(args.baseline):
+            # 只运行部分用例时保留其他用例的基准值
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline['cases'] = dict(json.load(f).get('cases', {}), **results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"已保存基准值: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("没有基准值文件，使用 --save-baseline 保存")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != _environment():
+        print(f"警告: 基准值的运行环境 {baseline.get('environment')} 与当前 {_environment()} 不同", file=sys.stderr)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"吞吐量下降超过 {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"与基准值相比没有超过 {args.threshold:.0%} 的退化")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+YouTubeParser.extract_videos_from_json 微基准：统计每秒解析的视频数
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_youtube_parser                      # 使用生成的搜索响应
+    python -m benchmarks.bench_youtube_parser responses/*.json     # 使用录制的响应
+    python -m benchmarks.bench_youtube_parser --seconds 5 responses/*.json
+"""
+import argparse
+import glob
+import json
+import logging
+import time
+from src.utils.youtube_parser import YouTubeParser
+
+def _byline(index):
+    return {'runs': [{
+        'text': f'channel {index}',
+        'navigationEndpoint': {'browseEndpoint': {
+            'browseId': f'UC{index:022d}', 'canonicalBaseUrl': f'/@channel{index}'
+        }}
+    }]}
+
+def generate_search_response(items=60):
+    """生成包含videoRenderer、reelShelfRenderer和gridShelfViewModel的搜索响应"""
+    contents = []
+    for i in range(items):
+        kind = i % 3
+        video_id = f'vid{i:08d}'
+        if kind == 0:
+            contents.append({'videoRenderer': {
+                'videoId': video_id,
+                'title': {'runs': [{'text': f'title {i}'}]},
+                'viewCountText': {'simpleText': f'{i},234次观看'},
+                'publishedTimeText': {'simpleText': f'{i % 7 + 1}天前'},
+                'longBylineText': _byline(i)
+            }})
+        elif kind == 1:
+            contents.append({'reelShelfRenderer': {'items': [{'reelItemRenderer': {
+                'videoId': video_id,
+                'headline': {'simpleText': f'reel {i}'},
+                'viewCountText': {'simpleText': f'{i % 9 + 1}.5万次观看'},
+                'shortBylineText': _byline(i)
+            }}]}})
+        else:
+            contents.append({'gridShelfViewModel': {'contents': [{'shortsLockupViewModel': {
+                'entityId': f'shorts-shelf-item-{video_id}',
+                'onTap': {'innertubeCommand': {'reelWatchEndpoint': {'videoId': video_id}}},
+                'overlayMetadata': {
+                    'primaryText': {'content': f'lockup {i}'},
+                    'secondaryText': {'content': f'{i % 5 + 1}万次观看'}
+                },
+                'inlinePlayerData': {'onVisible': {'innertubeCommand': {'browseEndpoint': {
+                    'browseId': f'UC{i:022d}', 'canonicalBaseUrl': f'/@channel{i}'
+                }}}}
+            }}]}})
+    return {'contents': {'twoColumnSearchResultsRenderer': {'primaryContents': {'sectionListRenderer': {
+        'contents': [{'itemSectionRenderer': {'contents': contents}}]
+    }}}}}
+
+def load_responses(patterns):
+    responses = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, encoding='utf-8') as f:
+                responses.append(json.load(f))
+    return responses
+
+def run(responses, seconds=3.0):
+    """
+    重复解析响应直到达到指定时间
+    Returns:
+        dict: responses、items、elapsed、items_per_second
+    """
+    parser = YouTubeParser()
+    # 基准只关心解析本身，关闭INFO日志（Logger初始化时会重置级别，需在创建解析器之后设置）
+    logging.getLogger().setLevel(logging.WARNING)
+    items = rounds = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for response in responses:
+            items += len(parser.extract_videos_from_json(response))
+        rounds += 1
+        if time.perf_counter() >= deadline:
+            break
+    elapsed = time.perf_counter() - started
+    return {
+        'responses': len(responses) * rounds,
+        'items': items,
+        'elapsed': elapsed,
+        'items_per_second': items / elapsed if elapsed else 0.0
+    }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='YouTubeParser解析速度基准')
+    arg_parser.add_argument('paths', nargs='*', help='录制的响应JSON文件（支持通配符），不提供时使用生成的响应')
+    arg_parser.add_argument('--seconds', type=float, default=3.0, help='运行时长（秒）')
+    args = arg_parser.parse_args()
+
+    responses = load_responses(args.paths) if args.paths else [generate_search_response()]
+    if not responses:
+        arg_parser.error('没有找到响应文件')
+
+    result = run(responses, args.seconds)
+    print(f"解析 {result['responses']} 个响应，{result['items']} 个视频，耗时 {result['elapsed']:.2f} 秒，"
+          f"{result['items_per_second']:.0f} 个视频/秒")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,607 @@
+"""
+负载测试使用的本地模拟服务：
+
+- FakeInnerTube: 模拟YouTube的search/browse接口和频道Shorts页面，响应来自 benchmarks/fixtures 的匿名化语料，
+  可配置每个请求的延迟、抖动和错误率
+- FakePostgREST: 兼容supabase客户端的内存PostgREST，实现爬虫用到的存储过程（批量租约、save_channel_crawl(s)）
+  和表的查询/插入/upsert/更新，载入合成的channel_base和key_words任务队列
+- StageRecorder: 两个服务共享的任务时间线，按服务端观察到的时间点计算各阶段耗时
+
+两个服务在同一个事件循环中运行，只在该事件循环的线程中修改状态。
+"""
+import asyncio
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import zlib
+from collections import deque
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from benchmarks.bench_suite import FIXTURES_DIR
+
+# 替换语料中continuation token的占位符
+TOKEN_PLACEHOLDER = '__LOADTEST_TOKEN__'
+CHANNEL_PLACEHOLDER = '__LOADTEST_CHANNEL__'
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 90, 99)) -> Dict[str, float]:
+    """最近秩百分位数，values为空时返回空字典"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        index = max(0, min(len(ordered), math.ceil(point / 100 * len(ordered))) - 1)
+        result[f'p{point}'] = ordered[index]
+    return result
+
+class StageRecorder:
+    """
+    记录每个任务在服务端观察到的时间点：
+    leased（领取租约）、first_fetch（第一个YouTube请求）、last_fetch（最后一个YouTube响应）、completed（完成租约）
+    """
+
+    STAGES = (
+        ('queue', 'leased', 'first_fetch'),       # 领取后在本地缓冲和并发槽位中等待
+        ('fetch', 'first_fetch', 'last_fetch'),   # 请求YouTube和解析中间页面
+        ('persist', 'last_fetch', 'completed'),   # 解析、写缓冲和写入数据库
+        ('total', 'leased', 'completed'),
+    )
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict[str, float]] = {}
+
+    def leased(self, key: str):
+        record = self.tasks.setdefault(key, {})
+        # 归还后被重新领取时，从最后一次领取开始计时
+        if 'first_fetch' not in record:
+            record['leased'] = time.perf_counter()
+
+    def fetch_started(self, key: str):
+        self.tasks.setdefault(key, {}).setdefault('first_fetch', time.perf_counter())
+
+    def fetch_finished(self, key: str):
+        self.tasks.setdefault(key, {})['last_fetch'] = time.perf_counter()
+
+    def completed(self, key: str):
+        self.tasks.setdefault(key, {})['completed'] = time.perf_counter()
+
+    def stage_latencies(self) -> Dict[str, Dict[str, float]]:
+        """
+        各阶段耗时的百分位数（秒）
+        Returns:
+            Dict[str, Dict[str, float]]: 阶段名 -> {count, mean, p50, p90, p99, max}
+        """
+        result = {}
+        for stage, start, end in self.STAGES:
+            values = [record[end] - record[start] for record in self.tasks.values()
+                      if start in record and end in record]
+            if not values:
+                continue
+            summary = {'count': len(values), 'mean': sum(values) / len(values), 'max': max(values)}
+            summary.update(percentiles(values))
+            result[stage] = summary
+        return result
+
+    def window(self) -> Optional[Tuple[float, float]]:
+        """第一次领取到最后一次完成的时间范围"""
+        leased = [record['leased'] for record in self.tasks.values() if 'leased' in record]
+        completed = [record['completed'] for record in self.tasks.values() if 'completed' in record]
+        if not leased or not completed:
+            return None
+        return min(leased), max(completed)
+
+class RouteStats:
+    """按路由统计请求数和服务端处理时间"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.durations: Dict[str, List[float]] = {}
+
+    def add(self, route: str, elapsed: float):
+        self.counts[route] = self.counts.get(route, 0) + 1
+        self.durations.setdefault(route, []).append(elapsed)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            route: dict(count=self.counts[route], **percentiles(self.durations[route]))
+            for route in sorted(self.counts)
+        }
+
+class _LatencyModel:
+    """固定延迟加均匀抖动，jitter为延迟的相对波动比例"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.latency = max(0.0, latency)
+        self.jitter = max(0.0, min(1.0, jitter))
+        self._random = random.Random(seed)
+
+    async def wait(self):
+        if self.latency <= 0:
+            return
+        spread = self.latency * self.jitter
+        await asyncio.sleep(self.latency + self._random.uniform(-spread, spread))
+
+def _strip_continuations(data: Any) -> Any:
+    """删除响应中的continuationItemRenderer条目，作为最后一页"""
+    if isinstance(data, dict):
+        return {key: _strip_continuations(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_strip_continuations(item) for item in data
+                if not (isinstance(item, dict) and 'continuationItemRenderer' in item)]
+    return data
+
+def _channel_page_template() -> str:
+    """频道Shorts页面HTML模板：频道名称、头像、"关于"面板的continuation和若干Shorts"""
+    about_item = {'continuationItemRenderer': {'continuationEndpoint': {'continuationCommand': {
+        'token': f'about:{CHANNEL_PLACEHOLDER}'
+    }}}}
+    initial_data = {
+        'metadata': {'channelMetadataRenderer': {
+            'title': f'频道 {CHANNEL_PLACEHOLDER}',
+            'avatar': {'thumbnails': [{'url': f'https://yt3.example/{CHANNEL_PLACEHOLDER}.jpg'}]}
+        }},
+        'header': {'pageHeaderRenderer': {'content': {'pageHeaderViewModel': {'description': {
+            'descriptionPreviewViewModel': {'rendererContext': {'commandContext': {'onTap': {'innertubeCommand': {
+                'showEngagementPanelEndpoint': {'engagementPanel': {'engagementPanelSectionListRenderer': {
+                    'content': {'sectionListRenderer': {'contents': [{'itemSectionRenderer': {'contents': [about_item]}}]}}
+                }}}
+            }}}}}
+        }}}}},
+        'contents': {'twoColumnBrowseResultsRenderer': {'tabs': [{'tabRenderer': {'selected': True, 'content': {
+            'richGridRenderer': {'contents': [
+                {'richItemRenderer': {'content': {'shortsLockupViewModel': {
+                    'onTap': {'innertubeCommand': {'reelWatchEndpoint': {'videoId': f'{CHANNEL_PLACEHOLDER}-{i}'}}},
+                    'overlayMetadata': {'primaryText': {'content': f'Short {i}'},
+                                        'secondaryText': {'content': f'{i + 1}.2K views'}},
+                    'thumbnail': {'sources': [{'url': f'https://i.ytimg.example/{CHANNEL_PLACEHOLDER}/{i}.jpg'}]}
+                }}}} for i in range(12)
+            ]}
+        }}}]}}
+    }
+    return f'<html><script>var ytInitialData = {json.dumps(initial_data, ensure_ascii=False)};</script></html>'
+
+class FakeInnerTube:
+    """
+    模拟InnerTube服务：
+    - POST /youtubei/v1/search: 首页和continuation页，continuation token为 "页码:关键词"，第pages页没有下一页
+    - GET /channel/{channel_id}/shorts: 频道页面，"关于"面板的token为 "about:频道ID"
+    - POST /youtubei/v1/browse: 按频道ID选择语料中的"关于"面板响应
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, latency: float = 0.0, jitter: float = 0.0,
+                 pages: int = 3, error_rate: float = 0.0, recorder: Optional[StageRecorder] = None,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            fixtures_dir: 语料目录（search和browse子目录）
+            latency: 每个请求的平均延迟（秒）
+            jitter: 延迟的相对波动比例（0-1）
+            pages: 每个关键词的搜索结果页数
+            error_rate: 返回503的请求比例，用于观察重试的影响
+            recorder: 任务时间线
+            seed: 随机数种子
+        """
+        self.latency = _LatencyModel(latency, jitter, seed)
+        self.pages = max(1, pages)
+        self.error_rate = error_rate
+        self.recorder = recorder or StageRecorder()
+        self.stats = RouteStats()
+        self.last_request = 0.0
+        self._random = random.Random(seed)
+        self._load_fixtures(fixtures_dir)
+        self._page_template = _channel_page_template()
+
+    def _load_fixtures(self, directory: str):
+        from src.utils.youtube_parser import YouTubeParser
+        parser = YouTubeParser()
+
+        # (带占位token的响应, 最后一页响应)，首页和continuation页的结构不同，分开保存
+        self._initial: List[Tuple[str, bytes]] = []
+        self._continuation: List[Tuple[str, bytes]] = []
+        for path in sorted(glob.glob(os.path.join(directory, 'search', '*.json'))):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            token = parser.extract_continuation_token(data)
+            if not token:
+                continue
+            body = json.dumps(data, ensure_ascii=False).replace(json.dumps(token), json.dumps(TOKEN_PLACEHOLDER))
+            last = json.dumps(_strip_continuations(data), ensure_ascii=False).encode('utf-8')
+            (self._initial if 'contents' in data else self._continuation).append((body, last))
+
+        self._browse: List[bytes] = []
+        for path in sorted(glob.glob(os.path.join(directory, 'browse', '*.json'))):
+            with open(path, 'rb') as f:
+                self._browse.append(f.read())
+
+        if not self._initial or not self._browse:
+            raise ValueError(f"语料目录中没有可用的search首页或browse响应: {directory}")
+        if not self._continuation:
+            self._continuation = self._initial
+
+    @staticmethod
+    def _pick(items: List[Any], key: str, page: int = 0) -> Any:
+        return items[(zlib.crc32(key.encode('utf-8')) + page) % len(items)]
+
+    async def _respond(self, route: str, task_key: str, build) -> web.Response:
+        started = time.perf_counter()
+        self.recorder.fetch_started(task_key)
+        await self.latency.wait()
+        try:
+            if self.error_rate and self._random.random() < self.error_rate:
+                return web.Response(status=503)
+            return build()
+        finally:
+            self.recorder.fetch_finished(task_key)
+            self.last_request = time.perf_counter()
+            self.stats.add(route, self.last_request - started)
+
+    async def search(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        token = body.get('continuation')
+        if token:
+            page, query = token.split(':', 1)
+            page = int(page)
+            templates = self._continuation
+        else:
+            page, query = 1, body.get('query', '')
+            templates = self._initial
+
+        def build():
+            template, last = self._pick(templates, query, page)
+            if page >= self.pages:
+                content = last
+            else:
+                content = template.replace(json.dumps(TOKEN_PLACEHOLDER), json.dumps(f'{page + 1}:{query}')).encode('utf-8')
+            return web.Response(body=content, content_type='application/json')
+
+        return await self._respond('search' if page == 1 else 'search_continuation', query, build)
+
+    async def channel_page(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info['channel_id']
+
+        def build():
+            if not channel_id.startswith('UC'):
+                return web.Response(status=404)
+            return web.Response(text=self._page_template.replace(CHANNEL_PLACEHOLDER, channel_id), content_type='text/html')
+
+        return await self._respond('channel_page', channel_id, build)
+
+    async def browse(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        channel_id = (body.get('continuation') or '').split(':', 1)[-1] or body.get('browseId', '')
+
+        def build():
+            return web.Response(body=self._pick(self._browse, channel_id), content_type='application/json')
+
+        return await self._respond('browse', channel_id, build)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/youtubei/v1/search', self.search)
+        app.router.add_post('/youtubei/v1/browse', self.browse)
+        app.router.add_get('/channel/{channel_id}/shorts', self.channel_page)
+        return app
+
+class PostgRESTError(Exception):
+    """返回给客户端的PostgREST错误"""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+# 各表的主键（upsert未指定on_conflict时使用）
+PRIMARY_KEYS = {
+    'channel_base': ('channel_id',),
+    'key_words': ('id',),
+    'channel_crawl': ('channel_id', 'crawl_date'),
+    'videos': ('video_id', 'crawl_date'),
+}
+# 租约表的配置: 表名 -> (主键, 作为任务时间线键的字段)
+LEASE_TABLES = {
+    'channel_base': ('channel_id', 'channel_id'),
+    'key_words': ('id', 'key_words'),
+}
+
+def fake_channel_id(seed: str) -> str:
+    """由种子生成的合成频道ID"""
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+    digest = hashlib.sha256(seed.encode('utf-8')).digest()
+    return 'UC' + ''.join(alphabet[digest[i] % len(alphabet)] for i in range(22))
+
+class FakePostgREST:
+    """
+    内存中的PostgREST，实现supabase客户端在爬虫中发出的请求：
+    - POST /rest/v1/rpc/{name}: lease/complete/release_*、save_channel_crawl(s)，语义与migrations中的SQL相同
+    - GET /rest/v1/{table}: select、eq/neq/gt/gte/lt/lte过滤、order、limit、offset
+    - POST /rest/v1/{table}: insert，以及Prefer: resolution=merge-duplicates/ignore-duplicates的upsert
+    - PATCH/DELETE /rest/v1/{table}: 按过滤条件更新或删除
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, recorder: Optional[StageRecorder] = None,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latency: 每个请求的平均延迟（秒），模拟到数据库的网络往返
+            jitter: 延迟的相对波动比例（0-1）
+            recorder: 任务时间线
+            seed: 随机数种子
+        """
+        self.latency = _LatencyModel(latency, jitter, seed)
+        self.recorder = recorder or StageRecorder()
+        self.stats = RouteStats()
+        self.tables: Dict[str, Dict[Tuple, Dict[str, Any]]] = {name: {} for name in PRIMARY_KEYS}
+        # 等待领取的任务和当前租约: 表名 -> 主键队列 / {主键: (持有者, 到期时间)}
+        self._queues: Dict[str, deque] = {name: deque() for name in LEASE_TABLES}
+        self._leases: Dict[str, Dict[Any, Tuple[str, float]]] = {name: {} for name in LEASE_TABLES}
+        self._done: Dict[str, set] = {name: set() for name in LEASE_TABLES}
+        self.completed: Dict[str, int] = {name: 0 for name in LEASE_TABLES}
+
+    # ---- 合成数据 ----
+
+    def load_channels(self, count: int, benchmark_ratio: float = 0.1) -> List[str]:
+        """载入count个待爬取频道，前benchmark_ratio比例为对标频道（优先领取）"""
+        channel_ids = [fake_channel_id(f'loadtest-channel-{i}') for i in range(count)]
+        rows = [{
+            'channel_id': channel_id,
+            'is_benchmark': i < count * benchmark_ratio,
+            'is_blacklist': False,
+            'last_crawl_date': None,
+        } for i, channel_id in enumerate(channel_ids)]
+        self._insert_rows('channel_base', rows, PRIMARY_KEYS['channel_base'], None)
+        return channel_ids
+
+    def load_keywords(self, count: int) -> List[str]:
+        """载入count个待爬取关键词"""
+        start = len(self.tables['key_words']) + 1
+        rows = [{'id': start + i, 'key_words': f'shorts 关键词 {start + i}', 'last_crawl_date': None}
+                for i in range(count)]
+        self._insert_rows('key_words', rows, PRIMARY_KEYS['key_words'], None)
+        return [row['key_words'] for row in rows]
+
+    def queued(self, table: str) -> int:
+        """等待领取的任务数（含已完成但尚未从队列中跳过的主键）"""
+        return len(self._queues[table])
+
+    # ---- 存储过程 ----
+
+    def _lease(self, table: str, worker: str, limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+        key_field, task_field = LEASE_TABLES[table]
+        queue, leases, rows = self._queues[table], self._leases[table], self.tables[table]
+        now = time.time()
+        for key, (_, expires_at) in list(leases.items()):
+            if expires_at < now:
+                del leases[key]
+                queue.appendleft(key)
+
+        today = date.today().isoformat()
+        leased = []
+        while queue and len(leased) < limit:
+            key = queue.popleft()
+            row = rows.get((key,))
+            if row is None or key in leases or row.get('last_crawl_date') == today or row.get('is_blacklist'):
+                continue
+            leases[key] = (worker, now + lease_seconds)
+            row['lease_owner'] = worker
+            self.recorder.leased(str(row[task_field]))
+            leased.append(dict(row))
+        return leased
+
+    def _complete(self, table: str, worker: str, keys: Sequence[Any]) -> int:
+        key_field, task_field = LEASE_TABLES[table]
+        today = date.today().isoformat()
+        count = 0
+        for key in keys:
+            row = self.tables[table].get((key,))
+            owner = self._leases[table].get(key, (None,))[0]
+            if row is None or owner not in (worker, None):
+                continue
+            self._leases[table].pop(key, None)
+            # 批量写入频道结果时last_crawl_date已被更新，按是否第一次完成计数
+            if key not in self._done[table]:
+                self._done[table].add(key)
+                self.completed[table] += 1
+                self.recorder.completed(str(row[task_field]))
+            row.update(last_crawl_date=today, lease_owner=None)
+            count += 1
+        return count
+
+    def _release(self, table: str, worker: str, keys: Sequence[Any]) -> int:
+        count = 0
+        for key in keys:
+            if self._leases[table].get(key, (None,))[0] == worker:
+                del self._leases[table][key]
+                self.tables[table][(key,)]['lease_owner'] = None
+                self._queues[table].appendleft(key)
+                count += 1
+        return count
+
+    def _save_channel_crawl(self, channel_id: str, base: Dict[str, Any], crawl: Dict[str, Any]) -> str:
+        row = self.tables['channel_base'].get((channel_id,))
+        if row is None:
+            return 'not_found'
+        if row.get('is_blacklist'):
+            return 'blacklisted'
+        today = date.today().isoformat()
+        row.update({k: v for k, v in (base or {}).items() if k != 'channel_id'})
+        row['last_crawl_date'] = today
+        crawl = dict(crawl or {}, channel_id=row['channel_id'])
+        crawl.setdefault('crawl_date', today)
+        key = (crawl['channel_id'], crawl['crawl_date'])
+        if key in self.tables['channel_crawl']:
+            return 'duplicate'
+        self.tables['channel_crawl'][key] = crawl
+        return 'saved'
+
+    def _save_channel_crawls(self, items: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        # 同一频道出现多次时以最后一项为准
+        latest = {item.get('channel_id'): item for item in items}
+        return [
+            {'channel_id': channel_id,
+             'status': self._save_channel_crawl(channel_id, item.get('base'), item.get('crawl'))}
+            for channel_id, item in latest.items()
+        ]
+
+    def call_rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        worker = params.get('p_worker')
+        if name == 'lease_uncrawled_channels':
+            return self._lease('channel_base', worker, params.get('p_limit', 10), params.get('p_lease_seconds', 1800))
+        if name == 'lease_uncrawled_keywords':
+            return self._lease('key_words', worker, params.get('p_limit', 10), params.get('p_lease_seconds', 1800))
+        if name == 'complete_channel_leases':
+            return self._complete('channel_base', worker, params.get('p_channel_ids') or [])
+        if name == 'complete_keyword_leases':
+            return self._complete('key_words', worker, params.get('p_ids') or [])
+        if name == 'release_channel_leases':
+            return self._release('channel_base', worker, params.get('p_channel_ids') or [])
+        if name == 'release_keyword_leases':
+            return self._release('key_words', worker, params.get('p_ids') or [])
+        if name == 'save_channel_crawl':
+            status = self._save_channel_crawl(params.get('p_channel_id'), params.get('p_base'), params.get('p_crawl'))
+            return [{'status': status}]
+        if name == 'save_channel_crawls':
+            return self._save_channel_crawls(params.get('p_items') or [])
+        raise PostgRESTError(404, 'PGRST202', f'Could not find the function public.{name}')
+
+    # ---- 表操作 ----
+
+    def _table(self, name: str) -> Dict[Tuple, Dict[str, Any]]:
+        if name not in self.tables:
+            raise PostgRESTError(404, '42P01', f'relation "public.{name}" does not exist')
+        return self.tables[name]
+
+    @staticmethod
+    def _parse_filters(query) -> List[Tuple[str, str, str]]:
+        filters = []
+        for column, expression in query.items():
+            if column in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns'):
+                continue
+            operator, _, value = expression.partition('.')
+            if operator not in ('eq', 'neq', 'gt', 'gte', 'lt', 'lte'):
+                raise PostgRESTError(400, 'PGRST100', f'unsupported operator: {expression}')
+            filters.append((column, operator, value))
+        return filters
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], filters: List[Tuple[str, str, str]]) -> bool:
+        for column, operator, text in filters:
+            value = row.get(column)
+            if value is None:
+                return False
+            expected = type(value)(text) if isinstance(value, (int, float)) and not isinstance(value, bool) else text
+            if isinstance(value, bool):
+                value = str(value).lower()
+            if not {'eq': value == expected, 'neq': value != expected, 'gt': value > expected,
+                    'gte': value >= expected, 'lt': value < expected, 'lte': value <= expected}[operator]:
+                return False
+        return True
+
+    def select(self, table: str, query) -> List[Dict[str, Any]]:
+        filters = self._parse_filters(query)
+        rows = [row for row in self._table(table).values() if self._matches(row, filters)]
+        if 'order' in query:
+            for term in reversed(query['order'].split(',')):
+                column, _, direction = term.partition('.')
+                rows.sort(key=lambda row: (row.get(column) is None, row.get(column)),
+                          reverse=direction.startswith('desc'))
+        offset = int(query.get('offset', 0))
+        rows = rows[offset:offset + int(query['limit'])] if 'limit' in query else rows[offset:]
+        columns = query.get('select', '*')
+        if columns != '*':
+            names = columns.split(',')
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return rows
+
+    def _insert_rows(self, table: str, rows: List[Dict[str, Any]], key_columns: Sequence[str],
+                     resolution: Optional[str]) -> List[Dict[str, Any]]:
+        stored, written = self._table(table), []
+        for row in rows:
+            key = tuple(row.get(column) for column in key_columns)
+            existing = stored.get(key)
+            if existing is not None:
+                if resolution == 'ignore-duplicates':
+                    continue
+                if resolution != 'merge-duplicates':
+                    raise PostgRESTError(409, '23505', f'duplicate key value violates unique constraint on {table}')
+                existing.update(row)
+                written.append(dict(existing))
+                continue
+            if table == 'channel_base':
+                row = dict({'is_blacklist': False, 'is_benchmark': False, 'last_crawl_date': None}, **row)
+            stored[key] = dict(row)
+            if table in LEASE_TABLES:
+                self._queues[table].append(row[LEASE_TABLES[table][0]])
+            written.append(dict(row))
+        return written
+
+    def insert(self, table: str, query, rows: Any, prefer: str) -> List[Dict[str, Any]]:
+        rows = rows if isinstance(rows, list) else [rows]
+        resolution = None
+        for option in prefer.split(','):
+            name, _, value = option.strip().partition('=')
+            if name == 'resolution':
+                resolution = value
+        key_columns = tuple(query['on_conflict'].split(',')) if 'on_conflict' in query \
+            else PRIMARY_KEYS.get(table, ('id',))
+        return self._insert_rows(table, rows, key_columns, resolution)
+
+    def update(self, table: str, query, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        filters = self._parse_filters(query)
+        updated = []
+        for row in self._table(table).values():
+            if self._matches(row, filters):
+                row.update(values)
+                updated.append(dict(row))
+        return updated
+
+    def delete(self, table: str, query) -> List[Dict[str, Any]]:
+        filters = self._parse_filters(query)
+        stored = self._table(table)
+        deleted = [key for key, row in stored.items() if self._matches(row, filters)]
+        return [stored.pop(key) for key in deleted]
+
+    # ---- HTTP ----
+
+    async def handle(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        name = request.match_info['name']
+        is_rpc = request.path.startswith('/rest/v1/rpc/')
+        route = f'rpc/{name}' if is_rpc else f'{request.method} {name}'
+        await self.latency.wait()
+        try:
+            if is_rpc:
+                result = self.call_rpc(name, await request.json() if request.can_read_body else {})
+            elif request.method == 'GET':
+                result = self.select(name, request.query)
+            elif request.method == 'POST':
+                result = self.insert(name, request.query, await request.json(), request.headers.get('Prefer', ''))
+            elif request.method == 'PATCH':
+                result = self.update(name, request.query, await request.json())
+            elif request.method == 'DELETE':
+                result = self.delete(name, request.query)
+            else:
+                raise PostgRESTError(405, 'PGRST000', f'method not allowed: {request.method}')
+            status = 201 if request.method == 'POST' and not is_rpc else 200
+            return web.json_response(result, status=status)
+        except PostgRESTError as e:
+            return web.json_response({'code': e.code, 'message': str(e), 'details': None, 'hint': None},
+                                     status=e.status)
+        finally:
+            self.stats.add(route, time.perf_counter() - started)
+
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/rest/v1/rpc/{name}', self.handle)
+        app.router.add_route('*', '/rest/v1/{name}', self.handle)
+        return app
@@ -0,0 +1,316 @@
+"""
+端到端负载测试：在本地启动模拟InnerTube和模拟PostgREST，用main.py中的异步工作进程爬取合成的任务队列，
+统计吞吐量、每个任务的数据库往返次数和各阶段耗时，不访问YouTube和生产数据库
+
+用法（在项目根目录执行）:
+    python -m benchmarks.load_harness --mode channel --workers 2 --concurrency 16 --tasks 500
+    python -m benchmarks.load_harness --mode video --tasks 100 --pages 5 --latency 0.2 --db-latency 0.03
+    python -m benchmarks.load_harness --mode channel --error-rate 0.05 --output report.json
+
+阶段耗时按服务端观察到的时间点计算：
+    queue    领取租约 -> 第一个YouTube请求（在本地缓冲和并发槽位中等待）
+    fetch    第一个YouTube请求 -> 最后一个YouTube响应
+    persist  最后一个YouTube响应 -> 完成租约（解析、写缓冲和写入数据库）
+    total    领取租约 -> 完成租约
+"""
+import argparse
+import asyncio
+import configparser
+import ctypes
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Process, Value
+from typing import Any, Dict
+
+from aiohttp import web
+
+from benchmarks.bench_suite import FIXTURES_DIR
+from benchmarks.fake_services import FakeInnerTube, FakePostgREST, StageRecorder
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各模式的任务表
+TASK_TABLES = {'channel': 'channel_base', 'video': 'key_words'}
+
+def _run_worker(mode: str, worker_id: int, concurrency: int, directory: str, stop_flag, verbose: bool):
+    """工作进程入口：使用负载测试目录中的配置运行main.py的异步工作进程"""
+    sys.path.insert(0, PROJECT_ROOT)
+    os.chdir(directory)
+    import main
+    from src.db import Database
+    from src.utils import Logger
+
+    Database.config_path = os.path.join(directory, 'config.ini')
+    # 由驱动进程控制退出，spawn启动方式下也能共享
+    main.should_exit = stop_flag
+    # fork启动时Logger已在驱动进程中初始化，spawn启动时初始化会重置级别，都需在之后设置
+    Logger()
+    logging.getLogger().setLevel(logging.INFO if verbose else logging.WARNING)
+    if mode == 'channel':
+        _redirect_leased_urls(main.ChannelService, _configured_base_url(directory))
+    target = main.async_channel_worker if mode == 'channel' else main.async_video_worker
+    target(worker_id=worker_id, concurrency=concurrency)
+
+def _configured_base_url(directory: str) -> str:
+    config = configparser.ConfigParser()
+    config.read(os.path.join(directory, 'config.ini'), encoding='utf-8')
+    return config.get('innertube', 'base_url')
+
+def _redirect_leased_urls(service_class, base_url: str):
+    """领取到的频道URL是YouTube的完整URL，在工作进程中改写为模拟InnerTube服务的地址"""
+    from src.crawlers.innertube_client import DEFAULT_BASE_URL
+
+    lease_channels = service_class.lease_channels
+
+    def redirected(self, *args, **kwargs):
+        channels = lease_channels(self, *args, **kwargs)
+        for channel in channels or []:
+            if channel['url'].startswith(DEFAULT_BASE_URL):
+                channel['url'] = base_url + channel['url'][len(DEFAULT_BASE_URL):]
+        return channels
+
+    service_class.lease_channels = redirected
+
+class _ServerThread:
+    """在后台线程的事件循环中运行模拟服务"""
+
+    def __init__(self, apps):
+        self.apps = apps
+        self.urls = []
+        self._loop = asyncio.new_event_loop()
+        self._runners = []
+        self._thread = threading.Thread(target=self._loop.run_forever, name='fake-services', daemon=True)
+
+    async def _start(self):
+        for app in self.apps:
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, '127.0.0.1', 0).start()
+            self._runners.append(runner)
+            self.urls.append(f'http://127.0.0.1:{runner.addresses[0][1]}')
+
+    async def _stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+
+    def call(self, func, timeout: float = 30):
+        """在事件循环线程中执行func，读取服务状态时保证一致"""
+        async def run():
+            return func()
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result(timeout)
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(30)
+        return self.urls
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+class LoadHarness:
+    """启动模拟服务和N个工作进程，所有任务完成或超时后停止并生成报告"""
+
+    def __init__(self, mode: str = 'channel', workers: int = 1, concurrency: int = 16, tasks: int = 200,
+                 latency: float = 0.05, jitter: float = 0.5, db_latency: float = 0.0, pages: int = 3,
+                 error_rate: float = 0.0, duration: float = 600, lease_batch_size: int = 10,
+                 write_batch_size: int = 50, fixtures_dir: str = FIXTURES_DIR, verbose: bool = False):
+        """
+        初始化负载测试
+        Args:
+            mode: channel（频道爬取）或 video（关键词搜索）
+            workers: 工作进程数
+            concurrency: 每个进程同时进行的任务数
+            tasks: 合成的频道或关键词数量
+            latency: 模拟YouTube每个请求的平均延迟（秒）
+            jitter: 延迟的相对波动比例（0-1）
+            db_latency: 模拟数据库每个请求的平均延迟（秒）
+            pages: video模式下每个关键词的搜索结果页数
+            error_rate: 模拟YouTube返回503的比例
+            duration: 最长运行时间（秒），超时后停止工作进程
+            lease_batch_size: 每次领取的任务数，对应[crawler] lease_batch_size
+            write_batch_size: 频道结果批量写入的数量，对应[crawler] write_batch_size
+            fixtures_dir: 语料目录
+            verbose: 为True时保留工作进程的INFO日志
+        """
+        if mode not in TASK_TABLES:
+            raise ValueError(f"未知模式: {mode}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.concurrency = concurrency
+        self.tasks = tasks
+        self.duration = duration
+        self.lease_batch_size = lease_batch_size
+        self.write_batch_size = write_batch_size
+        self.verbose = verbose
+        self.settle_seconds = 2.0
+        self.recorder = StageRecorder()
+        self.innertube = FakeInnerTube(fixtures_dir, latency=latency, jitter=jitter, pages=pages,
+                                       error_rate=error_rate, recorder=self.recorder)
+        self.database = FakePostgREST(latency=db_latency, jitter=jitter, recorder=self.recorder)
+
+    def _write_config(self, directory: str, innertube_url: str, postgrest_url: str) -> str:
+        config = configparser.ConfigParser()
+        config['supabase'] = {'url': postgrest_url, 'key': 'loadtest'}
+        config['database'] = {'backend': 'supabase'}
+        config['crawler'] = {
+            'video_crawler_mode': 'http',
+            'channel_crawler_mode': 'http',
+            'concurrency': str(self.concurrency),
+            'lease_batch_size': str(self.lease_batch_size),
+            'write_batch_size': str(self.write_batch_size),
+        }
+        # 重试等待使用客户端的指数退避，错误率较高时每个任务的耗时会相应增加
+        config['innertube'] = {'base_url': innertube_url, 'max_connections': str(max(self.concurrency, 1) * 2)}
+        config['archive'] = {'enabled': '0'}
+        config['selector'] = {'stats_path': os.path.join(directory, 'selector_stats.json')}
+        path = os.path.join(directory, 'config.ini')
+        with open(path, 'w', encoding='utf-8') as f:
+            config.write(f)
+        return path
+
+    def run(self) -> Dict[str, Any]:
+        """
+        运行负载测试
+        Returns:
+            Dict[str, Any]: 报告，包括tasks_per_minute、db_requests_per_task和stages
+        """
+        table = TASK_TABLES[self.mode]
+        if self.mode == 'channel':
+            self.database.load_channels(self.tasks)
+        else:
+            self.database.load_keywords(self.tasks)
+
+        servers = _ServerThread([self.innertube.build_app(), self.database.build_app()])
+        innertube_url, postgrest_url = servers.start()
+        stop_flag = Value(ctypes.c_bool, False)
+        processes = []
+        timed_out = False
+
+        with tempfile.TemporaryDirectory(prefix='loadtest-') as directory:
+            self._write_config(directory, innertube_url, postgrest_url)
+            started = time.perf_counter()
+            try:
+                for worker_id in range(self.workers):
+                    process = Process(target=_run_worker, args=(
+                        self.mode, worker_id, self.concurrency, directory, stop_flag, self.verbose
+                    ))
+                    process.start()
+                    processes.append(process)
+
+                while servers.call(lambda: self.database.completed[table]) < self.tasks:
+                    if time.perf_counter() - started > self.duration:
+                        timed_out = True
+                        break
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    if not stop_flag.value and servers.call(lambda: self._drained(table)):
+                        # 队列取空后引擎进入空闲等待，最后不足一批的结果在进程退出时写入
+                        stop_flag.value = True
+                    time.sleep(0.5)
+            finally:
+                stop_flag.value = True
+                for process in processes:
+                    # 引擎每秒检查一次退出标志，之后写入缓冲并归还租约
+                    process.join(60)
+                    if process.is_alive():
+                        process.terminate()
+                        process.join()
+            elapsed = time.perf_counter() - started
+
+        report = servers.call(lambda: self._report(table, elapsed, timed_out))
+        servers.stop()
+        return report
+
+    def _drained(self, table: str) -> bool:
+        """任务队列已取空，且模拟YouTube在settle_seconds内没有收到请求（进行中的任务都已爬取完）"""
+        return self.database.queued(table) == 0 and self.innertube.last_request > 0 and \
+            time.perf_counter() - self.innertube.last_request > self.settle_seconds
+
+    def _report(self, table: str, elapsed: float, timed_out: bool) -> Dict[str, Any]:
+        completed = self.database.completed[table]
+        window = self.recorder.window()
+        active = window[1] - window[0] if window else 0.0
+        per_task = completed or 1
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'concurrency': self.concurrency,
+            'tasks': self.tasks,
+            'completed': completed,
+            'timed_out': timed_out,
+            'elapsed': elapsed,
+            # 第一次领取到最后一次完成，不含进程启动时间
+            'active_seconds': active,
+            'tasks_per_minute': completed / active * 60 if active else 0.0,
+            'db_requests': self.database.stats.total,
+            'db_requests_per_task': self.database.stats.total / per_task,
+            'db_routes_per_task': {route: count / per_task for route, count in sorted(self.database.stats.counts.items())},
+            'db_routes': self.database.stats.summary(),
+            'youtube_requests': self.innertube.stats.total,
+            'youtube_requests_per_task': self.innertube.stats.total / per_task,
+            'youtube_routes': self.innertube.stats.summary(),
+            'stages': self.recorder.stage_latencies(),
+            'rows': {name: len(rows) for name, rows in self.database.tables.items()},
+        }
+
+def _format_ms(summary: Dict[str, float]) -> str:
+    return '  '.join(f"{key} {summary[key] * 1000:8.1f}ms" for key in ('p50', 'p90', 'p99') if key in summary)
+
+def print_report(report: Dict[str, Any]):
+    print(f"模式 {report['mode']}，{report['workers']} 个进程 x 并发 {report['concurrency']}，"
+          f"完成 {report['completed']}/{report['tasks']} 个任务{'（超时）' if report['timed_out'] else ''}")
+    print(f"耗时 {report['elapsed']:.1f} 秒（有效 {report['active_seconds']:.1f} 秒），"
+          f"{report['tasks_per_minute']:.1f} 个任务/分钟")
+    print(f"数据库请求 {report['db_requests']} 次，每个任务 {report['db_requests_per_task']:.2f} 次；"
+          f"YouTube请求每个任务 {report['youtube_requests_per_task']:.2f} 次")
+    print("每个任务的数据库请求:")
+    for route, count in report['db_routes_per_task'].items():
+        print(f"  {route:36s} {count:8.3f}  服务端 {_format_ms(report['db_routes'][route])}")
+    print("阶段耗时:")
+    for stage, summary in report['stages'].items():
+        print(f"  {stage:8s} {_format_ms(summary)}  mean {summary['mean'] * 1000:8.1f}ms  n={summary['count']}")
+    print(f"数据行数: {report['rows']}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='使用本地模拟服务的端到端负载测试')
+    arg_parser.add_argument('--mode', choices=sorted(TASK_TABLES), default='channel', help='爬取模式')
+    arg_parser.add_argument('--workers', type=int, default=1, help='工作进程数')
+    arg_parser.add_argument('--concurrency', type=int, default=16, help='每个进程同时进行的任务数')
+    arg_parser.add_argument('--tasks', type=int, default=200, help='合成的频道或关键词数量')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='模拟YouTube的平均延迟（秒）')
+    arg_parser.add_argument('--jitter', type=float, default=0.5, help='延迟的相对波动比例')
+    arg_parser.add_argument('--db-latency', type=float, default=0.0, help='模拟数据库的平均延迟（秒）')
+    arg_parser.add_argument('--pages', type=int, default=3, help='video模式下每个关键词的搜索结果页数')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='模拟YouTube返回503的比例')
+    arg_parser.add_argument('--duration', type=float, default=600, help='最长运行时间（秒）')
+    arg_parser.add_argument('--lease-batch-size', type=int, default=10, help='每次领取的任务数')
+    arg_parser.add_argument('--write-batch-size', type=int, default=50, help='频道结果批量写入的数量')
+    arg_parser.add_argument('--fixtures', default=FIXTURES_DIR, help='语料目录')
+    arg_parser.add_argument('--output', help='把完整报告以JSON写入该文件')
+    arg_parser.add_argument('--verbose', action='store_true', help='保留工作进程的INFO日志')
+    args = arg_parser.parse_args()
+
+    # 模拟服务使用的解析器会初始化Logger，驱动进程只输出警告
+    harness = LoadHarness(
+        mode=args.mode, workers=args.workers, concurrency=args.concurrency, tasks=args.tasks,
+        latency=args.latency, jitter=args.jitter, db_latency=args.db_latency, pages=args.pages,
+        error_rate=args.error_rate, duration=args.duration, lease_batch_size=args.lease_batch_size,
+        write_batch_size=args.write_batch_size, fixtures_dir=args.fixtures, verbose=args.verbose
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+    report = harness.run()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"已保存报告: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import sys
 import urllib.parse
+import asyncio
 
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -10,11 +11,16 @@ from multiprocessing import Process, Pool, cpu_count, Value
 import time
 import signal
 from src.crawlers.video_crawler import VideoCrawler
+from src.crawlers.http_video_crawler import HttpVideoCrawler
 from src.crawlers.channel_crawler import ChannelCrawler
-from src.utils import Logger
+from src.crawlers.http_channel_crawler import HttpChannelCrawler
+from src.crawlers.crawl_engine import CrawlEngine
+from src.crawlers.innertube_client import SHORTS_SEARCH_PARAMS
+from src.utils import Logger, MetricsServer
+from src.utils.metrics import flush_metrics_on_exit
 import configparser
 import ctypes
-from src.services import ChannelService, VideoService, KeywordService
+from src.services import ChannelService, KeywordService
 
 # 使用多进程共享变量
 should_exit = Value(ctypes.c_bool, False)
@@ -30,9 +36,42 @@ def signal_handler(signum, frame):
     # 设置共享的退出标志
     should_exit.value = True
 
+def build_keyword_task(keyword_data):
+    """根据关键词记录构建搜索任务"""
+    keyword = keyword_data.get('key_words', '')
+    encoded_keyword = urllib.parse.quote(keyword)
+    # 直接打开Shorts筛选的搜索结果页，首屏结果随页面加载，无需再点击Shorts按钮
+    search_url = (
+        f"https://www.youtube.com/results?search_query={encoded_keyword}"
+        f"&sp={urllib.parse.quote(SHORTS_SEARCH_PARAMS)}"
+    )
+    return {
+        'url': search_url,
+        'keyword': keyword,
+        'is_benchmark': False,
+        'keyword_id': keyword_data.get('id')
+    }
+
+def save_channel_result(channel_service, channel, channel_info, worker_id=None):
+    """把频道爬取结果加入写缓冲，写入成功后再标记频道已爬取"""
+    logger = Logger().get_logger()
+    if channel_service.queue_channel_crawl(channel_info, channel):
+        logger.info(f"[进程 {worker_id}] 频道数据已加入写缓冲: {channel['channel_id']}")
+    else:
+        logger.error(f"[进程 {worker_id}] 保存频道数据失败: {channel['channel_id']}")
+
+def warm_up_channel_cache(channel_service):
+    """根据配置预加载频道黑名单缓存（默认关闭：爬取结果使用领取任务时得到的黑名单标记，不查询缓存）"""
+    config = configparser.ConfigParser()
+    config.read('config.ini', encoding='utf-8')
+    if config.getboolean('cache', 'channel_warm_up', fallback=False):
+        channel_service.warm_up_channel_cache()
+
+@flush_metrics_on_exit
 def video_worker(worker_id=None):
     """视频爬取工作进程"""
     crawler = None
+    keyword_service = None
     try:
         logger = Logger().get_logger()
         logger.info(f"启动视频爬取进程 {worker_id}")
@@ -40,9 +79,9 @@ def video_worker(worker_id=None):
         crawler = VideoCrawler(worker_id=worker_id)
         crawler.setup()
         
-        # 使用VideoService和KeywordService
-        video_service = VideoService()
-        keyword_service = KeywordService()
+        # 使用爬虫的VideoService写入视频，KeywordService领取关键词
+        video_service = crawler.video_service
+        keyword_service = KeywordService(worker_id=worker_id)
         
         while not should_exit.value:
             try:
@@ -50,26 +89,20 @@ def video_worker(worker_id=None):
                 keyword_data = keyword_service.get_uncrawled_keywords()
                 
                 if not keyword_data:
+                    # 空闲前先写入缓冲中的视频
+                    video_service.flush_videos()
                     logger.info(f"[进程 {worker_id}] 没有找到未爬取的关键词，等待5分钟后继续...")
                     time.sleep(300)
                     continue
                 
-                # 构建YouTube搜索URL
-                keyword = keyword_data.get('key_words', '')
-                encoded_keyword = urllib.parse.quote(keyword)
-                search_url = f"https://www.youtube.com/results?search_query={encoded_keyword}"
-                
-                # 创建URL数据
-                url_data = {
-                    'url': search_url,
-                    'is_benchmark': False,
-                    'keyword_id': keyword_data.get('id')
-                }
+                # 构建YouTube搜索任务
+                url_data = build_keyword_task(keyword_data)
+                keyword = url_data['keyword']
                 
                 logger.info(
                     f"[进程 {worker_id}] 开始爬取关键词: "
                     f"keyword={keyword}, "
-                    f"url={search_url}"
+                    f"url={url_data['url']}"
                 )
                 
                 # 爬取视频信息
@@ -77,12 +110,12 @@ def video_worker(worker_id=None):
                 
                 if success:
                     logger.info(f"[进程 {worker_id}] 成功爬取关键词: {keyword}")
-                    # 更新关键词状态为已爬取
-                    # 注意：这里不需要调用save_keyword_data，因为get_uncrawled_keywords方法已经更新了last_crawl_date
-                    # 如果需要更新其他字段，可以使用update_keyword_data方法（如果存在）
                 else:
                     logger.error(f"[进程 {worker_id}] 爬取关键词失败: {keyword}")
                 
+                # 标记关键词今天已爬取并清除租约
+                keyword_service.complete_keyword_lease(url_data['keyword_id'])
+                
                 # 等待一段时间再处理下一个关键词
                 time.sleep(2)
                 
@@ -95,6 +128,8 @@ def video_worker(worker_id=None):
         logger.error(f"[进程 {worker_id}] 视频爬取进程出错: {str(e)}")
     finally:
         logger.info(f"[进程 {worker_id}] 正在清理资源...")
+        if keyword_service:
+            keyword_service.release_keyword_leases()
         if crawler:
             try:
                 crawler.cleanup()
@@ -102,9 +137,11 @@ def video_worker(worker_id=None):
                 logger.error(f"[进程 {worker_id}] 清理资源时出错: {str(cleanup_err)}")
         logger.info(f"[进程 {worker_id}] 进程结束")
 
+@flush_metrics_on_exit
 def channel_worker(worker_id=None):
     """频道爬取工作进程"""
     crawler = None
+    channel_service = None
     try:
         logger = Logger().get_logger()
         logger.info(f"启动频道爬取进程 {worker_id}")
@@ -113,7 +150,8 @@ def channel_worker(worker_id=None):
         crawler.setup()
         
         # 直接使用ChannelService
-        channel_service = ChannelService()
+        channel_service = ChannelService(worker_id=worker_id)
+        warm_up_channel_cache(channel_service)
         
         while not should_exit.value:
             try:
@@ -121,6 +159,8 @@ def channel_worker(worker_id=None):
                 channel = channel_service.get_uncrawled_channel()
                 
                 if not channel:
+                    # 空闲前先写入缓冲中的结果
+                    channel_service.flush_channel_crawls()
                     logger.info(f"[进程 {worker_id}] 所有频道今天都已经爬取过，等待5分钟后继续...")
                     time.sleep(300)
                     continue
@@ -138,15 +178,10 @@ def channel_worker(worker_id=None):
                     # 确保channel_id正确
                     channel_info['channel_id'] = channel['channel_id']
                     # 保存到数据库
-                    try:
-                        channel_service.insert_channel_crawl(channel_info)
-                        logger.info(f"[进程 {worker_id}] 成功保存频道数据: {channel['channel_id']}")
-                    except Exception as e:
-                        if "Duplicate entry" not in str(e):
-                            raise
-                        logger.info(f"[进程 {worker_id}] 频道数据已存在: {channel['channel_id']}")
+                    save_channel_result(channel_service, channel, channel_info, worker_id)
                 else:
                     logger.error(f"[进程 {worker_id}] 爬取频道失败: {channel['channel_id']}")
+                    channel_service.complete_channel_lease(channel['channel_id'])
                     
                     # # 删除不存在的频道记录
                     # try:
@@ -171,6 +206,9 @@ def channel_worker(worker_id=None):
         logger.error(f"[进程 {worker_id}] 频道爬取进程出错: {str(e)}")
     finally:
         logger.info(f"[进程 {worker_id}] 正在清理资源...")
+        if channel_service:
+            channel_service.flush_channel_crawls()
+            channel_service.release_channel_leases()
         if crawler:
             try:
                 crawler.cleanup()
@@ -178,6 +216,99 @@ def channel_worker(worker_id=None):
                 logger.error(f"[进程 {worker_id}] 清理资源时出错: {str(cleanup_err)}")
         logger.info(f"[进程 {worker_id}] 进程结束")
 
+async def run_engine(engine, crawler):
+    """运行爬取引擎，结束后关闭爬虫的连接池"""
+    try:
+        await engine.run()
+    finally:
+        await crawler.aclose()
+
+@flush_metrics_on_exit
+def async_video_worker(worker_id=None, concurrency=16):
+    """异步视频爬取工作进程：单个事件循环内并发爬取多个关键词"""
+    logger = Logger().get_logger()
+    try:
+        logger.info(f"启动异步视频爬取进程 {worker_id}，并发数: {concurrency}")
+        crawler = HttpVideoCrawler(worker_id=worker_id)
+        keyword_service = KeywordService(worker_id=worker_id)
+        
+        def lease():
+            keyword_data = keyword_service.get_uncrawled_keywords()
+            # 空闲时写入缓冲中的视频，否则只在达到写入条件时写入
+            crawler.video_service.flush_videos(force=keyword_data is None)
+            return build_keyword_task(keyword_data) if keyword_data else None
+        
+        def persist(url_data, result):
+            if crawler.save_results(result):
+                logger.info(f"[进程 {worker_id}] 成功爬取关键词: {url_data['keyword']}")
+            else:
+                logger.error(f"[进程 {worker_id}] 保存关键词结果失败: {url_data['keyword']}")
+            keyword_service.complete_keyword_lease(url_data['keyword_id'])
+        
+        engine = CrawlEngine(
+            lease=lease,
+            crawl=crawler.crawl_keyword,
+            persist=persist,
+            concurrency=concurrency,
+            worker_id=worker_id,
+            should_stop=lambda: should_exit.value,
+            on_failure=lambda url_data: keyword_service.complete_keyword_lease(url_data['keyword_id'])
+        )
+        try:
+            asyncio.run(run_engine(engine, crawler))
+        finally:
+            crawler.video_service.flush_videos()
+            keyword_service.release_keyword_leases()
+    except Exception as e:
+        logger.error(f"[进程 {worker_id}] 异步视频爬取进程出错: {str(e)}")
+    finally:
+        logger.info(f"[进程 {worker_id}] 进程结束")
+
+@flush_metrics_on_exit
+def async_channel_worker(worker_id=None, concurrency=16):
+    """异步频道爬取工作进程：单个事件循环内并发爬取多个频道"""
+    logger = Logger().get_logger()
+    try:
+        logger.info(f"启动异步频道爬取进程 {worker_id}，并发数: {concurrency}")
+        crawler = HttpChannelCrawler(worker_id=worker_id)
+        channel_service = ChannelService(worker_id=worker_id)
+        warm_up_channel_cache(channel_service)
+        
+        async def crawl(channel):
+            logger.info(f"[进程 {worker_id}] 开始爬取频道: channel_id={channel['channel_id']}")
+            channel_info = await crawler.crawl_channel_async(channel['url'])
+            if not channel_info:
+                logger.error(f"[进程 {worker_id}] 爬取频道失败: {channel['channel_id']}")
+                return None
+            # 确保channel_id正确
+            channel_info['channel_id'] = channel['channel_id']
+            return channel_info
+        
+        def lease():
+            channel = channel_service.get_uncrawled_channel()
+            # 空闲时写入缓冲中的结果，否则只在达到写入条件时写入
+            channel_service.flush_channel_crawls(force=channel is None)
+            return channel
+        
+        engine = CrawlEngine(
+            lease=lease,
+            crawl=crawl,
+            persist=lambda channel, channel_info: save_channel_result(channel_service, channel, channel_info, worker_id),
+            concurrency=concurrency,
+            worker_id=worker_id,
+            should_stop=lambda: should_exit.value,
+            on_failure=lambda channel: channel_service.complete_channel_lease(channel['channel_id'])
+        )
+        try:
+            asyncio.run(run_engine(engine, crawler))
+        finally:
+            channel_service.flush_channel_crawls()
+            channel_service.release_channel_leases()
+    except Exception as e:
+        logger.error(f"[进程 {worker_id}] 异步频道爬取进程出错: {str(e)}")
+    finally:
+        logger.info(f"[进程 {worker_id}] 进程结束")
+
 def main():
     """主函数"""
     signal.signal(signal.SIGINT, signal_handler)
@@ -186,6 +317,7 @@ def main():
     logger = Logger().get_logger()
     channel_procs = []
     video_procs = []  # 新增视频爬取进程列表
+    metrics_server = None
     
     try:
         logger.info("程序启动，按Ctrl+C可以安全退出")
@@ -194,9 +326,23 @@ def main():
         config = configparser.ConfigParser()
         config.read('config.ini', encoding='utf-8')
         
+        # 本地Prometheus指标端点：合并所有工作进程写入的快照
+        if config.getboolean('metrics', 'enabled', fallback=False):
+            metrics_server = MetricsServer(
+                directory=config.get('metrics', 'directory', fallback='data/metrics'),
+                host=config.get('metrics', 'host', fallback='127.0.0.1'),
+                port=config.getint('metrics', 'port', fallback=9108)
+            )
+            # 删除上次运行遗留的快照，计数从本次启动开始
+            metrics_server.clear()
+            port = metrics_server.start()
+            logger.info(f"指标端点已启动: http://{metrics_server.host}:{port}/metrics")
+        
         # 读取开关配置
         enable_video = int(config['crawler'].get('enable_video_crawler', 0))
         enable_channel = int(config['crawler'].get('enable_channel_crawler', 0))
+        # http模式下每个进程同时进行的任务数
+        concurrency = int(config['crawler'].get('concurrency', 16))
         
         if not enable_video and not enable_channel:
             logger.error("视频爬取和频道爬取都已关闭，程序退出")
@@ -208,11 +354,18 @@ def main():
             retry_wait = int(config['crawler'].get('retry_wait', 300))
             max_processes = cpu_count() - 1
             num_processes = min(config_processes, max_processes)
-            logger.info(f"视频爬取已启用，进程数: {num_processes}")
+            video_mode = config['crawler'].get('video_crawler_mode', 'browser')
+            logger.info(f"视频爬取已启用，进程数: {num_processes}, 模式: {video_mode}")
+            
+            # http模式在每个进程内并发处理多个关键词
+            if video_mode == 'http':
+                target, kwargs = async_video_worker, {'concurrency': concurrency}
+            else:
+                target, kwargs = video_worker, {}
             
             # 启动视频爬取进程
             for i in range(num_processes):
-                proc = Process(target=video_worker, kwargs={'worker_id': i})
+                proc = Process(target=target, kwargs=dict(kwargs, worker_id=i))
                 proc.start()
                 video_procs.append(proc)
                 logger.info(f"视频爬取进程 {i+1} 已启动")
@@ -222,11 +375,18 @@ def main():
         # 频道爬取进程配置
         if enable_channel:
             channel_processes = int(config['crawler'].get('channel_processes', 1))
-            logger.info(f"频道爬取已启用，进程数: {channel_processes}")
+            channel_mode = config['crawler'].get('channel_crawler_mode', 'browser')
+            logger.info(f"频道爬取已启用，进程数: {channel_processes}, 模式: {channel_mode}")
+            
+            # http模式在每个进程内并发处理多个频道
+            if channel_mode == 'http':
+                target, kwargs = async_channel_worker, {'concurrency': concurrency}
+            else:
+                target, kwargs = channel_worker, {}
             
             # 启动频道爬取进程
             for i in range(channel_processes):
-                proc = Process(target=channel_worker, kwargs={'worker_id': i})
+                proc = Process(target=target, kwargs=dict(kwargs, worker_id=i))
                 proc.start()
                 channel_procs.append(proc)
                 logger.info(f"频道爬取进程 {i+1} 已启动")
@@ -252,6 +412,8 @@ def main():
                 proc.join(timeout=10)  # 最多等待10秒
                 if proc.is_alive():
                     proc.terminate()
+        if metrics_server is not None:
+            metrics_server.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
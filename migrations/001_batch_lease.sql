@@ -0,0 +1,145 @@
+-- 001_batch_lease.sql
+-- 批量租约：一次领取多个待爬取任务，租约到期后自动回收
+--
+-- 与 get_next_uncrawled_channel / get_next_uncrawled_keyword 的区别：
+-- 1. 领取时只设置租约（lease_owner、lease_expires_at），不修改 last_crawl_date
+-- 2. 使用 FOR UPDATE SKIP LOCKED，多个进程同时领取时互不阻塞、不会领到同一行
+-- 3. 进程崩溃后租约到期，任务会被其他进程重新领取
+-- 4. 爬取完成（无论成功失败）后调用 complete_* 标记当天已爬取并清除租约；
+--    未处理的任务调用 release_* 只清除租约
+
+ALTER TABLE channel_base
+    ADD COLUMN IF NOT EXISTS lease_owner text,
+    ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz;
+
+ALTER TABLE key_words
+    ADD COLUMN IF NOT EXISTS lease_owner text,
+    ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS idx_channel_base_lease_candidates
+    ON channel_base (is_benchmark DESC, last_crawl_date ASC NULLS FIRST)
+    WHERE is_blacklist = false;
+
+CREATE INDEX IF NOT EXISTS idx_key_words_lease_candidates
+    ON key_words (last_crawl_date ASC NULLS FIRST);
+
+-- 领取一批待爬取频道
+CREATE OR REPLACE FUNCTION public.lease_uncrawled_channels(
+    p_worker text,
+    p_limit integer DEFAULT 10,
+    p_lease_seconds integer DEFAULT 1800
+)
+ RETURNS SETOF channel_base
+ LANGUAGE sql
+AS $function$
+    WITH candidates AS (
+        SELECT channel_id
+        FROM channel_base
+        WHERE (last_crawl_date IS NULL OR last_crawl_date != CURRENT_DATE)
+            AND is_blacklist = false
+            AND (lease_expires_at IS NULL OR lease_expires_at < now())
+        ORDER BY
+            is_benchmark DESC,
+            last_crawl_date ASC NULLS FIRST
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE channel_base c
+    SET lease_owner = p_worker,
+        lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+    FROM candidates
+    WHERE c.channel_id = candidates.channel_id
+    RETURNING c.*;
+$function$;
+
+-- 标记频道当天已爬取并清除租约
+CREATE OR REPLACE FUNCTION public.complete_channel_leases(p_worker text, p_channel_ids text[])
+ RETURNS integer
+ LANGUAGE sql
+AS $function$
+    WITH done AS (
+        UPDATE channel_base
+        SET last_crawl_date = CURRENT_DATE,
+            lease_owner = NULL,
+            lease_expires_at = NULL
+        WHERE channel_id = ANY(p_channel_ids)
+            AND (lease_owner = p_worker OR lease_owner IS NULL)
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM done;
+$function$;
+
+-- 归还未处理的频道，其他进程可以立即领取
+CREATE OR REPLACE FUNCTION public.release_channel_leases(p_worker text, p_channel_ids text[])
+ RETURNS integer
+ LANGUAGE sql
+AS $function$
+    WITH released AS (
+        UPDATE channel_base
+        SET lease_owner = NULL,
+            lease_expires_at = NULL
+        WHERE channel_id = ANY(p_channel_ids)
+            AND lease_owner = p_worker
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM released;
+$function$;
+
+-- 领取一批待爬取关键词
+CREATE OR REPLACE FUNCTION public.lease_uncrawled_keywords(
+    p_worker text,
+    p_limit integer DEFAULT 10,
+    p_lease_seconds integer DEFAULT 1800
+)
+ RETURNS SETOF key_words
+ LANGUAGE sql
+AS $function$
+    WITH candidates AS (
+        SELECT id
+        FROM key_words
+        WHERE (last_crawl_date IS NULL OR last_crawl_date != CURRENT_DATE)
+            AND (lease_expires_at IS NULL OR lease_expires_at < now())
+        ORDER BY last_crawl_date ASC NULLS FIRST
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE key_words k
+    SET lease_owner = p_worker,
+        lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+    FROM candidates
+    WHERE k.id = candidates.id
+    RETURNING k.*;
+$function$;
+
+-- 标记关键词当天已爬取并清除租约
+CREATE OR REPLACE FUNCTION public.complete_keyword_leases(p_worker text, p_ids bigint[])
+ RETURNS integer
+ LANGUAGE sql
+AS $function$
+    WITH done AS (
+        UPDATE key_words
+        SET last_crawl_date = CURRENT_DATE,
+            lease_owner = NULL,
+            lease_expires_at = NULL
+        WHERE id = ANY(p_ids)
+            AND (lease_owner = p_worker OR lease_owner IS NULL)
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM done;
+$function$;
+
+-- 归还未处理的关键词，其他进程可以立即领取
+CREATE OR REPLACE FUNCTION public.release_keyword_leases(p_worker text, p_ids bigint[])
+ RETURNS integer
+ LANGUAGE sql
+AS $function$
+    WITH released AS (
+        UPDATE key_words
+        SET lease_owner = NULL,
+            lease_expires_at = NULL
+        WHERE id = ANY(p_ids)
+            AND lease_owner = p_worker
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM released;
+$function$;
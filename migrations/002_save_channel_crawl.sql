@@ -0,0 +1,123 @@
+-- 002_save_channel_crawl.sql
+-- 在一个事务中保存单个频道的爬取结果：
+-- 1. 校验频道存在且不在黑名单中
+-- 2. 用 p_base 中出现的字段更新 channel_base（未出现的字段保持原值），并设置 last_crawl_date
+-- 3. 插入当天的 channel_crawl 记录，当天已存在时忽略
+--
+-- 返回 status：saved / duplicate / not_found / blacklisted
+
+CREATE OR REPLACE FUNCTION public.save_channel_crawl(
+    p_channel_id text,
+    p_base jsonb DEFAULT '{}'::jsonb,
+    p_crawl jsonb DEFAULT '{}'::jsonb
+)
+ RETURNS TABLE(status text)
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+    v_channel channel_base;
+    v_inserted integer;
+BEGIN
+    SELECT * INTO v_channel
+    FROM channel_base
+    WHERE channel_id = p_channel_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_found'::text;
+        RETURN;
+    END IF;
+
+    IF v_channel.is_blacklist THEN
+        RETURN QUERY SELECT 'blacklisted'::text;
+        RETURN;
+    END IF;
+
+    -- jsonb_populate_record 以现有行为基础，只覆盖 p_base 中出现的字段
+    v_channel := jsonb_populate_record(
+        v_channel,
+        p_base - 'channel_id' || jsonb_build_object('last_crawl_date', CURRENT_DATE)
+    );
+    UPDATE channel_base
+    SET channel_name = v_channel.channel_name,
+        description = v_channel.description,
+        canonical_base_url = v_channel.canonical_base_url,
+        avatar_url = v_channel.avatar_url,
+        joined_date = v_channel.joined_date,
+        country = v_channel.country,
+        new_videos_info = v_channel.new_videos_info,
+        last_crawl_date = v_channel.last_crawl_date
+    WHERE channel_id = p_channel_id;
+
+    INSERT INTO channel_crawl (channel_id, subscriber_count, video_count, view_count, crawl_date)
+    SELECT p_channel_id, r.subscriber_count, r.video_count, r.view_count, CURRENT_DATE
+    FROM jsonb_populate_record(NULL::channel_crawl, p_crawl) r
+    ON CONFLICT (channel_id, crawl_date) DO NOTHING;
+
+    GET DIAGNOSTICS v_inserted = ROW_COUNT;
+    RETURN QUERY SELECT CASE WHEN v_inserted > 0 THEN 'saved' ELSE 'duplicate' END;
+END;
+$function$;
+
+-- 批量保存多个频道的爬取结果（实时爬取的写缓冲使用），语义与 save_channel_crawl 相同，
+-- 整批在一个语句中完成：
+-- p_items 为数组，每项为 {"channel_id": ..., "base": {...}, "crawl": {...}}，
+-- 同一频道出现多次时以最后一项为准。
+--
+-- 返回每个频道的 channel_id 和 status：saved / duplicate / not_found / blacklisted
+
+CREATE OR REPLACE FUNCTION public.save_channel_crawls(p_items jsonb)
+ RETURNS TABLE(channel_id text, status text)
+ LANGUAGE sql
+AS $function$
+    WITH items AS (
+        SELECT DISTINCT ON (item->>'channel_id')
+            item->>'channel_id' AS channel_id,
+            COALESCE(item->'base', '{}'::jsonb) - 'channel_id' AS base,
+            COALESCE(item->'crawl', '{}'::jsonb) AS crawl
+        FROM jsonb_array_elements(p_items) WITH ORDINALITY AS t(item, ord)
+        ORDER BY item->>'channel_id', ord DESC
+    ),
+    -- jsonb_populate_record 以现有行为基础，只覆盖 base 中出现的字段
+    merged AS (
+        SELECT i.channel_id, i.crawl, r.channel_name, r.description, r.canonical_base_url,
+               r.avatar_url, r.joined_date, r.country, r.new_videos_info
+        FROM items i
+        JOIN channel_base cb ON cb.channel_id = i.channel_id
+        CROSS JOIN LATERAL jsonb_populate_record(cb, i.base) r
+        WHERE NOT COALESCE(cb.is_blacklist, false)
+    ),
+    updated AS (
+        UPDATE channel_base cb
+        SET channel_name = m.channel_name,
+            description = m.description,
+            canonical_base_url = m.canonical_base_url,
+            avatar_url = m.avatar_url,
+            joined_date = m.joined_date,
+            country = m.country,
+            new_videos_info = m.new_videos_info,
+            last_crawl_date = CURRENT_DATE
+        FROM merged m
+        WHERE cb.channel_id = m.channel_id
+        RETURNING cb.channel_id
+    ),
+    inserted AS (
+        INSERT INTO channel_crawl (channel_id, subscriber_count, video_count, view_count, crawl_date)
+        SELECT m.channel_id, r.subscriber_count, r.video_count, r.view_count, CURRENT_DATE
+        FROM merged m
+        JOIN updated u ON u.channel_id = m.channel_id
+        CROSS JOIN LATERAL jsonb_populate_record(NULL::channel_crawl, m.crawl) r
+        ON CONFLICT (channel_id, crawl_date) DO NOTHING
+        RETURNING channel_crawl.channel_id
+    )
+    SELECT i.channel_id,
+           CASE
+               WHEN cb.channel_id IS NULL THEN 'not_found'
+               WHEN COALESCE(cb.is_blacklist, false) THEN 'blacklisted'
+               WHEN ins.channel_id IS NOT NULL THEN 'saved'
+               ELSE 'duplicate'
+           END
+    FROM items i
+    LEFT JOIN channel_base cb ON cb.channel_id = i.channel_id
+    LEFT JOIN inserted ins ON ins.channel_id = i.channel_id;
+$function$;
@@ -0,0 +1,6 @@
+-- 003_videos_upsert.sql
+-- 搜索结果中的视频按天记录：同一视频同一天只保留一行，重复出现时更新播放量等字段。
+-- VideoModel.save_videos_batch 依赖该唯一索引做upsert（REST的on_conflict和SQL的ON CONFLICT都需要）。
+
+CREATE UNIQUE INDEX IF NOT EXISTS videos_video_id_crawl_date_key
+    ON public.videos (video_id, crawl_date);
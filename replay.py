@@ -0,0 +1,50 @@
+"""
+离线回放响应归档：重新解析已归档的search/browse响应，不访问YouTube
+
+用法（在项目根目录执行）:
+    python replay.py --day 20240101 --output replay_output     # 结果写入本地JSONL文件
+    python replay.py --day 20240101 --db                       # 视频通过写入管道写入，频道只插入channel_crawl
+    python replay.py --kinds search --processes 8              # 只解析和统计，不写入
+"""
+import argparse
+import configparser
+import os
+import sys
+from multiprocessing import cpu_count
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.crawlers.archive_replay import ArchiveReplay, DatabaseReplaySink, FileReplaySink
+
+def main():
+    config = configparser.ConfigParser()
+    config.read('config.ini', encoding='utf-8')
+
+    arg_parser = argparse.ArgumentParser(description='离线回放响应归档')
+    arg_parser.add_argument('--directory', default=config.get('archive', 'directory', fallback='archive'),
+                            help='归档目录，默认读取[archive] directory')
+    arg_parser.add_argument('--day', action='append', dest='days', help='只回放该日期（YYYYMMDD）的段，可重复指定')
+    arg_parser.add_argument('--kinds', nargs='+', help='只回放这些类型的响应，如 search browse page')
+    arg_parser.add_argument('--processes', type=int, default=cpu_count(), help='解析进程数，默认为CPU核数')
+    target = arg_parser.add_mutually_exclusive_group()
+    target.add_argument('--output', help='把结果写入该目录下的videos.jsonl和channels.jsonl')
+    target.add_argument('--db', action='store_true', help='把结果写入数据库')
+    arg_parser.add_argument('--verbose', action='store_true', help='输出解析器的详细日志')
+    args = arg_parser.parse_args()
+
+    sink = None
+    if args.output:
+        sink = FileReplaySink(args.output)
+    elif args.db:
+        sink = DatabaseReplaySink()
+
+    replay = ArchiveReplay(args.directory, processes=args.processes, sink=sink, verbose=args.verbose)
+    result = replay.run(days=args.days, kinds=args.kinds)
+    print(f"回放 {result['segments']} 个段，{result['records']} 个响应（{result['bytes'] / 1024 / 1024:.1f} MB），"
+          f"{result['videos']} 个视频，{result['channels']} 个频道，错误 {result['errors']}，"
+          f"耗时 {result['elapsed']:.2f} 秒，{result['records_per_second']:.0f} 个响应/秒")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import configparser
+import json
+import logging
+import os
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.logger import Logger
+from src.utils.response_archive import ArchiveReader
+from src.utils.response_processor import ResponseProcessor, orjson
+from src.utils.youtube_parser import YouTubeParser
+
+# 按search响应解析的归档类型（initial/continuation为FileHandler写入的搜索响应）
+SEARCH_KINDS = ('search', 'initial', 'continuation')
+CHANNEL_KINDS = ('page', 'browse')
+
+# 工作进程内复用的解析器，由_init_worker创建
+_processor = None
+_parser = None
+
+def _init_worker(verbose: bool = False):
+    global _processor, _parser
+    _processor = ResponseProcessor()
+    _parser = YouTubeParser()
+    if not verbose:
+        # 解析器对每个频道响应输出INFO日志，回放时只保留警告和错误（Logger初始化时会重置级别，需在之后设置）
+        logging.getLogger().setLevel(logging.WARNING)
+
+def _local_date(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+def _new_stats() -> Dict[str, Any]:
+    return {'segments': 0, 'records': 0, 'bytes': 0, 'videos': 0, 'channels': 0, 'skipped': 0, 'errors': 0}
+
+def _build_channel(parser: YouTubeParser, initial_data: Optional[Dict[str, Any]], api_response: Dict[str, Any],
+                   page_info: Optional[Dict[str, Any]], url: Optional[str], crawl_date: str) -> Optional[Dict[str, Any]]:
+    """与HttpChannelCrawler相同的组装方式：about面板数据加上页面中的频道名称、头像和最新视频"""
+    channel_info = parser.analyze_channel_json_response(
+        api_response, page_info['channel_name'] if page_info else None
+    )
+    if not channel_info:
+        return None
+    channel_info['crawl_date'] = crawl_date
+    if page_info and page_info['avatar_url']:
+        channel_info['avatar_url'] = page_info['avatar_url']
+    if initial_data:
+        channel_info['new_videos_info'] = parser.extract_new_videos_info(initial_data)
+    if url:
+        channel_info['url'] = url
+    return channel_info
+
+def replay_segment(task: Tuple[str, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]],
+                                                             Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    解析一个段文件中的全部响应（在工作进程中执行）
+    Args:
+        task: (段文件路径, ArchiveReader.read_segment的过滤条件)
+    Returns:
+        Tuple: (视频列表, 频道信息列表, 统计, 未配对的记录)
+            未配对的记录为 {'pages': task_id -> (initial_data, page_info), 'browses': task_id -> (api_response, crawl_date)}，
+            段文件切换时频道页面和browse响应可能分在相邻的两个段中，由ArchiveReplay跨段配对
+    """
+    if _parser is None:
+        _init_worker()
+    segment_path, filters = task
+    stats = _new_stats()
+    stats['segments'] = 1
+    videos: List[Dict[str, Any]] = []
+    channels: List[Dict[str, Any]] = []
+    # HTTP频道爬虫先归档频道页面再归档browse响应，按task_id暂存页面数据
+    pages: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    browses: Dict[str, Tuple[Dict[str, Any], str]] = {}
+
+    try:
+        records = ArchiveReader.read_segment(segment_path, **filters)
+        for entry, body in records:
+            stats['records'] += 1
+            stats['bytes'] += len(body)
+            kind = entry.get('kind')
+            # 抓取日期和发布日期以响应的抓取时间为基准，而不是回放当天
+            _parser.reference_time = entry.get('ts')
+            crawl_date = _local_date(entry.get('ts') or time.time())
+            response = {'content': {'text': body}, 'headers': []}
+            try:
+                if kind in SEARCH_KINDS:
+                    for video in _parser.extract_videos_from_json(_processor.decode_response(response)):
+                        # VideoData只含标量字段，直接使用实例字典，dataclasses.asdict的深拷贝占回放一半以上的时间
+                        videos.append(video.__dict__)
+                elif kind == 'page':
+                    initial_data = _parser.extract_initial_data(_processor.process_response_content(response))
+                    if not initial_data:
+                        stats['errors'] += 1
+                        continue
+                    page_info = _parser.extract_channel_page_info(initial_data)
+                    if not page_info['channel_name']:
+                        stats['skipped'] += 1
+                    elif _parser.extract_about_continuation(initial_data):
+                        pages[entry.get('task_id')] = (initial_data, page_info)
+                    else:
+                        # 没有"关于"面板时爬虫直接使用页面metadata
+                        channel_info = _build_channel(
+                            _parser, initial_data, initial_data, page_info, entry.get('task_id'), crawl_date
+                        )
+                        if channel_info:
+                            channels.append(channel_info)
+                elif kind == 'browse':
+                    api_response = _processor.decode_response(response)
+                    if entry.get('task_id') not in pages:
+                        # 页面记录在上一个段中，交给ArchiveReplay跨段配对
+                        browses[entry.get('task_id')] = (api_response, crawl_date)
+                        continue
+                    initial_data, page_info = pages.pop(entry.get('task_id'))
+                    channel_info = _build_channel(
+                        _parser, initial_data, api_response, page_info, entry.get('task_id'), crawl_date
+                    )
+                    if channel_info:
+                        channels.append(channel_info)
+                    else:
+                        stats['errors'] += 1
+                else:
+                    stats['skipped'] += 1
+            except Exception as e:
+                stats['errors'] += 1
+                Logger().log(
+                    f"回放记录失败: {segment_path} offset={entry.get('offset')} kind={kind}: {str(e)}", 'WARNING'
+                )
+    except Exception as e:
+        stats['errors'] += 1
+        Logger().log(f"读取段文件失败: {segment_path}: {str(e)}", 'WARNING')
+
+    stats['videos'] = len(videos)
+    stats['channels'] = len(channels)
+    return videos, channels, stats, {'pages': pages, 'browses': browses}
+
+def match_unpaired(parser: YouTubeParser, pages: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]],
+                   browses: Dict[str, Tuple[Dict[str, Any], str]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    配对分在不同段中的频道页面和browse响应；没有页面的browse响应按没有频道名称的方式组装
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: (频道信息列表, 无法组装的browse响应数)
+    """
+    channels = []
+    errors = 0
+    for task_id, (api_response, crawl_date) in browses.items():
+        initial_data, page_info = pages.get(task_id, (None, None))
+        try:
+            channel_info = _build_channel(parser, initial_data, api_response, page_info, task_id, crawl_date)
+        except Exception:
+            channel_info = None
+        if channel_info:
+            channels.append(channel_info)
+        else:
+            errors += 1
+    return channels, errors
+
+def _dumps_line(row: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(row) + b'\n'
+    return (json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8')
+
+class FileReplaySink:
+    """把回放结果写入本地JSONL文件：videos.jsonl和channels.jsonl"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._videos = open(os.path.join(directory, 'videos.jsonl'), 'ab')
+        self._channels = open(os.path.join(directory, 'channels.jsonl'), 'ab')
+
+    def write(self, videos: List[Dict[str, Any]], channels: List[Dict[str, Any]]):
+        self._videos.writelines(map(_dumps_line, videos))
+        self._channels.writelines(map(_dumps_line, channels))
+
+    def close(self):
+        self._videos.close()
+        self._channels.close()
+
+class DatabaseReplaySink:
+    """把回放结果写入数据库，记录按响应的抓取日期写入
+
+    视频通过VideoService的写入管道写入；频道只插入channel_crawl记录，不经过实时爬取的写缓冲，
+    因此不会完成租约，也不会修改channel_base的last_crawl_date和频道信息
+    """
+
+    def __init__(self, video_service=None, channel_service=None, batch_size: Optional[int] = None):
+        """
+        初始化数据库写入
+        Args:
+            video_service: VideoService实例，默认新建
+            channel_service: ChannelService实例，默认新建
+            batch_size: 频道爬取记录的批量写入行数，默认读取config.ini的[crawler] write_batch_size
+        """
+        if video_service is None or channel_service is None:
+            from src.services import ChannelService, VideoService
+            video_service = video_service or VideoService()
+            channel_service = channel_service or ChannelService()
+        if batch_size is None:
+            config = configparser.ConfigParser()
+            config.read('config.ini', encoding='utf-8')
+            batch_size = config.getint('crawler', 'write_batch_size', fallback=50)
+        self.video_service = video_service
+        self.channel_service = channel_service
+        self.batch_size = max(1, batch_size)
+        self._channels: List[Dict[str, Any]] = []
+
+    def write(self, videos: List[Dict[str, Any]], channels: List[Dict[str, Any]]):
+        if videos:
+            self.video_service.queue_videos(videos)
+        self._channels.extend(channels)
+        if len(self._channels) >= self.batch_size:
+            self.flush_channels()
+
+    def flush_channels(self) -> bool:
+        """写入暂存的频道爬取记录，写入失败时丢弃本批（回放可以重新执行）"""
+        channels, self._channels = self._channels, []
+        return self.channel_service.save_archived_channel_crawls(channels)
+
+    def close(self):
+        self.video_service.flush_videos()
+        self.flush_channels()
+
+class ArchiveReplay:
+    """离线回放归档的响应：多进程解码并解析段文件，结果写入数据库或本地文件，不访问YouTube"""
+
+    def __init__(self, directory: str = 'archive', processes: int = 1, sink=None, verbose: bool = False):
+        """
+        初始化回放
+        Args:
+            directory: 归档根目录
+            processes: 解析进程数，小于等于1时在当前进程中解析
+            sink: 结果写入对象（FileReplaySink/DatabaseReplaySink），为None时只解析和统计
+            verbose: 为True时保留解析器的INFO日志
+        """
+        self.reader = ArchiveReader(directory)
+        self.processes = processes
+        self.sink = sink
+        self.verbose = verbose
+        self.logger = Logger()
+        self.stats = _new_stats()
+
+    def _results(self, tasks: List[Tuple[str, Dict[str, Any]]]) -> Iterable:
+        if self.processes <= 1:
+            level = logging.getLogger().level
+            _init_worker(self.verbose)
+            try:
+                yield from map(replay_segment, tasks)
+            finally:
+                logging.getLogger().setLevel(level)
+            return
+        pool = Pool(self.processes, initializer=_init_worker, initargs=(self.verbose,))
+        try:
+            yield from pool.imap_unordered(replay_segment, tasks)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def run(self, days: Optional[Sequence[str]] = None, kinds: Optional[Sequence[str]] = None,
+            since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """
+        回放归档中的响应
+        Args:
+            days: 只回放这些日期（YYYYMMDD）的段，默认全部
+            kinds: 只回放这些类型的响应，默认search和频道相关的全部类型
+            since: 只回放该时间之后的响应
+            until: 只回放该时间之前的响应
+        Returns:
+            Dict[str, Any]: 统计，包括elapsed和records_per_second
+        """
+        filters = {'kinds': list(kinds or SEARCH_KINDS + CHANNEL_KINDS), 'since': since, 'until': until}
+        tasks = [(path, filters) for path in self.reader.segments(days)]
+        self.logger.log(f"开始回放 {len(tasks)} 个段文件，进程数: {max(self.processes, 1)}")
+
+        started = time.perf_counter()
+        results = self._results(tasks)
+        unpaired_pages: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        unpaired_browses: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        try:
+            for videos, channels, stats, unpaired in results:
+                for key, value in stats.items():
+                    self.stats[key] += value
+                unpaired_pages.update(unpaired['pages'])
+                unpaired_browses.update(unpaired['browses'])
+                if self.sink is not None:
+                    self.sink.write(videos, channels)
+
+            # 段文件无序完成，全部解析后再配对跨段的频道页面和browse响应
+            if unpaired_browses:
+                channels, errors = match_unpaired(YouTubeParser(), unpaired_pages, unpaired_browses)
+                self.stats['channels'] += len(channels)
+                self.stats['errors'] += errors
+                if self.sink is not None and channels:
+                    self.sink.write([], channels)
+        finally:
+            if hasattr(results, 'close'):
+                results.close()
+            if self.sink is not None:
+                self.sink.close()
+
+        elapsed = time.perf_counter() - started
+        result = dict(self.stats)
+        result['elapsed'] = elapsed
+        result['records_per_second'] = result['records'] / elapsed if elapsed else 0.0
+        self.logger.log(
+            f"回放完成: {result['records']} 个响应，{result['videos']} 个视频，{result['channels']} 个频道，"
+            f"错误 {result['errors']}，耗时 {elapsed:.2f} 秒，{result['records_per_second']:.0f} 个响应/秒"
+        )
+        return result
@@ -1,4 +1,3 @@
-from browsermobproxy import Server
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -7,7 +6,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
 import json
-from src.utils import ResponseProcessor, YouTubeParser, SelectorUtils
+from src.crawlers.network_capture import create_network_capture, CaptureReader
+from src.utils import ResponseProcessor, YouTubeParser, SelectorUtils, SelectorStats, WaitUtils
+from src.utils.response_archive import ResponseArchive
+from src.utils.metrics import timed
 from src.services import ChannelService
 import configparser
 import random
@@ -16,19 +18,60 @@ import base64
 import brotli
 import os
 
+# 频道页面需要提取的字段，{index}依次替换为1..count
+CHANNEL_PAGE_FIELDS = {
+    'channel_name': {
+        'selectors': [
+            "//*[@id='channel-name']",
+            "//h1[contains(@class, 'title')]",
+            "//h1//span",
+            "//*[@id='page-header']//h1//span"
+        ],
+        'group': 'channel_name'
+    },
+    'avatar_url': {
+        'selectors': [
+            "//*[@id='page-header']//yt-avatar-shape//img",
+            "//yt-decorated-avatar-view-model//img",
+            "//*[contains(@class, 'channel-avatar')]//img",
+            "//*[contains(@class, 'avatar')]//img"
+        ],
+        'attribute': 'src',
+        'group': 'avatar'
+    },
+    'video_thumbnails': {
+        'selectors': ["//ytd-rich-grid-renderer//ytd-rich-item-renderer[{index}]//img"],
+        'attribute': 'src',
+        'count': 3
+    },
+    'video_titles': {
+        'selectors': ["//ytd-rich-grid-renderer//ytd-rich-item-renderer[{index}]//h3/a/span"],
+        'count': 3
+    },
+    'video_views': {
+        'selectors': ["//ytd-rich-grid-renderer//ytd-rich-item-renderer[{index}]//div/div[1]/span"],
+        'count': 3
+    },
+    'video_urls': {
+        'selectors': ["//ytd-rich-grid-renderer//ytd-rich-item-renderer[{index}]//ytm-shorts-lockup-view-model/a"],
+        'attribute': 'href',
+        'count': 3
+    }
+}
+
 class ChannelCrawler:
     def __init__(self, worker_id=None, proxy_path=r"C:\Program Files\browsermob-proxy-2.1.4\bin\browsermob-proxy.bat"):
         """初始化频道爬虫"""
         self.proxy_path = proxy_path
         self.worker_id = worker_id
-        self.server = None
-        self.proxy = None
+        self.capture = None
         self.driver = None
         from src.utils import Logger
         self.logger = Logger()
-        self.response_processor = ResponseProcessor()
+        self.response_processor = ResponseProcessor(archive=ResponseArchive.default())
         self.youtube_parser = YouTubeParser()
         self.selector_utils = SelectorUtils()
+        self.waits = WaitUtils(worker_id=worker_id)
         
     def log(self, message, level='INFO'):
         """输出日志"""
@@ -40,41 +83,28 @@ class ChannelCrawler:
             # 读取配置文件
             config = configparser.ConfigParser()
             config.read('config.ini', encoding='utf-8')
-            proxy_path = config['proxy']['path']
+            backend = config['crawler'].get('capture_backend', 'cdp')
             
-            # 启动代理服务器
-            self.log("启动代理服务器...")
+            # 启动网络捕获：cdp直接读取浏览器网络事件，har通过BrowserMob代理
             self.proxy_port = 8090 + (self.worker_id * 10 if self.worker_id is not None else 0)
-            self.log(f"使用服务器端口: {self.proxy_port}")
-            
-            self.proxy_server = Server(
-                path=proxy_path,
-                options={
-                    'port': self.proxy_port,
-                    'log_path': 'logs/proxy.log',
-                    'capture_content': True,  # 确保捕获响应内容
-                    'capture_headers': True   # 捕获请求和响应头
-                }
-            )
-            self.proxy_server.start()
-            self.log("代理服务器启动成功")
-            
-            # 创建代理客户端
-            self.proxy = self.proxy_server.create_proxy(
-                params={
+            self.capture = create_network_capture(
+                backend,
+                proxy_path=config['proxy']['path'] if backend == 'har' else None,
+                port=self.proxy_port,
+                proxy_params={
                     'trustAllServers': True,
                     'captureContent': True,   # 确保捕获响应内容
                     'captureHeaders': True    # 捕获请求和响应头
-                }
+                },
+                log=self.log
             )
-            
-            proxy_url = f"localhost:{self.proxy_port + 1}"
-            self.log(f"创建代理成功，地址: {proxy_url}")
+            self.capture.start()
+            self.log(f"网络捕获已启动: {backend}")
             
             # 初始化Chrome浏览器
             self.log("初始化Chrome浏览器...")
             chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument(f'--proxy-server={proxy_url}')
+            self.capture.configure_options(chrome_options)
             chrome_options.add_argument('--ignore-certificate-errors')
             
             # 添加新的配置参数来解决TensorFlow相关问题
@@ -111,6 +141,7 @@ class ChannelCrawler:
             })
             
             self.driver = webdriver.Chrome(options=chrome_options)
+            self.capture.attach(self.driver)
             # 设置页面加载超时
             self.driver.set_page_load_timeout(30)  # 30秒超时
             # 设置脚本执行超时
@@ -129,64 +160,30 @@ class ChannelCrawler:
                 self.driver.quit()
                 self.log("浏览器已关闭")
                 
-            if self.server:
-                self.log("正在停止代理服务器...")
-                self.server.stop()
-                self.log("代理服务器已停止")
+            if self.capture:
+                self.capture.stop()
+                self.capture = None
+                
+            # 写回选择器命中统计
+            SelectorStats.default().flush()
                 
         except Exception as e:
             self.log(f"清理资源时出: {str(e)}", 'ERROR')
             
-    def get_text_by_selectors(self, selectors, attribute=None, wait_time=5):
-        """
-        通过多个选择器尝试获取元素文本或属性值
-        
-        Args:
-            selectors (list): XPath选择器列表
-            attribute (str, optional): 要获取的属性名，如果为None则获取文本内容
-            wait_time (int): 等待元素出现的最大时间（秒）
-            
-        Returns:
-            str: 获取到的文本或属性值，如果所有选择器都失败则返回None
-        """
-        for selector in selectors:
-            try:
-                element = WebDriverWait(self.driver, wait_time).until(
-                    EC.presence_of_element_located((By.XPATH, selector))
-                )
-                value = element.get_attribute(attribute) if attribute else element.text
-                if value:
-                    self.log(f"从选择器 {selector} 获取到{'属性' if attribute else '文本'}: {value}")
-                    return value
-            except Exception as selector_error:
-                self.log(f"选择器 {selector} 未找到元素: {str(selector_error)}")
-                continue
-        return None
-
+    @timed('crawl_channel')
     def crawl_channel(self, url):
         """爬取频道信息"""
         try:
             self.log(f"开始爬取频道: {url}")
             max_retries = 3
             retry_count = 0
-            
-            # 创建responses目录（如果不存在）
-            responses_dir = "responses"
-            if not os.path.exists(responses_dir):
-                os.makedirs(responses_dir)
-                self.log(f"创建目录: {responses_dir}")
 
             while retry_count < max_retries:
                 try:
-                    # 清除之前的HAR记录
-                    self.proxy.new_har(
-                        f"channel_{int(time.time())}", 
-                        options={
-                            'captureHeaders': True,
-                            'captureContent': True,
-                            'captureBinaryContent': True,
-                            'captureEncoding': True
-                        }
+                    # 清除之前的捕获记录
+                    self.capture.new_capture(
+                        f"channel_{int(time.time())}",
+                        url_pattern='.*youtubei/v1/browse.*'
                     )
                     
                     # 访问频道页面时添加超时处理
@@ -196,21 +193,19 @@ class ChannelCrawler:
                     # 如果页面加载成功，重置超时时间为更长的值
                     self.driver.set_page_load_timeout(120)
                     
-                    time.sleep(random.uniform(5, 10))
-                    
-                    # 获取页面上的channel_name
-                    channel_name_selectors = [
-                        "//*[@id='channel-name']",
-                        "//h1[contains(@class, 'title')]",
-                        "//h1//span",
-                        "//*[@id='page-header']//h1//span"
-                    ]
+                    # 等待频道头部渲染完成
+                    self.waits.wait_for_element(
+                        self.driver, " | ".join(CHANNEL_PAGE_FIELDS['channel_name']['selectors']),
+                        timeout=15, name='channel_header'
+                    )
                     
-                    page_channel_name = self.selector_utils.get_text_by_selectors(
-                        self.driver, 
-                        channel_name_selectors,
+                    # 一次性提取频道名称、头像以及前三个视频的封面、标题、播放量和URL
+                    page_fields = self.selector_utils.extract_fields(
+                        self.driver,
+                        CHANNEL_PAGE_FIELDS,
                         self.logger
                     )
+                    page_channel_name = page_fields['channel_name']
                     
                     # 如果所有选择器都失败，保存页面源码和截图以便调试
                     if not page_channel_name:
@@ -236,106 +231,25 @@ class ChannelCrawler:
                         self.log("频道不存在，终止处理")
                         return None
                     
-                    # 获取频道头像URL
-                    avatar_selectors = [
-                        "//*[@id='page-header']//yt-avatar-shape//img",
-                        "//yt-decorated-avatar-view-model//img",
-                        "//*[contains(@class, 'channel-avatar')]//img",
-                        "//*[contains(@class, 'avatar')]//img"
-                    ]
-                    
-                    avatar_url = self.selector_utils.get_text_by_selectors(
-                        self.driver,
-                        avatar_selectors,
-                        self.logger,
-                        attribute='src'
-                    )
-                    
-                    # 获取前三个视频的封面
-                    video_thumbnail_selectors = [
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[1]//img",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[2]//img",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[3]//img"
-                    ]
-                    
-                    video_thumbnails = []
-                    for i, selector in enumerate(video_thumbnail_selectors, 1):
-                        thumbnail_url = self.selector_utils.get_text_by_selectors(
-                            self.driver,
-                            [selector],
-                            self.logger,
-                            attribute='src'
-                        )
-                        if thumbnail_url:
-                            video_thumbnails.append(thumbnail_url)
-                            self.log(f"获取到第{i}个视频封面: {thumbnail_url}")
-                        else:
-                            self.log(f"未能获取到第{i}个视频封面")
-                    
-                    # 获取前三个视频的标题
-                    video_title_selectors = [
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[1]//h3/a/span",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[2]//h3/a/span",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[3]//h3/a/span"
-                    ]
-                    
-                    video_titles = []
-                    for i, selector in enumerate(video_title_selectors, 1):
-                        title = self.selector_utils.get_text_by_selectors(
-                            self.driver,
-                            [selector],
-                            self.logger
-                        )
-                        if title:
-                            video_titles.append(title)
-                            self.log(f"获取到第{i}个视频标题: {title}")
-                        else:
-                            self.log(f"未能获取到第{i}个视频标题")
-                    
-                    # 获取前三个视频的播放量
-                    video_views_selectors = [
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[1]//div/div[1]/span",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[2]//div/div[1]/span",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[3]//div/div[1]/span"
-                    ]
-                    
-                    video_views = []
-                    for i, selector in enumerate(video_views_selectors, 1):
-                        views = self.selector_utils.get_text_by_selectors(
-                            self.driver,
-                            [selector],
-                            self.logger
-                        )
-                        if views:
-                            video_views.append(views)
-                            self.log(f"获取到第{i}个视频播放量: {views}")
-                        else:
-                            self.log(f"未能获取到第{i}个视频播放量")
-                    
-                    # 获取前三个视频的URL
-                    video_url_selectors = [
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[1]//ytm-shorts-lockup-view-model/a",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[2]//ytm-shorts-lockup-view-model/a",
-                        "//ytd-rich-grid-renderer//ytd-rich-item-renderer[3]//ytm-shorts-lockup-view-model/a"
-                    ]
+                    avatar_url = page_fields['avatar_url']
+                    video_thumbnails = [v for v in page_fields['video_thumbnails'] if v]
+                    video_titles = [v for v in page_fields['video_titles'] if v]
+                    video_views = [v for v in page_fields['video_views'] if v]
                     
                     video_urls = []
-                    for i, selector in enumerate(video_url_selectors, 1):
-                        url = self.selector_utils.get_text_by_selectors(
-                            self.driver,
-                            [selector],
-                            self.logger,
-                            attribute='href'
-                        )
-                        if url:
+                    for video_url in page_fields['video_urls']:
+                        if video_url:
                             # 处理shorts URL
-                            if url.startswith('/shorts/'):
-                                video_id = url.split('/shorts/')[1]
-                                url = f"https://www.youtube.com/shorts/{video_id}"
-                            video_urls.append(url)
-                            self.log(f"获取到第{i}个视频URL: {url}")
-                        else:
-                            self.log(f"未能获取到第{i}个视频URL")
+                            if video_url.startswith('/shorts/'):
+                                video_id = video_url.split('/shorts/')[1]
+                                video_url = f"https://www.youtube.com/shorts/{video_id}"
+                            video_urls.append(video_url)
+                    self.log(f"获取到 {len(video_thumbnails)} 个视频封面, {len(video_titles)} 个标题, "
+                             f"{len(video_views)} 个播放量, {len(video_urls)} 个URL")
+                    
+                    # 只读取youtubei/v1/browse请求，按请求标识去重；先取出页面加载期间的请求
+                    reader = CaptureReader(self.capture, url_filter='youtubei/v1/browse')
+                    preloaded_entries = reader.read_new()
                     
                     # 点击"显示更多"区域
                     try:
@@ -349,12 +263,10 @@ class ChannelCrawler:
                         if show_more_element:
                             # 确保元素在视图中
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", show_more_element)
-                            time.sleep(1)
                             
                             # 点击元素
                             self.driver.execute_script("arguments[0].click();", show_more_element)
                             self.log("已点击'显示更多'区域")
-                            time.sleep(random.uniform(2, 3))
                         else:
                             self.log("未找到'显示更多'区域")
                             retry_count += 1
@@ -365,58 +277,36 @@ class ChannelCrawler:
                         retry_count += 1
                         continue
                     
-                    # 等待并获取API响应
-                    time.sleep(2)  # 等待API响应完成
-                    
-                    # 定义需要捕获的请求URL模式
-                    target_url = 'youtubei/v1/browse'
-                    processed_entries = set()
+                    # 等待点击触发的browse响应
+                    wait_result = self.waits.wait_for_response(reader, timeout=10, name='about_browse')
                     api_response = None
                     
                     # 处理网络请求
-                    for entry in self.proxy.har['log']['entries']:
+                    for entry in preloaded_entries + wait_result.value:
                         request_url = entry['request']['url']
-                        entry_id = f"{request_url}_{entry['startedDateTime']}"
+                        self.log(f"\n=== API Request ===")
+                        self.log(f"URL: {request_url}")
+                        self.log(f"Method: {entry['request']['method']}")
+                        self.log(f"Time: {time.strftime('%H:%M:%S')}")
                         
-                        if entry_id not in processed_entries and target_url in request_url:
-                            self.log(f"\n=== API Request ===")
-                            self.log(f"URL: {request_url}")
-                            self.log(f"Method: {entry['request']['method']}")
-                            self.log(f"Time: {time.strftime('%H:%M:%S')}")
+                        # 获取响应内容
+                        response = entry['response']
+                        try:
+                            # 使用ResponseProcessor处理响应内容，启用归档时同时写入响应归档
+                            response_json = self.response_processor.decode_response(
+                                response, {'kind': 'browse', 'task_id': url, 'url': request_url}
+                            )
+                            self.log(f"响应内容大小: {self.response_processor.last_stats['bytes_out']}")
+                            self.log(f"响应JSON keys: {list(response_json.keys())}")
                             
-                            # 获取响应内容
-                            response = entry['response']
-                            if response['content'].get('text'):
-                                try:
-                                    # 使用ResponseProcessor处理响应内容
-                                    response_text = self.response_processor.process_response_content(response)
-                                    self.log(f"响应内容大小: {len(response_text)}")
-                                    
-                                    response_json = json.loads(response_text)
-                                    self.log(f"响应JSON keys: {list(response_json.keys())}")
-                                    
-                                    # 保存响应JSON
-                                    # timestamp = time.strftime("%Y%m%d_%H%M%S")
-                                    # filename = os.path.join(
-                                    #     responses_dir, 
-                                    #     f"response_json_{timestamp}_{self.worker_id}.json"
-                                    # )
-                                    # with open(filename, 'w', encoding='utf-8') as f:
-                                    #     json.dump(response_json, f, ensure_ascii=False, indent=2)
-                                    # self.log(f"已保存响应JSON到文件: {filename}")
-                                    
-                                    # 直接使用响应
-                                    api_response = response_json
-                                    break
-                                        
-                                except json.JSONDecodeError as e:
-                                    self.log(f"JSON解析错误: {str(e)}")
-                                except Exception as e:
-                                    self.log(f"处理API响应时出错: {str(e)}")
-                            else:
-                                self.log("响应内容为空")
+                            # 直接使用响应
+                            api_response = response_json
+                            break
                                 
-                            processed_entries.add(entry_id)
+                        except json.JSONDecodeError as e:
+                            self.log(f"JSON解析错误: {str(e)}")
+                        except Exception as e:
+                            self.log(f"处理API响应时出错: {str(e)}")
                     
                     if api_response:
                         self.log("成功获取API响应")
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.utils import Logger
+
+class CrawlEngine:
+    """异步爬取引擎：在单个事件循环中并发执行多个爬取任务
+
+    任务流分为三个阶段：
+    1. lease：有空闲的爬取协程时才获取待爬取任务（同步数据库调用，在线程池中执行）
+    2. crawl：异步爬取，最多 concurrency 个任务同时进行
+    3. persist：保存爬取结果（同步数据库调用，由单独的协程串行执行），等待保存的结果最多 concurrency 个
+    """
+
+    def __init__(self,
+                 lease: Callable[[], Optional[Dict[str, Any]]],
+                 crawl: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 persist: Callable[[Dict[str, Any], Any], Any],
+                 concurrency: int = 16,
+                 worker_id=None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 idle_wait: int = 300,
+                 on_failure: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        初始化引擎
+        Args:
+            lease: 获取下一个任务的函数，没有任务时返回None
+            crawl: 爬取任务的协程函数，失败时返回None
+            persist: 保存结果的函数，参数为(任务, 爬取结果)
+            concurrency: 同时进行的爬取任务数
+            worker_id: 工作进程ID，用于日志区分
+            should_stop: 返回True时停止获取新任务
+            idle_wait: 没有任务时的等待时间（秒）
+            on_failure: 爬取或保存失败时调用的函数，参数为任务（同步函数，在线程池中执行）
+        """
+        self.lease = lease
+        self.crawl = crawl
+        self.persist = persist
+        self.concurrency = max(1, int(concurrency))
+        self.worker_id = worker_id
+        self.should_stop = should_stop or (lambda: False)
+        self.idle_wait = idle_wait
+        self.on_failure = on_failure
+        self.logger = Logger()
+        self.stats = {'leased': 0, 'succeeded': 0, 'failed': 0, 'persisted': 0, 'persist_failed': 0}
+
+    def log(self, message, level='INFO'):
+        """输出日志"""
+        self.logger.log(message, level, self.worker_id)
+
+    async def _run_sync(self, func, *args):
+        """在线程池中执行同步函数，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def _idle(self):
+        """没有任务时等待，期间每秒检查一次退出标志"""
+        deadline = time.monotonic() + self.idle_wait
+        while not self.should_stop() and time.monotonic() < deadline:
+            await asyncio.sleep(1)
+
+    async def _handle_failure(self, task: Dict[str, Any]):
+        """调用on_failure处理失败的任务（如完成或归还租约）"""
+        if self.on_failure:
+            try:
+                await self._run_sync(self.on_failure, task)
+            except Exception as e:
+                self.log(f"处理失败任务时出错: {str(e)}", 'ERROR')
+
+    async def _lease_loop(self, task_queue: asyncio.Queue, slots: asyncio.Semaphore):
+        """有空闲的爬取协程时才获取任务，避免持有的租约超过并发数"""
+        while not self.should_stop():
+            await slots.acquire()
+            if self.should_stop():
+                slots.release()
+                break
+            try:
+                task = await self._run_sync(self.lease)
+            except Exception as e:
+                slots.release()
+                self.log(f"获取任务时出错: {str(e)}", 'ERROR')
+                await asyncio.sleep(60)
+                continue
+
+            if not task:
+                slots.release()
+                self.log(f"没有待爬取的任务，等待{self.idle_wait}秒后继续...")
+                await self._idle()
+                continue
+
+            self.stats['leased'] += 1
+            await task_queue.put(task)
+
+    async def _crawl_loop(self, task_queue: asyncio.Queue, result_queue: asyncio.Queue,
+                          slots: asyncio.Semaphore):
+        """从队列中取任务爬取，结果交给保存协程；结果放入队列后才空出位置获取下一个任务"""
+        while True:
+            task = await task_queue.get()
+            if task is None:
+                break
+            try:
+                try:
+                    result = await self.crawl(task)
+                except Exception as e:
+                    self.log(f"爬取任务时出错: {str(e)}", 'ERROR')
+                    result = None
+
+                if result is None:
+                    self.stats['failed'] += 1
+                    await self._handle_failure(task)
+                else:
+                    self.stats['succeeded'] += 1
+                    await result_queue.put((task, result))
+            finally:
+                slots.release()
+
+    async def _persist_loop(self, result_queue: asyncio.Queue):
+        """串行保存爬取结果"""
+        while True:
+            item = await result_queue.get()
+            if item is None:
+                break
+            task, result = item
+            try:
+                await self._run_sync(self.persist, task, result)
+                self.stats['persisted'] += 1
+            except Exception as e:
+                self.stats['persist_failed'] += 1
+                self.log(f"保存爬取结果时出错: {str(e)}", 'ERROR')
+                await self._handle_failure(task)
+
+    async def run(self):
+        """运行引擎，直到should_stop返回True且所有进行中的任务完成"""
+        self.log(f"异步爬取引擎启动，并发数: {self.concurrency}")
+        task_queue = asyncio.Queue(maxsize=self.concurrency)
+        # 保存较慢时爬取协程在放入结果时等待，不再获取新任务
+        result_queue = asyncio.Queue(maxsize=self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        workers = [
+            asyncio.ensure_future(self._crawl_loop(task_queue, result_queue, slots))
+            for _ in range(self.concurrency)
+        ]
+        persister = asyncio.ensure_future(self._persist_loop(result_queue))
+
+        try:
+            await self._lease_loop(task_queue, slots)
+        finally:
+            # 通知爬取协程退出，等待进行中的任务完成后再停止保存协程
+            for _ in workers:
+                await task_queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+            await result_queue.put(None)
+            await persister
+            self.log(
+                f"异步爬取引擎已停止: 获取 {self.stats['leased']}, 成功 {self.stats['succeeded']}, "
+                f"失败 {self.stats['failed']}, 已保存 {self.stats['persisted']}, 保存失败 {self.stats['persist_failed']}"
+            )
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Dict, Any, Optional
+import aiohttp
+from src.crawlers.innertube_client import InnerTubeClient
+from src.utils import YouTubeParser
+from src.utils.metrics import timed
+
+class HttpChannelCrawler:
+    """基于HTTP请求的频道爬虫：解析频道页面的ytInitialData并直接请求"关于"面板，不启动浏览器"""
+
+    def __init__(self, worker_id=None, client=None):
+        """
+        初始化频道爬虫
+        Args:
+            worker_id: 工作进程ID，用于日志区分
+            client: 可选的InnerTubeClient实例，多个爬虫可共享同一个连接池
+        """
+        self.worker_id = worker_id
+        from src.utils import Logger
+        self.logger = Logger()
+        # 与浏览器模式保持一致使用英文界面，订阅数等字段按英文格式解析
+        self.client = client or InnerTubeClient(hl='en', gl='US', worker_id=worker_id)
+        self.youtube_parser = YouTubeParser()
+        self._loop = None
+
+    def log(self, message, level='INFO'):
+        """输出日志"""
+        self.logger.log(message, level, self.worker_id)
+
+    def setup(self):
+        """初始化爬虫（同步调用方式使用独立的事件循环）"""
+        self._loop = asyncio.new_event_loop()
+        self.log("HTTP频道爬虫初始化成功")
+
+    def cleanup(self):
+        """清理资源"""
+        try:
+            if self._loop:
+                self._loop.run_until_complete(self.aclose())
+                self._loop.close()
+                self._loop = None
+                self.log("HTTP连接池已关闭")
+        except Exception as e:
+            self.log(f"清理资源时出错: {str(e)}", 'ERROR')
+
+    async def aclose(self):
+        """关闭HTTP连接池"""
+        await self.client.close()
+
+    def crawl_channel(self, url):
+        """爬取频道信息（与ChannelCrawler.crawl_channel接口一致的同步入口）"""
+        if self._loop is None:
+            self.setup()
+        return self._loop.run_until_complete(self.crawl_channel_async(url))
+
+    @timed('crawl_channel')
+    async def crawl_channel_async(self, url) -> Optional[Dict[str, Any]]:
+        """
+        爬取频道信息
+        Args:
+            url: 频道Shorts页面URL
+        Returns:
+            Optional[Dict[str, Any]]: 频道信息，频道不存在或解析失败时返回None
+        """
+        try:
+            self.log(f"开始爬取频道: {url}")
+
+            try:
+                html = await self.client.fetch_page(url)
+            except aiohttp.ClientResponseError as e:
+                self.log(f"频道页面请求失败(HTTP {e.status})，频道可能不存在: {url}")
+                return None
+
+            initial_data = self.youtube_parser.extract_initial_data(html)
+            if not initial_data:
+                self.log("未能从频道页面获取ytInitialData")
+                return None
+
+            page_info = self.youtube_parser.extract_channel_page_info(initial_data)
+            if not page_info['channel_name']:
+                self.log("频道页面中没有频道信息，频道不存在，终止处理")
+                return None
+
+            # 直接发送"显示更多"对应的browse continuation请求
+            token = self.youtube_parser.extract_about_continuation(initial_data)
+            if token:
+                api_response = await self.client.browse(continuation=token, task_id=url)
+            else:
+                self.log("未找到'关于'面板的continuation，使用页面metadata解析", 'WARNING')
+                api_response = initial_data
+
+            channel_info = self.youtube_parser.analyze_channel_json_response(api_response, page_info['channel_name'])
+            if not channel_info:
+                self.log("解析频道信息失败")
+                return None
+
+            if page_info['avatar_url']:
+                channel_info['avatar_url'] = page_info['avatar_url']
+
+            channel_info['new_videos_info'] = self.youtube_parser.extract_new_videos_info(initial_data)
+
+            self.log("成功解析频道信息")
+            return channel_info
+
+        except Exception as e:
+            self.log(f"爬取频道时出错: {str(e)}", 'ERROR')
+            return None
@@ -0,0 +1,169 @@
+import asyncio
+import configparser
+import logging
+import urllib.parse
+from typing import Dict, Any, Optional
+from src.crawlers.innertube_client import InnerTubeClient
+from src.services import ChannelService, VideoService
+from src.utils.logger import Logger
+from src.utils.metrics import timed
+from src.utils.youtube_parser import YouTubeParser
+
+class HttpVideoCrawler:
+    """基于InnerTube接口的关键词搜索爬虫，直接发送search请求，不启动浏览器"""
+
+    def __init__(self, worker_id=None, client=None):
+        """
+        初始化爬虫
+        Args:
+            worker_id: 工作进程ID，用于日志区分
+            client: 可选的InnerTubeClient实例，多个爬虫可共享同一个连接池
+        """
+        config = configparser.ConfigParser()
+        config.read('config.ini', encoding='utf-8')
+        section = config['innertube'] if config.has_section('innertube') else {}
+
+        # 每个关键词最多请求的continuation页数，对应浏览器模式下的滚动次数
+        self.max_continuations = int(section.get('max_continuations', 10))
+        self.worker_id = worker_id
+        self.logger = Logger().get_logger(f'HttpCrawler-{worker_id}' if worker_id is not None else 'HttpCrawler')
+        self.client = client or InnerTubeClient(hl='zh-CN', worker_id=worker_id)
+        self.youtube_parser = YouTubeParser()
+        self._video_service = None
+        self._loop = None
+
+    def log(self, message, level='INFO'):
+        """输出日志"""
+        # 将字符串日志级别转换为对应的整数常量
+        level_map = {
+            'DEBUG': logging.DEBUG,
+            'INFO': logging.INFO,
+            'WARNING': logging.WARNING,
+            'ERROR': logging.ERROR,
+            'CRITICAL': logging.CRITICAL
+        }
+        level_int = level_map.get(level, logging.INFO)
+        self.logger.log(level_int, message)
+
+    @property
+    def video_service(self):
+        """视频服务，第一次使用时才连接数据库"""
+        if self._video_service is None:
+            self._video_service = VideoService()
+        return self._video_service
+
+    def setup(self):
+        """设置爬虫环境（同步调用方式使用独立的事件循环）"""
+        self._loop = asyncio.new_event_loop()
+        self.log("HTTP爬虫环境设置完成")
+        return True
+
+    def cleanup(self):
+        """清理爬虫资源"""
+        self.log("开始清理HTTP爬虫资源...")
+        if self._video_service:
+            self._video_service.flush_videos()
+        if self._loop:
+            try:
+                self._loop.run_until_complete(self.aclose())
+            finally:
+                self._loop.close()
+                self._loop = None
+        self.log("HTTP爬虫资源清理完成")
+
+    async def aclose(self):
+        """关闭HTTP连接池"""
+        await self.client.close()
+
+    def process_url(self, url_data):
+        """
+        处理URL（与VideoCrawler.process_url接口一致的同步入口）
+        Args:
+            url_data: URL数据，包含url、keyword和is_benchmark字段
+        Returns:
+            bool: 处理是否成功
+        """
+        if self._loop is None:
+            self.setup()
+        result = self._loop.run_until_complete(self.crawl_keyword(url_data))
+        if result is None:
+            return False
+        return self.save_results(result)
+
+    @staticmethod
+    def _get_keyword(url_data) -> str:
+        """从任务数据中获取搜索关键词，缺少keyword时从搜索URL中解析"""
+        keyword = url_data.get('keyword')
+        if keyword:
+            return keyword
+        query = urllib.parse.urlparse(url_data.get('url', '')).query
+        return urllib.parse.parse_qs(query).get('search_query', [''])[0]
+
+    @timed('crawl_keyword')
+    async def crawl_keyword(self, url_data) -> Optional[Dict[str, Any]]:
+        """
+        搜索关键词并依次请求continuation页面
+        Args:
+            url_data: URL数据，包含url、keyword字段
+        Returns:
+            Optional[Dict[str, Any]]: 包含keyword、videos、channel_ids、request_count的结果，失败返回None
+        """
+        keyword = self._get_keyword(url_data)
+        if not keyword:
+            self.log("关键词为空，跳过处理")
+            return None
+
+        self.log(f"开始搜索关键词: {keyword}")
+        videos = []
+        all_channel_ids = set()
+        request_count = 0
+
+        try:
+            json_data = await self.client.search(keyword)
+            while json_data is not None:
+                request_count += 1
+                video_data_list = self.youtube_parser.extract_videos_from_json(json_data)
+                videos.extend(video_data_list)
+                for video_data in video_data_list:
+                    if video_data.channel_id:
+                        all_channel_ids.add(video_data.channel_id)
+
+                token = self.youtube_parser.extract_continuation_token(json_data)
+                if not token or request_count > self.max_continuations:
+                    break
+                json_data = await self.client.search_continuation(token, task_id=keyword)
+
+        except Exception as e:
+            if request_count == 0:
+                self.log(f"搜索关键词失败: {keyword}, 错误: {str(e)}", 'ERROR')
+                return None
+            self.log(f"获取第 {request_count + 1} 页搜索结果失败，保留已获取的数据: {str(e)}", 'WARNING')
+
+        self.log(f"关键词 {keyword} 搜索完成，共请求 {request_count} 页，收集到 {len(all_channel_ids)} 个唯一频道ID")
+        return {
+            'keyword': keyword,
+            'videos': videos,
+            'channel_ids': all_channel_ids,
+            'request_count': request_count
+        }
+
+    def save_results(self, result: Dict[str, Any]) -> bool:
+        """
+        保存搜索结果中的视频和发现的频道
+        Args:
+            result: crawl_keyword返回的结果
+        Returns:
+            bool: 保存是否成功
+        """
+        if result.get('videos'):
+            self.video_service.queue_videos(result['videos'])
+        channel_ids = result.get('channel_ids')
+        if not channel_ids:
+            return True
+        try:
+            channel_service = ChannelService()
+            success, _ = channel_service.batch_add_channels(list(channel_ids))
+            return success
+        except Exception as db_error:
+            self.log(f"频道数据插入失败: {str(db_error)}", 'ERROR')
+            return False
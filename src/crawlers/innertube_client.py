@@ -0,0 +1,208 @@
+import asyncio
+import configparser
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+from src.utils import ResponseProcessor
+from src.utils.response_processor import accepted_encodings
+from src.utils.response_archive import ResponseArchive
+from src.utils.logger import Logger
+
+# Shorts 类型筛选参数（对应搜索页URL中的 sp=EgIQCQ%253D%253D）
+SHORTS_SEARCH_PARAMS = 'EgIQCQ%3D%3D'
+
+DEFAULT_BASE_URL = 'https://www.youtube.com'
+DEFAULT_CLIENT_VERSION = '2.20240101.00.00'
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+class InnerTubeError(Exception):
+    """InnerTube请求失败"""
+
+class InnerTubeClient:
+    """YouTube InnerTube接口的异步HTTP客户端（基于连接池，无需浏览器）"""
+
+    def __init__(self, hl='zh-CN', gl='US', base_url=None, worker_id=None):
+        """
+        初始化客户端
+        Args:
+            hl: 界面语言，决定返回文本的语言（影响观看次数等字段的解析）
+            gl: 地区代码
+            base_url: 服务地址，默认读取配置文件，可指向本地的模拟服务器
+            worker_id: 工作进程ID，用于日志区分
+        """
+        config = configparser.ConfigParser()
+        config.read('config.ini', encoding='utf-8')
+        section = config['innertube'] if config.has_section('innertube') else {}
+
+        self.base_url = (base_url or section.get('base_url', DEFAULT_BASE_URL)).rstrip('/')
+        self.client_version = section.get('client_version', DEFAULT_CLIENT_VERSION)
+        self.max_connections = int(section.get('max_connections', 100))
+        self.timeout = float(section.get('timeout', 30))
+        self.max_retries = int(section.get('max_retries', 3))
+        self.hl = hl
+        self.gl = gl
+        self.worker_id = worker_id
+        self.logger = Logger()
+        self.response_processor = ResponseProcessor(archive=ResponseArchive.default())
+        self._session = None
+
+    def log(self, message, level='INFO'):
+        """输出日志"""
+        self.logger.log(message, level, self.worker_id)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取（必要时创建）共享的HTTP会话，会话绑定到当前事件循环"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                # 保留原始压缩内容，交给ResponseProcessor统一解码
+                auto_decompress=False,
+                headers={
+                    'User-Agent': DEFAULT_USER_AGENT,
+                    'Accept-Language': f'{self.hl},{self.hl.split("-")[0]};q=0.9',
+                    'Accept-Encoding': accepted_encodings(),
+                    'Origin': self.base_url,
+                    'X-YouTube-Client-Name': '1',
+                    'X-YouTube-Client-Version': self.client_version
+                }
+            )
+        return self._session
+
+    def _build_context(self) -> Dict[str, Any]:
+        """构建InnerTube请求上下文"""
+        return {
+            'client': {
+                'clientName': 'WEB',
+                'clientVersion': self.client_version,
+                'hl': self.hl,
+                'gl': self.gl
+            }
+        }
+
+    async def _request(self, method: str, url: str, parse_json: bool = False, archive_kind: Optional[str] = None,
+                       task_id: Optional[str] = None, **kwargs) -> Any:
+        """
+        发送请求并返回解码后的内容，遇到网络错误、429和5xx时按指数退避重试
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            parse_json: 为True时直接从响应字节解析为JSON对象
+            archive_kind: 启用了响应归档时，成功的响应以该类型写入归档
+            task_id: 归档记录的任务标识
+        Returns:
+            Any: parse_json为True时为JSON对象，否则为解码后的响应文本
+        """
+        session = self._get_session()
+        last_error = None
+
+        for attempt in range(self.max_retries):
+            try:
+                async with session.request(method, url, **kwargs) as resp:
+                    body = await resp.read()
+                    if resp.status == 429 or resp.status >= 500:
+                        raise InnerTubeError(f"HTTP {resp.status}: {url}")
+                    if resp.status >= 400:
+                        # 客户端错误重试无意义，直接失败
+                        raise aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status, message=f"HTTP {resp.status}"
+                        )
+
+                    response = {
+                        'content': {'text': body},
+                        'headers': [{'name': k, 'value': v} for k, v in resp.headers.items()]
+                    }
+                    archive_as = None
+                    if archive_kind:
+                        archive_as = {'kind': archive_kind, 'task_id': task_id, 'url': str(resp.url)}
+                    if parse_json:
+                        return self.response_processor.decode_response(response, archive_as)
+                    return self.response_processor.process_response_content(response, archive_as)
+
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, InnerTubeError) as e:
+                last_error = e
+                if attempt < self.max_retries - 1:
+                    wait = 2 ** attempt
+                    self.log(f"请求失败({str(e) or type(e).__name__})，{wait}秒后重试: {url}", 'WARNING')
+                    await asyncio.sleep(wait)
+
+        raise InnerTubeError(f"请求失败，已重试{self.max_retries}次: {url}, 错误: {last_error}")
+
+    async def post(self, endpoint: str, payload: Dict[str, Any], task_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        调用InnerTube接口
+        Args:
+            endpoint: 接口名称，如search、browse，同时作为归档记录的类型
+            payload: 请求体（不含context）
+            task_id: 归档记录的任务标识，如关键词或频道URL
+        Returns:
+            Dict[str, Any]: 解析后的JSON响应
+        """
+        body = {'context': self._build_context()}
+        body.update(payload)
+        url = f"{self.base_url}/youtubei/v1/{endpoint}?prettyPrint=false"
+        return await self._request('POST', url, parse_json=True, archive_kind=endpoint, task_id=task_id, json=body)
+
+    async def search(self, query: str, params: Optional[str] = SHORTS_SEARCH_PARAMS) -> Dict[str, Any]:
+        """
+        发送搜索请求
+        Args:
+            query: 搜索关键词
+            params: 搜索筛选参数，默认只搜索Shorts
+        Returns:
+            Dict[str, Any]: 首页搜索结果
+        """
+        payload = {'query': query}
+        if params:
+            payload['params'] = params
+        return await self.post('search', payload, task_id=query)
+
+    async def search_continuation(self, token: str, task_id: Optional[str] = None) -> Dict[str, Any]:
+        """使用continuation token获取下一页搜索结果，task_id为归档记录的任务标识（通常是关键词）"""
+        return await self.post('search', {'continuation': token}, task_id=task_id)
+
+    async def browse(self, browse_id: Optional[str] = None, params: Optional[str] = None,
+                     continuation: Optional[str] = None, task_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        发送browse请求
+        Args:
+            browse_id: 频道ID等浏览对象
+            params: 标签页参数
+            continuation: continuation token，提供时忽略browse_id和params
+            task_id: 归档记录的任务标识，默认为browse_id
+        Returns:
+            Dict[str, Any]: 解析后的JSON响应
+        """
+        if continuation:
+            return await self.post('browse', {'continuation': continuation}, task_id=task_id)
+        payload = {'browseId': browse_id}
+        if params:
+            payload['params'] = params
+        return await self.post('browse', payload, task_id=task_id or browse_id)
+
+    async def fetch_page(self, path: str, params: Optional[Dict[str, str]] = None,
+                         task_id: Optional[str] = None) -> str:
+        """
+        获取页面HTML
+        Args:
+            path: 页面路径（如 /channel/UCxxx/shorts）或完整URL
+            params: 查询参数
+            task_id: 归档记录的任务标识，默认为path
+        Returns:
+            str: 页面HTML
+        """
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        return await self._request('GET', url, archive_kind='page', task_id=task_id or path, params=params)
+
+    async def close(self):
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,314 @@
+import json
+import re
+import time
+from typing import Dict, Any, List, Optional
+
+class HarNetworkCapture:
+    """基于BrowserMob Proxy的网络捕获：请求经过代理，通过HAR读取响应"""
+
+    # 每次get_entries都通过REST接口下载完整HAR，等待条件时按该间隔（秒）轮询，而不是WaitUtils的默认间隔
+    poll_interval = 1.0
+
+    def __init__(self, proxy_path, port=None, proxy_params=None, log=None):
+        """
+        初始化HAR捕获
+        Args:
+            proxy_path: BrowserMob代理启动脚本路径
+            port: 代理服务器端口，为None时使用默认端口
+            proxy_params: 创建代理时的参数
+            log: 日志函数
+        """
+        self.proxy_path = proxy_path
+        self.port = port
+        self.proxy_params = proxy_params
+        self.log = log or (lambda message, level='INFO': None)
+        self.server = None
+        self.proxy = None
+
+    def start(self):
+        """启动代理服务器并创建代理"""
+        from browsermobproxy import Server
+
+        options = {'log_path': 'logs/proxy.log'}
+        if self.port is not None:
+            options['port'] = self.port
+        self.log("启动代理服务器...")
+        self.server = Server(path=self.proxy_path, options=options)
+        self.server.start()
+        self.proxy = self.server.create_proxy(params=self.proxy_params) if self.proxy_params \
+            else self.server.create_proxy()
+        self.proxy.new_har("youtube")
+        self.log(f"创建代理成功，地址: {self.proxy.proxy}")
+
+    def configure_options(self, chrome_options):
+        """让Chrome通过代理访问网络"""
+        chrome_options.add_argument(f'--proxy-server={self.proxy.proxy}')
+
+    def attach(self, driver):
+        """HAR捕获不依赖浏览器"""
+        pass
+
+    def new_capture(self, name, url_pattern: Optional[str] = None):
+        """
+        开始新的捕获，丢弃之前的记录
+        Args:
+            name: 捕获名称
+            url_pattern: 只捕获匹配该正则的请求，为None时捕获全部
+        """
+        options = {
+            'captureHeaders': True,
+            'captureContent': True,
+            'captureBinaryContent': True,
+            'captureEncoding': True
+        }
+        if url_pattern:
+            options['urlPattern'] = url_pattern
+        self.proxy.new_har(name, options=options)
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """获取当前捕获的全部HAR条目"""
+        return self.proxy.har['log']['entries']
+
+    def stop(self):
+        """关闭代理和代理服务器"""
+        if self.proxy:
+            try:
+                self.log("正在关闭代理...")
+                self.proxy.close()
+                self.log("代理已关闭")
+            except Exception as e:
+                self.log(f"清理代理时出错: {str(e)}", 'WARNING')
+            self.proxy = None
+
+        if self.server:
+            try:
+                self.log("正在停止代理服务器...")
+                self.server.stop()
+                self.log("代理服务器已停止")
+            except Exception as e:
+                self.log(f"清理代理服务器时出错: {str(e)}", 'WARNING')
+            self.server = None
+
+class CdpNetworkCapture:
+    """基于Chrome DevTools Protocol的网络捕获：从浏览器性能日志读取Network事件，只获取匹配请求的响应体"""
+
+    # 只读取增量的性能日志，轮询开销小，使用WaitUtils的默认间隔
+    poll_interval = None
+
+    def __init__(self, log=None):
+        """
+        初始化CDP捕获
+        Args:
+            log: 日志函数
+        """
+        self.log = log or (lambda message, level='INFO': None)
+        self.driver = None
+        self.url_pattern = None
+        self._entries = []
+        self._requests = {}
+        self._responses = {}
+
+    def start(self):
+        """CDP捕获无需额外进程"""
+        pass
+
+    def configure_options(self, chrome_options):
+        """开启性能日志以接收Network事件"""
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def attach(self, driver):
+        """绑定浏览器并启用Network域"""
+        self.driver = driver
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.log("已启用CDP网络捕获")
+
+    def new_capture(self, name, url_pattern: Optional[str] = None):
+        """
+        开始新的捕获，丢弃之前的记录和尚未读取的事件
+        Args:
+            name: 捕获名称（仅用于日志）
+            url_pattern: 只获取匹配该正则的响应体，为None时获取全部
+        """
+        self.url_pattern = re.compile(url_pattern) if url_pattern else None
+        self._entries = []
+        self._requests = {}
+        self._responses = {}
+        try:
+            self.driver.get_log('performance')
+        except Exception as e:
+            self.log(f"清空性能日志失败: {str(e)}", 'WARNING')
+
+    def _matches(self, url: str) -> bool:
+        return self.url_pattern is None or bool(self.url_pattern.search(url))
+
+    def _poll(self):
+        """读取新的Network事件，请求完成时获取匹配请求的响应体"""
+        for log_entry in self.driver.get_log('performance'):
+            message = json.loads(log_entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+
+            if method == 'Network.requestWillBeSent':
+                request = params.get('request', {})
+                if self._matches(request.get('url', '')):
+                    self._requests[request_id] = request
+            elif method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if self._matches(response.get('url', '')):
+                    self._responses[request_id] = response
+            elif method == 'Network.loadingFinished' and request_id in self._responses:
+                self._entries.append(self._build_entry(request_id))
+            elif method == 'Network.loadingFailed':
+                self._requests.pop(request_id, None)
+                self._responses.pop(request_id, None)
+
+    def _build_entry(self, request_id) -> Dict[str, Any]:
+        """构建与HAR条目结构一致的记录，便于复用ResponseProcessor"""
+        response = self._responses.pop(request_id)
+        request = self._requests.pop(request_id, {})
+        content = {}
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            content['text'] = body.get('body', '')
+            if body.get('base64Encoded'):
+                content['encoding'] = 'base64'
+        except Exception as e:
+            self.log(f"获取响应内容失败: {response.get('url')}, 错误: {str(e)}", 'WARNING')
+
+        return {
+            'startedDateTime': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'request': {
+                'url': request.get('url', response.get('url', '')),
+                'method': request.get('method', ''),
+                'postData': {'text': request.get('postData', '')}
+            },
+            'response': {
+                'status': response.get('status'),
+                # CDP返回的响应体已解压，去掉content-encoding避免重复解压
+                'headers': [
+                    {'name': k, 'value': v} for k, v in response.get('headers', {}).items()
+                    if k.lower() != 'content-encoding'
+                ],
+                'content': content
+            },
+            '_requestId': request_id
+        }
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """获取当前捕获的全部条目"""
+        self._poll()
+        return self._entries
+
+    def stop(self):
+        """浏览器由爬虫负责关闭，这里只释放引用"""
+        self.driver = None
+        self._entries = []
+        self._requests = {}
+        self._responses = {}
+
+class CaptureReader:
+    """增量读取捕获记录：记录读取位置，每次只处理上次之后的新条目，并按请求标识去重"""
+
+    # 响应内容为空的条目最多重新检查的次数（HAR中条目可能在响应完成前出现）
+    MAX_PENDING_CHECKS = 5
+
+    def __init__(self, capture, url_filter: Optional[str] = None):
+        """
+        初始化读取器
+        Args:
+            capture: 网络捕获实例
+            url_filter: 只返回URL包含该字符串的条目
+        """
+        self.capture = capture
+        self.url_filter = url_filter
+        self.cursor = 0
+        self.seen = set()
+        self._pending = {}
+
+    @staticmethod
+    def entry_identity(entry: Dict[str, Any]) -> str:
+        """
+        获取条目的唯一标识：优先使用CDP的requestId，其次使用请求中的continuation token
+        Args:
+            entry: 捕获条目
+        Returns:
+            str: 唯一标识
+        """
+        if entry.get('_requestId'):
+            return entry['_requestId']
+
+        request = entry.get('request', {})
+        post_text = (request.get('postData') or {}).get('text') or ''
+        if '"continuation"' in post_text:
+            try:
+                token = json.loads(post_text).get('continuation')
+                if token:
+                    return f"continuation:{token}"
+            except ValueError:
+                pass
+        return f"{request.get('url', '')}_{entry.get('startedDateTime', '')}"
+
+    def _is_ready(self, entry: Dict[str, Any]) -> bool:
+        return bool(entry.get('response', {}).get('content', {}).get('text'))
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        """
+        读取自上次调用以来新增的、已完成且未处理过的条目
+        Returns:
+            List[Dict[str, Any]]: 新条目列表
+        """
+        entries = self.capture.get_entries()
+        if len(entries) < self.cursor:
+            # 捕获被重置
+            self.cursor = 0
+            self._pending = {}
+
+        new_entries = []
+
+        # 重新检查之前响应尚未完成的条目
+        for index, checks in list(self._pending.items()):
+            entry = entries[index] if index < len(entries) else None
+            if entry is not None and self._is_ready(entry):
+                del self._pending[index]
+                self._accept(entry, new_entries)
+            elif checks + 1 >= self.MAX_PENDING_CHECKS:
+                del self._pending[index]
+            else:
+                self._pending[index] = checks + 1
+
+        while self.cursor < len(entries):
+            index = self.cursor
+            entry = entries[index]
+            self.cursor += 1
+            if self.url_filter and self.url_filter not in entry.get('request', {}).get('url', ''):
+                continue
+            if not self._is_ready(entry):
+                self._pending[index] = 0
+                continue
+            self._accept(entry, new_entries)
+
+        return new_entries
+
+    def _accept(self, entry: Dict[str, Any], new_entries: List[Dict[str, Any]]):
+        identity = self.entry_identity(entry)
+        if identity in self.seen:
+            return
+        self.seen.add(identity)
+        new_entries.append(entry)
+
+def create_network_capture(backend='cdp', proxy_path=None, port=None, proxy_params=None, log=None):
+    """
+    根据配置创建网络捕获
+    Args:
+        backend: cdp 或 har
+        proxy_path: har模式下BrowserMob代理路径
+        port: har模式下代理服务器端口
+        proxy_params: har模式下创建代理时的参数
+        log: 日志函数
+    Returns:
+        网络捕获实例
+    """
+    if backend == 'har':
+        return HarNetworkCapture(proxy_path, port=port, proxy_params=proxy_params, log=log)
+    return CdpNetworkCapture(log=log)
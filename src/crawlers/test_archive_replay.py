@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from src.crawlers.archive_replay import ArchiveReplay, DatabaseReplaySink, FileReplaySink
+from src.db import Database
+from src.services.channel_meta_cache import ChannelMetaCache
+from src.utils.response_archive import ResponseArchive
+
+CHANNEL_URL = 'https://www.youtube.com/@alpha/shorts'
+
+def _search_response(video_ids):
+    return {'contents': {'twoColumnSearchResultsRenderer': {'primaryContents': {'sectionListRenderer': {'contents': [
+        {'itemSectionRenderer': {'contents': [{'videoRenderer': {
+            'videoId': video_id,
+            'title': {'runs': [{'text': f'标题 {video_id}'}]},
+            'viewCountText': {'simpleText': '1,234次观看'},
+            'publishedTimeText': {'simpleText': '3天前'},
+            'longBylineText': {'runs': [{'text': 'Alpha', 'navigationEndpoint': {'browseEndpoint': {
+                'browseId': 'UCalpha', 'canonicalBaseUrl': '/@alpha'
+            }}}]}
+        }} for video_id in video_ids]}}
+    ]}}}}}
+
+def _channel_page():
+    initial_data = {
+        'metadata': {'channelMetadataRenderer': {
+            'title': 'Alpha', 'avatar': {'thumbnails': [{'url': 'https://example.com/a.jpg'}]}
+        }},
+        'header': {'showEngagementPanelEndpoint': {'continuationCommand': {'token': 'about-token'}}}
+    }
+    return f"<script>var ytInitialData = {json.dumps(initial_data)};</script>"
+
+def _about_response():
+    return {'onResponseReceivedEndpoints': [{'appendContinuationItemsAction': {'continuationItems': [
+        {'aboutChannelRenderer': {'metadata': {'aboutChannelViewModel': {
+            'channelId': 'UCalpha',
+            'canonicalChannelUrl': 'http://www.youtube.com/@alpha',
+            'description': '频道简介',
+            'country': 'US'
+        }}}}
+    ]}}]}
+
+def _write_archive(directory):
+    archive = ResponseArchive(directory, compression='zlib', segment_max_bytes=1024)
+    crawled_at = time.mktime((2024, 1, 2, 12, 0, 0, 0, 0, -1))
+    archive.append(json.dumps(_search_response(['v1', 'v2'])), kind='search', task_id='cats', timestamp=crawled_at)
+    archive.append(json.dumps(_search_response(['v3'])), kind='search', task_id='cats', timestamp=crawled_at)
+    archive.append(_channel_page(), kind='page', task_id=CHANNEL_URL, timestamp=crawled_at)
+    archive.append(json.dumps(_about_response()), kind='browse', task_id=CHANNEL_URL, timestamp=crawled_at)
+    archive.append(b'not json', kind='search', task_id='broken', timestamp=crawled_at)
+    archive.close()
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_replay_to_files():
+    """测试回放归档中的搜索和频道响应，结果使用响应的抓取日期写入本地文件"""
+    print(f"开始测试归档回放 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    with tempfile.TemporaryDirectory() as directory:
+        archive_dir = os.path.join(directory, 'archive')
+        output_dir = os.path.join(directory, 'output')
+        _write_archive(archive_dir)
+
+        result = ArchiveReplay(archive_dir, processes=1, sink=FileReplaySink(output_dir)).run()
+        print(result)
+        assert result['records'] == 5
+        assert result['videos'] == 3 and result['channels'] == 1
+        assert result['errors'] == 1
+
+        videos = _read_jsonl(os.path.join(output_dir, 'videos.jsonl'))
+        assert sorted(video['video_id'] for video in videos) == ['v1', 'v2', 'v3']
+        assert {video['crawl_date'] for video in videos} == {'2024-01-02'}
+        assert {video['published_date'] for video in videos} == {'2023-12-30'}
+
+        channel, = _read_jsonl(os.path.join(output_dir, 'channels.jsonl'))
+        assert channel['channel_id'] == 'UCalpha' and channel['channel_name'] == 'Alpha'
+        assert channel['avatar_url'] == 'https://example.com/a.jpg'
+        assert channel['crawl_date'] == '2024-01-02' and channel['url'] == CHANNEL_URL
+
+def test_replay_pairs_channel_records_across_segments():
+    """测试段文件切换后，频道页面和browse响应分在两个段中时仍能配对出频道名称"""
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(directory, compression='zlib', segment_max_bytes=1)
+        crawled_at = time.mktime((2024, 1, 2, 12, 0, 0, 0, 0, -1))
+        archive.append(_channel_page(), kind='page', task_id=CHANNEL_URL, timestamp=crawled_at)
+        archive.append(json.dumps(_about_response()), kind='browse', task_id=CHANNEL_URL, timestamp=crawled_at)
+        archive.close()
+
+        output_dir = os.path.join(directory, 'output')
+        result = ArchiveReplay(directory, processes=2, sink=FileReplaySink(output_dir)).run()
+        assert result['segments'] == 2
+        assert result['channels'] == 1 and result['errors'] == 0
+        channel, = _read_jsonl(os.path.join(output_dir, 'channels.jsonl'))
+        assert channel['channel_name'] == 'Alpha'
+        assert channel['avatar_url'] == 'https://example.com/a.jpg'
+
+def test_replay_with_process_pool():
+    """测试多进程回放，并按类型过滤"""
+    with tempfile.TemporaryDirectory() as directory:
+        _write_archive(directory)
+        result = ArchiveReplay(directory, processes=2).run(kinds=['search'])
+        assert result['records'] == 3
+        assert result['videos'] == 3 and result['channels'] == 0
+        assert result['records_per_second'] > 0
+
+class FakeQuery:
+    """记录REST请求的模拟查询：表操作记录为(表名, 操作, 数据)"""
+
+    def __init__(self, client, table, rpc=None):
+        self.client = client
+        self.table = table
+        self.rpc = rpc
+        self.action = 'select'
+        self.payload = None
+
+    def __getattr__(self, name):
+        # select/eq/limit等过滤条件直接返回自身
+        return lambda *args, **kwargs: self
+
+    def upsert(self, rows, **kwargs):
+        self.action, self.payload = 'upsert', rows
+        return self
+
+    def update(self, data):
+        self.action, self.payload = 'update', data
+        return self
+
+    def execute(self):
+        if self.rpc is not None:
+            self.client.rpcs.append(self.rpc)
+            return SimpleNamespace(data=[])
+        self.client.requests.append((self.table, self.action, self.payload))
+        if self.action == 'select' and self.table == 'channel_base':
+            return SimpleNamespace(data=[{'channel_id': 'UCalpha', 'is_blacklist': False}])
+        return SimpleNamespace(data=[])
+
+class FakeClient:
+    def __init__(self):
+        self.rpcs = []
+        self.requests = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeQuery(self, None, rpc=name)
+
+class FakeVideoService:
+    def __init__(self):
+        self.videos = []
+
+    def queue_videos(self, videos):
+        self.videos.extend(videos)
+
+    def flush_videos(self):
+        return True
+
+def test_replay_to_database_keeps_leases():
+    """测试回放写入数据库时只按抓取日期插入channel_crawl，不完成租约也不修改channel_base"""
+    from src.services import ChannelService
+    client = FakeClient()
+    previous = Database._instance
+    Database._instance = SimpleNamespace(client=client, direct_sql=False)
+    try:
+        channel_service = ChannelService()
+        channel_service.meta_cache = ChannelMetaCache()
+        with tempfile.TemporaryDirectory() as directory:
+            _write_archive(directory)
+            video_service = FakeVideoService()
+            sink = DatabaseReplaySink(video_service, channel_service, batch_size=10)
+            result = ArchiveReplay(directory, processes=1, sink=sink).run()
+    finally:
+        Database._instance = previous
+
+    assert result['channels'] == 1 and len(video_service.videos) == 3
+    assert 'complete_channel_leases' not in client.rpcs and not client.rpcs
+    writes = [request for request in client.requests if request[1] != 'select']
+    assert [(table, action) for table, action, _ in writes] == [('channel_crawl', 'upsert')]
+    row, = writes[0][2]
+    assert row['channel_id'] == 'UCalpha' and row['crawl_date'] == '2024-01-02'
+
+if __name__ == "__main__":
+    test_replay_to_files()
+    test_replay_pairs_channel_records_across_segments()
+    test_replay_with_process_pool()
+    test_replay_to_database_keeps_leases()
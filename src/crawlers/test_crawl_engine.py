@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+from src.crawlers.crawl_engine import CrawlEngine
+
+def test_engine_runs_tasks_concurrently():
+    """测试引擎在单个事件循环中并发爬取并串行保存"""
+    tasks = [{'id': i} for i in range(20)]
+    persisted = []
+    state = {'in_flight': 0, 'max_in_flight': 0}
+
+    def lease():
+        return tasks.pop(0) if tasks else None
+
+    async def crawl(task):
+        state['in_flight'] += 1
+        state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        await asyncio.sleep(0.05)
+        state['in_flight'] -= 1
+        # 奇数任务模拟爬取失败
+        return None if task['id'] % 2 else {'id': task['id']}
+
+    def persist(task, result):
+        persisted.append(result['id'])
+
+    engine = CrawlEngine(
+        lease=lease,
+        crawl=crawl,
+        persist=persist,
+        concurrency=5,
+        # 任务全部取完后停止
+        should_stop=lambda: not tasks,
+        idle_wait=1
+    )
+
+    print(f"开始测试异步爬取引擎 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    asyncio.run(engine.run())
+    print(f"引擎统计: {engine.stats}, 最大并发: {state['max_in_flight']}")
+
+    assert engine.stats['leased'] == 20
+    assert engine.stats['succeeded'] == 10
+    assert engine.stats['failed'] == 10
+    assert sorted(persisted) == list(range(0, 20, 2))
+    assert state['max_in_flight'] == 5
+
+def test_engine_leases_only_for_free_slots_and_handles_persist_errors():
+    """测试只在有空闲爬取协程时获取任务，保存出错的任务交给on_failure处理"""
+    tasks = [{'id': i} for i in range(12)]
+    failed = []
+    state = {'leased': 0, 'crawled': 0, 'max_unfinished': 0}
+
+    def lease():
+        if not tasks:
+            return None
+        state['leased'] += 1
+        # 已获取但尚未爬取完成的任务数
+        state['max_unfinished'] = max(state['max_unfinished'], state['leased'] - state['crawled'])
+        return tasks.pop(0)
+
+    async def crawl(task):
+        await asyncio.sleep(0.02)
+        state['crawled'] += 1
+        return {'id': task['id']}
+
+    def persist(task, result):
+        if result['id'] % 3 == 0:
+            raise RuntimeError('db down')
+
+    engine = CrawlEngine(
+        lease=lease, crawl=crawl, persist=persist, concurrency=3,
+        should_stop=lambda: not tasks, idle_wait=1, on_failure=lambda task: failed.append(task['id'])
+    )
+    asyncio.run(engine.run())
+    print(f"引擎统计: {engine.stats}, 最多未完成的租约: {state['max_unfinished']}")
+
+    assert state['max_unfinished'] <= 3
+    assert engine.stats['persisted'] == 8 and engine.stats['persist_failed'] == 4
+    assert sorted(failed) == [0, 3, 6, 9]
+
+if __name__ == "__main__":
+    test_engine_runs_tasks_concurrently()
+    test_engine_leases_only_for_free_slots_and_handles_persist_errors()
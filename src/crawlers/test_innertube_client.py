@@ -0,0 +1,193 @@
+import asyncio
+import json
+from datetime import datetime
+from aiohttp import web
+from src.crawlers.innertube_client import InnerTubeClient, SHORTS_SEARCH_PARAMS
+from src.crawlers.http_video_crawler import HttpVideoCrawler
+from src.crawlers.http_channel_crawler import HttpChannelCrawler
+
+def _video_item(video_id, channel_id):
+    """构造一个search响应中的videoRenderer条目"""
+    return {
+        'videoRenderer': {
+            'videoId': video_id,
+            'title': {'runs': [{'text': f'标题 {video_id}'}]},
+            'viewCountText': {'simpleText': '1,234次观看'},
+            'publishedTimeText': {'simpleText': '3天前'},
+            'longBylineText': {'runs': [{
+                'text': f'频道 {channel_id}',
+                'navigationEndpoint': {'browseEndpoint': {
+                    'browseId': channel_id,
+                    'canonicalBaseUrl': f'/@{channel_id}'
+                }}
+            }]}
+        }
+    }
+
+def _continuation_item(token):
+    """构造continuationItemRenderer条目"""
+    return {'continuationItemRenderer': {'continuationEndpoint': {'continuationCommand': {'token': token}}}}
+
+def _initial_response():
+    """首页搜索响应"""
+    return {
+        'contents': {'twoColumnSearchResultsRenderer': {'primaryContents': {'sectionListRenderer': {'contents': [
+            {'itemSectionRenderer': {'contents': [_video_item('v1', 'UC_a'), _video_item('v2', 'UC_b')]}},
+            _continuation_item('page-2')
+        ]}}}}
+    }
+
+def _continuation_response(page, last_page):
+    """continuation页搜索响应"""
+    items = [{'itemSectionRenderer': {'contents': [_video_item(f'v{page}0', f'UC_{page}')]}}]
+    if page < last_page:
+        items.append(_continuation_item(f'page-{page + 1}'))
+    return {'onResponseReceivedCommands': [{'appendContinuationItemsAction': {'continuationItems': items}}]}
+
+def _channel_page_html(channel_id):
+    """频道Shorts页面HTML，内嵌ytInitialData"""
+    initial_data = {
+        'metadata': {'channelMetadataRenderer': {
+            'title': '测试频道',
+            'avatar': {'thumbnails': [{'url': 'https://yt3.example/avatar.jpg'}]}
+        }},
+        'header': {'pageHeaderRenderer': {'content': {'pageHeaderViewModel': {'description': {
+            'descriptionPreviewViewModel': {'rendererContext': {'commandContext': {'onTap': {'innertubeCommand': {
+                'showEngagementPanelEndpoint': {'engagementPanel': {'engagementPanelSectionListRenderer': {
+                    'content': {'sectionListRenderer': {'contents': [{'itemSectionRenderer': {'contents': [
+                        _continuation_item(f'about-{channel_id}')
+                    ]}}]}}
+                }}}
+            }}}}}
+        }}}}},
+        'contents': {'twoColumnBrowseResultsRenderer': {'tabs': [{'tabRenderer': {'selected': True, 'content': {
+            'richGridRenderer': {'contents': [
+                {'richItemRenderer': {'content': {'shortsLockupViewModel': {
+                    'onTap': {'innertubeCommand': {'reelWatchEndpoint': {'videoId': f's{i}'}}},
+                    'overlayMetadata': {'primaryText': {'content': f'Short {i}'}, 'secondaryText': {'content': '1.2K views'}},
+                    'thumbnail': {'sources': [{'url': f'https://i.ytimg.example/s{i}.jpg'}]}
+                }}}} for i in range(5)
+            ] + [_continuation_item('grid-next')]}
+        }}}]}}
+    }
+    return f'<html><script>var ytInitialData = {json.dumps(initial_data)};</script></html>'
+
+def _about_response(channel_id):
+    """频道"关于"面板的browse continuation响应"""
+    return {'onResponseReceivedEndpoints': [{'appendContinuationItemsAction': {'continuationItems': [
+        {'aboutChannelRenderer': {'metadata': {'aboutChannelViewModel': {
+            'channelId': channel_id,
+            'canonicalChannelUrl': 'http://www.youtube.com/@test',
+            'description': '频道简介',
+            'country': 'United States',
+            'subscriberCountText': '1.2K subscribers',
+            'viewCountText': '12,345 views',
+            'videoCountText': '12 videos',
+            'joinedDateText': {'content': 'Joined Jan 5, 2020'}
+        }}}}
+    ]}}]}
+
+async def _start_fake_innertube(last_page=3, requests_log=None):
+    """启动本地模拟InnerTube服务，返回(runner, base_url)"""
+    async def channel_page(request):
+        channel_id = request.match_info['channel_id']
+        if not channel_id.startswith('UC'):
+            return web.Response(status=404)
+        return web.Response(text=_channel_page_html(channel_id), content_type='text/html')
+
+    async def browse(request):
+        body = await request.json()
+        return web.json_response(_about_response(body['continuation'].split('-', 1)[1]))
+
+    async def search(request):
+        body = await request.json()
+        if requests_log is not None:
+            requests_log.append(body)
+        token = body.get('continuation')
+        if token:
+            return web.json_response(_continuation_response(int(token.split('-')[1]), last_page))
+        return web.json_response(_initial_response())
+
+    app = web.Application()
+    app.router.add_post('/youtubei/v1/search', search)
+    app.router.add_post('/youtubei/v1/browse', browse)
+    app.router.add_get('/channel/{channel_id}/shorts', channel_page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}'
+
+def test_search_against_fake_server():
+    """测试InnerTubeClient发送search请求"""
+    async def run():
+        requests_log = []
+        runner, base_url = await _start_fake_innertube(requests_log=requests_log)
+        client = InnerTubeClient(base_url=base_url)
+        try:
+            data = await client.search('测试')
+            assert 'contents' in data
+            assert requests_log[0]['query'] == '测试'
+            assert requests_log[0]['params'] == SHORTS_SEARCH_PARAMS
+            assert requests_log[0]['context']['client']['clientName'] == 'WEB'
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    print(f"开始测试InnerTube search请求 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    asyncio.run(run())
+
+def test_crawl_keyword_follows_continuations():
+    """测试HttpVideoCrawler按continuation翻页并收集频道ID"""
+    async def run():
+        runner, base_url = await _start_fake_innertube(last_page=3)
+        crawler = HttpVideoCrawler(client=InnerTubeClient(base_url=base_url))
+        try:
+            result = await crawler.crawl_keyword({
+                'url': 'https://www.youtube.com/results?search_query=%E6%B5%8B%E8%AF%95'
+            })
+            print(json.dumps({k: v for k, v in result.items() if k != 'videos'}, ensure_ascii=False, default=list))
+            assert result['keyword'] == '测试'
+            assert result['request_count'] == 3
+            assert result['channel_ids'] == {'UC_a', 'UC_b', 'UC_2', 'UC_3'}
+            assert [v.video_id for v in result['videos']] == ['v1', 'v2', 'v20', 'v30']
+        finally:
+            await crawler.aclose()
+            await runner.cleanup()
+
+    print(f"开始测试关键词翻页抓取 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    asyncio.run(run())
+
+def test_crawl_channel_without_browser():
+    """测试HttpChannelCrawler解析频道页面并请求"关于"面板"""
+    async def run():
+        runner, base_url = await _start_fake_innertube()
+        crawler = HttpChannelCrawler(client=InnerTubeClient(base_url=base_url, hl='en'))
+        try:
+            channel_info = await crawler.crawl_channel_async(f'{base_url}/channel/UC_test/shorts')
+            print(json.dumps(channel_info, indent=2, ensure_ascii=False))
+            assert channel_info['channel_id'] == 'UC_test'
+            assert channel_info['channel_name'] == '测试频道'
+            assert channel_info['subscriber_count'] == 1200
+            assert channel_info['view_count'] == 12345
+            assert channel_info['video_count'] == 12
+            assert channel_info['joined_date'] == '2020-01-05'
+            assert channel_info['avatar_url'] == 'https://yt3.example/avatar.jpg'
+            assert [v['url'] for v in channel_info['new_videos_info']] == [
+                f'https://www.youtube.com/shorts/s{i}' for i in range(3)
+            ]
+
+            missing = await crawler.crawl_channel_async(f'{base_url}/channel/missing/shorts')
+            assert missing is None
+        finally:
+            await crawler.aclose()
+            await runner.cleanup()
+
+    print(f"开始测试HTTP频道抓取 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_search_against_fake_server()
+    test_crawl_keyword_follows_continuations()
+    test_crawl_channel_without_browser()
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime
+from src.crawlers.network_capture import CaptureReader
+
+class FakeCapture:
+    """模拟网络捕获，条目列表只追加"""
+
+    def __init__(self):
+        self.entries = []
+
+    def get_entries(self):
+        return self.entries
+
+def _entry(url, token=None, text='{}', request_id=None):
+    entry = {
+        'startedDateTime': '2024-01-01T00:00:00',
+        'request': {'url': url, 'postData': {'text': json.dumps({'continuation': token}) if token else ''}},
+        'response': {'content': {'text': text}, 'headers': []}
+    }
+    if request_id:
+        entry['_requestId'] = request_id
+    return entry
+
+def test_reader_returns_only_new_entries():
+    """测试读取器只返回新增条目并按continuation token去重"""
+    print(f"开始测试增量读取捕获记录 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    capture = FakeCapture()
+    reader = CaptureReader(capture, url_filter='/youtubei/v1/search')
+
+    capture.entries.append(_entry('https://www.youtube.com/youtubei/v1/search', token='a'))
+    capture.entries.append(_entry('https://www.youtube.com/youtubei/v1/log_event'))
+    assert len(reader.read_new()) == 1
+    assert reader.read_new() == []
+
+    # 同一个continuation的重复响应只处理一次
+    capture.entries.append(_entry('https://www.youtube.com/youtubei/v1/search', token='a'))
+    capture.entries.append(_entry('https://www.youtube.com/youtubei/v1/search', token='b'))
+    new_entries = reader.read_new()
+    assert [json.loads(e['request']['postData']['text'])['continuation'] for e in new_entries] == ['b']
+
+def test_reader_rechecks_incomplete_entries():
+    """测试响应尚未完成的条目会在之后的读取中返回"""
+    capture = FakeCapture()
+    reader = CaptureReader(capture, url_filter='/youtubei/v1/search')
+
+    pending = _entry('https://www.youtube.com/youtubei/v1/search', text='', request_id='1')
+    capture.entries.append(pending)
+    assert reader.read_new() == []
+
+    pending['response']['content']['text'] = '{"ok": true}'
+    capture.entries.append(_entry('https://www.youtube.com/youtubei/v1/search', request_id='2'))
+    assert [e['_requestId'] for e in reader.read_new()] == ['1', '2']
+
+if __name__ == "__main__":
+    test_reader_returns_only_new_entries()
+    test_reader_rechecks_incomplete_entries()
@@ -1,4 +1,3 @@
-from browsermobproxy import Server
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -6,10 +5,15 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
 import json
-from src.utils import ResponseProcessor, FileHandler
+import configparser
+import urllib.parse
+from src.crawlers.network_capture import create_network_capture, CaptureReader
+from src.utils import ResponseProcessor, FileHandler, WaitUtils, SelectorUtils, SelectorStats
 from src.services import VideoService, ChannelService
 from src.utils.logger import Logger
 from src.utils.youtube_parser import YouTubeParser
+from src.utils.response_archive import ResponseArchive
+from src.utils.metrics import timed
 import logging
 from typing import Dict, Any
 
@@ -18,19 +22,21 @@ class VideoCrawler:
         """
         初始化爬虫
         Args:
-            proxy_path: BrowserMob代理路径
+            proxy_path: BrowserMob代理路径（仅har捕获模式使用）
             worker_id: 工作进程ID，用于日志区分
         """
         self.proxy_path = proxy_path
-        self.server = None
-        self.proxy = None
+        self.capture = None
         self.driver = None
         self.worker_id = worker_id
         self.logger = Logger().get_logger(f'Crawler-{worker_id}' if worker_id else 'Crawler')
         self.video_service = VideoService()
-        self.response_processor = ResponseProcessor()
+        self.response_processor = ResponseProcessor(archive=ResponseArchive.default())
         self.file_handler = FileHandler()
+        # 当前任务的关键词，作为响应归档的任务标识
+        self._task_id = None
         self.youtube_parser = YouTubeParser()
+        self.waits = WaitUtils(worker_id=worker_id)
         
     def log(self, message, level='INFO'):
         """输出日志"""
@@ -48,15 +54,16 @@ class VideoCrawler:
     def setup(self):
         """设置爬虫环境"""
         try:
-            # 启动BrowserMob代理
-            self.server = Server(self.proxy_path)
-            self.server.start()
-            self.proxy = self.server.create_proxy()
-            self.proxy.new_har("youtube")
+            # 启动网络捕获：cdp直接读取浏览器网络事件，har通过BrowserMob代理
+            config = configparser.ConfigParser()
+            config.read('config.ini', encoding='utf-8')
+            backend = config['crawler'].get('capture_backend', 'cdp')
+            self.capture = create_network_capture(backend, proxy_path=self.proxy_path, log=self.log)
+            self.capture.start()
             
             # 配置Chrome选项
             chrome_options = Options()
-            chrome_options.add_argument('--proxy-server={0}'.format(self.proxy.proxy))
+            self.capture.configure_options(chrome_options)
             
             # 基础稳定性选项
             chrome_options.add_argument('--no-sandbox')
@@ -130,6 +137,7 @@ class VideoCrawler:
             
             # 启动Chrome浏览器
             self.driver = webdriver.Chrome(options=chrome_options)
+            self.capture.attach(self.driver)
             
             # 设置超时时间
             self.driver.set_page_load_timeout(60)  # 增加页面加载超时时间
@@ -150,6 +158,7 @@ class VideoCrawler:
     def cleanup(self):
         """清理爬虫资源"""
         self.log("开始清理爬虫资源...")
+        self.video_service.flush_videos()
         
         # 清理driver
         if self.driver:
@@ -199,27 +208,16 @@ class VideoCrawler:
                 
                 self.driver = None
         
-        # 清理proxy
-        if self.proxy:
-            try:
-                self.log("正在关闭代理...")
-                self.proxy.close()
-                self.proxy = None
-                self.log("代理已关闭")
-            except Exception as e:
-                self.log(f"清理代理时出错: {str(e)}", 'WARNING')
-                self.proxy = None
+        # 清理网络捕获
+        if self.capture:
+            self.capture.stop()
+            self.capture = None
         
-        # 清理server
-        if self.server:
-            try:
-                self.log("正在停止代理服务器...")
-                self.server.stop()
-                self.server = None
-                self.log("代理服务器已停止")
-            except Exception as e:
-                self.log(f"清理代理服务器时出错: {str(e)}", 'WARNING')
-                self.server = None
+        # 写回选择器命中统计
+        try:
+            SelectorStats.default().flush()
+        except Exception as e:
+            self.log(f"保存选择器统计时出错: {str(e)}", 'WARNING')
         
         self.log("爬虫资源清理完成")
             
@@ -240,10 +238,24 @@ class VideoCrawler:
                 return False
                 
             self.log(f"开始处理URL: {url}, is_benchmark={is_benchmark}")
+            self._task_id = url_data.get('keyword') or url
             
             # 访问URL
             self.driver.get(url)
-            time.sleep(5)  # 等待页面加载
+            self.waits.wait_for_document_ready(self.driver, timeout=10)
+            
+            # 已带Shorts筛选参数的搜索页：首屏结果直接读取，无需点击Shorts按钮
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+            if 'sp' in query:
+                result = self._process_shorts_search_page()
+                if result is not None:
+                    return result
+                
+                # 筛选参数失效时回退到普通搜索页并点击Shorts按钮
+                self.log("筛选URL未返回Shorts结果，回退到点击Shorts按钮", 'WARNING')
+                query.pop('sp')
+                self.driver.get(url.split('?')[0] + '?' + urllib.parse.urlencode(query, doseq=True))
+                self.waits.wait_for_document_ready(self.driver, timeout=10)
             
             # 处理Shorts内容
             return self._process_shorts()
@@ -252,6 +264,43 @@ class VideoCrawler:
             self.log(f"处理URL时出错: {str(e)}", 'ERROR')
             return False
             
+    @timed('process_shorts_search_page')
+    def _process_shorts_search_page(self):
+        """
+        处理已带Shorts筛选参数的搜索页：从页面的ytInitialData解析首屏结果，再滚动加载更多
+        Returns:
+            bool: 处理是否成功；页面中没有Shorts结果时返回None，由调用方回退到点击按钮
+        """
+        try:
+            # 开始监视滚动触发的search请求
+            self.capture.new_capture("youtube", url_pattern='.*/youtubei/v1/search.*')
+            reader = CaptureReader(self.capture, url_filter='/youtubei/v1/search')
+            
+            # 首屏结果随页面HTML下发，不会产生search请求
+            initial_json = self.driver.execute_script(
+                "return window.ytInitialData ? JSON.stringify(window.ytInitialData) : null;"
+            )
+            if not initial_json:
+                self.log("页面中未找到ytInitialData", 'WARNING')
+                return None
+            
+            self.response_processor.archive_body(
+                initial_json, {'kind': 'search', 'task_id': self._task_id, 'url': self.driver.current_url}
+            )
+            video_data_list = self.youtube_parser.extract_videos_from_json(json.loads(initial_json))
+            if not video_data_list:
+                return None
+            
+            self.video_service.queue_videos(video_data_list)
+            channel_ids = {video_data.channel_id for video_data in video_data_list if video_data.channel_id}
+            self.log(f"首屏解析到 {len(video_data_list)} 个视频, {len(channel_ids)} 个频道")
+            return self._scroll_and_collect(reader, [], channel_ids)
+            
+        except Exception as e:
+            self.log(f"处理Shorts筛选搜索页时出错: {str(e)}", 'ERROR')
+            return None
+            
+    @timed('process_shorts')
     def _process_shorts(self):
         """处理Shorts内容：点击按钮并分析数据"""
         max_retries = 3
@@ -259,8 +308,8 @@ class VideoCrawler:
         
         while retry_count < max_retries:
             try:
-                # 等待页面完全加载
-                time.sleep(5)
+                # 等待搜索结果上方的chip栏渲染完成
+                self.waits.wait_for_element(self.driver, "//yt-chip-cloud-chip-renderer", timeout=10, name='chip_bar')
                 
                 # 检查页面是否正常加载
                 if "youtube.com" not in self.driver.current_url:
@@ -315,17 +364,18 @@ class VideoCrawler:
                     "//*[contains(text(), 'Shorts')]"
                 ]
                 
-                shorts_button = None
-                for selector in shorts_selectors:
-                    try:
-                        shorts_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        self.log(f"找到Shorts按钮，使用选择器: {selector}")
-                        break
-                    except Exception as e:
-                        self.log(f"选择器 {selector} 未找到Shorts按钮: {str(e)}")
-                        continue
+                # 按近期命中率排序选择器；chip栏已渲染，之后的备选选择器只需短暂等待
+                shorts_button, selector = SelectorUtils.find_element(
+                    self.driver,
+                    shorts_selectors,
+                    self.logger,
+                    group='shorts_chip',
+                    condition=EC.element_to_be_clickable,
+                    wait_time=10,
+                    fallback_wait_time=2
+                )
+                if shorts_button:
+                    self.log(f"找到Shorts按钮，使用选择器: {selector}")
                 
                 if not shorts_button:
                     self.log("未找到Shorts按钮，尝试下一次重试", 'WARNING')
@@ -336,20 +386,18 @@ class VideoCrawler:
                 # 开始监视网络请求
                 self.log("开始监视网络请求")
                 try:
-                    self.proxy.new_har("youtube", options={
-                        'captureHeaders': True,
-                        'captureContent': True,
-                        'captureBinaryContent': True,
-                        'captureEncoding': True,
-                        'urlPattern': '.*/youtubei/v1/search.*'  # 捕获所有youtubei/v1/search请求
-                    })
+                    # 捕获所有youtubei/v1/search请求
+                    self.capture.new_capture("youtube", url_pattern='.*/youtubei/v1/search.*')
                 except Exception as proxy_error:
-                    self.log(f"代理设置失败: {str(proxy_error)}", 'WARNING')
+                    self.log(f"网络捕获设置失败: {str(proxy_error)}", 'WARNING')
+                
+                # 增量读取新捕获的search响应，按requestId或continuation token去重
+                reader = CaptureReader(self.capture, url_filter='/youtubei/v1/search')
+                pending_entries = []
                 
                 # 滚动到按钮位置并点击
                 try:
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", shorts_button)
-                    time.sleep(1)
                     
                     # 尝试多种点击方式
                     click_success = False
@@ -377,115 +425,15 @@ class VideoCrawler:
                         continue
                     
                     self.log("已点击Shorts按钮")
-                    time.sleep(5)  # 等待页面响应
+                    # 等待点击触发的search响应
+                    pending_entries = self.waits.wait_for_response(reader, timeout=10, name='shorts_search').value
                     
                 except Exception as click_error:
                     self.log(f"点击Shorts按钮时出错: {str(click_error)}", 'ERROR')
                     retry_count += 1
                     continue
                 
-                # 初始化变量
-                scroll_count = 0
-                max_scrolls = 10
-                request_count = 0
-                is_initial = True
-                processed_contents = set()  # 用于跟踪已处理的响应内容
-                all_channel_ids = set()  # 用于存储所有唯一的channel_id
-                
-                # 执行滚动操作
-                self.log("开始执行页面滚动")
-                while scroll_count < max_scrolls:
-                    try:
-                        # 使用更可靠的滚动方式
-                        self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
-                        time.sleep(3)  # 增加等待时间，确保页面加载完成
-                        
-                        # 增加滚动计数
-                        scroll_count += 1
-                        self.log(f"已完成第 {scroll_count} 次滚动")
-                        
-                        # 检查driver是否还有效
-                        try:
-                            current_url = self.driver.current_url
-                            if not current_url:
-                                self.log("浏览器连接已断开", 'ERROR')
-                                break
-                        except Exception as e:
-                            self.log(f"浏览器连接检查失败: {str(e)}", 'ERROR')
-                            break
-                        
-                        # 获取当前的HAR日志
-                        try:
-                            entries = self.proxy.har['log']['entries']
-                            self.log(f"当前捕获到 {len(entries)} 个请求")
-                            
-                            # 只处理新的search请求
-                            for entry in entries:
-                                request_url = entry['request']['url']
-                                
-                                # 检查是否是YouTube search API请求
-                                if '/youtubei/v1/search' not in request_url:
-                                    continue
-                                    
-                                # 获取响应内容
-                                response = entry['response']
-                                content = response.get('content', {})
-                                
-                                if content.get('text'):
-                                    # 处理响应内容
-                                    try:
-                                        response_text = self.response_processor.process_response_content({
-                                            'content': content,
-                                            'headers': response.get('headers', [])
-                                        })
-                                        self.log(f"成功获取响应内容，长度: {len(response_text)}")
-                                        
-                                        # 解析JSON
-                                        json_data = json.loads(response_text)
-                                        
-                                        # 使用响应内容的哈希值作为唯一标识
-                                        content_hash = hash(str(json_data))
-                                        if content_hash in processed_contents:
-                                            continue
-                                            
-                                        processed_contents.add(content_hash)
-                                        request_count += 1
-                                        
-                                        # 调用统一的视频解析函数
-                                        video_data_list = self.youtube_parser.extract_videos_from_json(json_data)
-                                        self.log(f"已解析第 {request_count} 个响应中的视频数据")
-                                        
-                                        # 收集channel_id
-                                        for video_data in video_data_list:
-                                            if video_data.channel_id:
-                                                all_channel_ids.add(video_data.channel_id)
-                                        
-                                    except Exception as e:
-                                        self.log(f"处理响应时出错: {str(e)}", 'ERROR')
-                                        continue
-                        except Exception as har_error:
-                            self.log(f"获取HAR日志时出错: {str(har_error)}", 'WARNING')
-                    
-                    except Exception as scroll_error:
-                        self.log(f"滚动操作出错: {str(scroll_error)}", 'ERROR')
-                        break
-                
-                # 打印所有收集到的唯一channel_id
-                self.log(f"数据分析完成，共处理 {request_count} 个请求")
-                self.log(f"共收集到 {len(all_channel_ids)} 个唯一频道ID:")
-                for channel_id in all_channel_ids:
-                    self.log(f"频道ID: {channel_id}")
-                    
-                # 调用批量插入频道函数
-                if all_channel_ids:
-                    try:
-                        channel_service = ChannelService()
-                        channel_service.batch_add_channels(list(all_channel_ids))
-                        self.log("频道数据批量插入成功")
-                    except Exception as db_error:
-                        self.log(f"频道数据插入失败: {str(db_error)}", 'ERROR')
-                
-                return True
+                return self._scroll_and_collect(reader, pending_entries)
                 
             except Exception as e:
                 self.log(f"处理Shorts内容时出错 (重试 {retry_count + 1}/{max_retries}): {str(e)}", 'ERROR')
@@ -499,3 +447,122 @@ class VideoCrawler:
                     break
         
         return False
+            
+    def _scroll_and_collect(self, reader, pending_entries, initial_channel_ids=None):
+        """
+        滚动页面加载更多结果，解析捕获的search响应并保存收集到的频道ID
+        Args:
+            reader: search响应的CaptureReader
+            pending_entries: 已捕获但尚未处理的条目
+            initial_channel_ids: 首屏结果中已解析出的频道ID
+        Returns:
+            bool: 处理是否成功
+        """
+        # 初始化变量
+        scroll_count = 0
+        max_scrolls = 10
+        request_count = 0
+        is_initial = True
+        empty_waits = 0
+        all_channel_ids = set(initial_channel_ids or [])  # 用于存储所有唯一的channel_id
+        
+        # 执行滚动操作
+        self.log("开始执行页面滚动")
+        while scroll_count < max_scrolls:
+            try:
+                # 使用更可靠的滚动方式
+                page_height = self.driver.execute_script("return document.documentElement.scrollHeight;")
+                self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
+                
+                # 等待滚动触发的continuation响应，再等待新内容渲染后才能继续滚动
+                wait_result = self.waits.wait_for_response(reader, timeout=5, name='scroll_continuation')
+                pending_entries.extend(wait_result.value)
+                if wait_result.ok:
+                    empty_waits = 0
+                    self.waits.wait_until(
+                        'page_grow',
+                        lambda: self.driver.execute_script(
+                            "return document.documentElement.scrollHeight;"
+                        ) > page_height,
+                        timeout=3
+                    )
+                else:
+                    empty_waits += 1
+                
+                # 增加滚动计数
+                scroll_count += 1
+                self.log(f"已完成第 {scroll_count} 次滚动")
+                
+                # 检查driver是否还有效
+                try:
+                    current_url = self.driver.current_url
+                    if not current_url:
+                        self.log("浏览器连接已断开", 'ERROR')
+                        break
+                except Exception as e:
+                    self.log(f"浏览器连接检查失败: {str(e)}", 'ERROR')
+                    break
+                
+                # 处理等待期间新捕获的search请求
+                try:
+                    entries, pending_entries = pending_entries, []
+                    self.log(f"本次新捕获到 {len(entries)} 个search请求")
+                    
+                    for entry in entries:
+                        # 获取响应内容
+                        response = entry['response']
+                        content = response.get('content', {})
+                        
+                        if content.get('text'):
+                            # 处理响应内容
+                            try:
+                                json_data = self.response_processor.decode_response({
+                                    'content': content,
+                                    'headers': response.get('headers', [])
+                                }, {'kind': 'search', 'task_id': self._task_id, 'url': entry['request']['url']})
+                                self.log(f"成功解析响应内容，长度: {self.response_processor.last_stats['bytes_out']}")
+                                request_count += 1
+                                
+                                # 调用统一的视频解析函数
+                                video_data_list = self.youtube_parser.extract_videos_from_json(json_data)
+                                self.log(f"已解析第 {request_count} 个响应中的视频数据")
+                                self.video_service.queue_videos(video_data_list)
+                                
+                                # 收集channel_id
+                                for video_data in video_data_list:
+                                    if video_data.channel_id:
+                                        all_channel_ids.add(video_data.channel_id)
+                                
+                            except Exception as e:
+                                self.log(f"处理响应时出错: {str(e)}", 'ERROR')
+                                continue
+                except Exception as har_error:
+                    self.log(f"获取捕获的请求时出错: {str(har_error)}", 'WARNING')
+                
+                # 连续两次滚动都没有新的响应，说明已经没有更多结果
+                if empty_waits >= 2:
+                    self.log("连续滚动未加载到新结果，停止滚动")
+                    break
+            
+            except Exception as scroll_error:
+                self.log(f"滚动操作出错: {str(scroll_error)}", 'ERROR')
+                break
+        
+        # 打印所有收集到的唯一channel_id
+        self.log(f"数据分析完成，共处理 {request_count} 个请求")
+        self.log(f"共收集到 {len(all_channel_ids)} 个唯一频道ID:")
+        for channel_id in all_channel_ids:
+            self.log(f"频道ID: {channel_id}")
+            
+        # 调用批量插入频道函数
+        if all_channel_ids:
+            try:
+                channel_service = ChannelService()
+                channel_service.batch_add_channels(list(all_channel_ids))
+                self.log("频道数据批量插入成功")
+            except Exception as db_error:
+                self.log(f"频道数据插入失败: {str(db_error)}", 'ERROR')
+        
+        # 视频跨关键词累积，只在达到写入条件时写入
+        self.video_service.flush_videos(force=False)
+        return True
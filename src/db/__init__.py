@@ -1,3 +1,5 @@
 from .database import Database
+from .backends import DatabaseBackend, SupabaseBackend, PostgresBackend
+from .bulk_writer import BulkWriter, BulkResult, ChunkStats
 
-__all__ = ['Database'] 
\ No newline at end of file
+__all__ = ['Database', 'DatabaseBackend', 'SupabaseBackend', 'PostgresBackend', 'BulkWriter', 'BulkResult', 'ChunkStats']
\ No newline at end of file
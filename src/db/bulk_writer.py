@@ -0,0 +1,170 @@
+import configparser
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.utils.metrics import db_request
+
+@dataclass
+class ChunkStats:
+    """单个分块的写入统计"""
+    index: int
+    attempted: int
+    inserted: int = 0
+    skipped: int = 0
+    # 冲突时更新的upsert返回全部行，无法区分新增和更新，只记录写入的行数
+    upserted: int = 0
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    # 本块的记录，调用方据此判断哪些记录已写入
+    rows: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class BulkResult:
+    """一次批量写入的汇总结果"""
+    table: str
+    chunks: List[ChunkStats] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def attempted(self) -> int:
+        return sum(chunk.attempted for chunk in self.chunks)
+
+    @property
+    def inserted(self) -> int:
+        return sum(chunk.inserted for chunk in self.chunks)
+
+    @property
+    def skipped(self) -> int:
+        return sum(chunk.skipped for chunk in self.chunks)
+
+    @property
+    def upserted(self) -> int:
+        return sum(chunk.upserted for chunk in self.chunks)
+
+    def describe_counts(self) -> str:
+        """按写入方式描述行数：忽略冲突或普通insert时为新增/跳过，冲突时更新的upsert为写入行数"""
+        if self.upserted:
+            return f"upsert {self.upserted} 行（新增和更新不区分）"
+        return f"新增 {self.inserted}，跳过 {self.skipped}"
+
+    @property
+    def failed_chunks(self) -> List[ChunkStats]:
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_chunks
+
+    def summary(self) -> str:
+        return (f"{self.table}: 共 {self.attempted} 行，分 {len(self.chunks)} 块，"
+                f"{self.describe_counts()}，失败 {len(self.failed_chunks)} 块，"
+                f"耗时 {self.elapsed:.2f} 秒")
+
+class BulkWriter:
+    """批量写入工具：把记录拆分为多个分块，通过共享的连接池并发upsert，失败的分块按指数退避重试"""
+
+    def __init__(self, client=None, chunk_size: Optional[int] = None, max_workers: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff: float = 1.0, logger=None, backend=None):
+        """
+        初始化批量写入工具
+        Args:
+            client: Supabase客户端（内部的HTTP连接池在线程间共享）
+            chunk_size: 每个分块的行数，默认读取config.ini的[database] bulk_chunk_size
+            max_workers: 同时写入的分块数，默认读取[database] bulk_workers
+            max_retries: 每个分块的最大重试次数，默认读取[database] bulk_max_retries
+            backoff: 第一次重试前的等待时间（秒），之后每次翻倍
+            logger: 日志记录器实例
+            backend: 数据库后端（如PostgresBackend），提供时通过backend.upsert_many写入，不使用client
+        """
+        config = configparser.ConfigParser()
+        config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.ini'))
+        self.client = client
+        self.backend = backend
+        self.chunk_size = max(1, chunk_size or config.getint('database', 'bulk_chunk_size', fallback=500))
+        self.max_workers = max(1, max_workers or config.getint('database', 'bulk_workers', fallback=4))
+        self.max_retries = max_retries if max_retries is not None \
+            else config.getint('database', 'bulk_max_retries', fallback=3)
+        self.backoff = backoff
+        self.logger = logger
+
+    def log(self, message, level='INFO'):
+        if self.logger:
+            self.logger.log(message, level)
+
+    def _write_chunk(self, table: str, index: int, rows: List[Dict[str, Any]],
+                     on_conflict: Optional[str], ignore_duplicates: bool) -> ChunkStats:
+        stats = ChunkStats(index=index, attempted=len(rows), rows=rows)
+        started = time.monotonic()
+        while True:
+            stats.attempts += 1
+            try:
+                with db_request('upsert' if on_conflict else 'insert', table, rows=len(rows)):
+                    if self.backend is not None:
+                        data = self.backend.upsert_many(table, rows, on_conflict, ignore_duplicates)
+                    elif on_conflict:
+                        data = self.client.table(table).upsert(
+                            rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+                        ).execute().data
+                    else:
+                        data = self.client.table(table).insert(rows).execute().data
+                written = len(data or [])
+                if on_conflict and not ignore_duplicates:
+                    stats.upserted = written
+                else:
+                    stats.inserted = written
+                    # 忽略冲突时只返回实际插入的行，其余行视为已存在而跳过
+                    stats.skipped = stats.attempted - stats.inserted
+                stats.error = None
+                break
+            except Exception as e:
+                stats.error = str(e)
+                if stats.attempts > self.max_retries:
+                    self.log(f"写入 {table} 第 {index + 1} 块失败，已重试 {self.max_retries} 次: {stats.error}", 'ERROR')
+                    break
+                wait = self.backoff * (2 ** (stats.attempts - 1))
+                self.log(f"写入 {table} 第 {index + 1} 块失败，{wait:.1f} 秒后重试: {stats.error}", 'WARNING')
+                time.sleep(wait)
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def upsert(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False) -> BulkResult:
+        """
+        分块并发写入
+        Args:
+            table: 表名
+            rows: 记录列表
+            on_conflict: 冲突判断字段，为None时使用普通insert
+            ignore_duplicates: 为True时冲突的行保持不变
+        Returns:
+            BulkResult: 每个分块的写入统计
+        """
+        result = BulkResult(table=table)
+        if not rows:
+            return result
+
+        started = time.monotonic()
+        chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+        if len(chunks) == 1 or self.max_workers == 1:
+            result.chunks = [
+                self._write_chunk(table, index, chunk, on_conflict, ignore_duplicates)
+                for index, chunk in enumerate(chunks)
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                futures = [
+                    executor.submit(self._write_chunk, table, index, chunk, on_conflict, ignore_duplicates)
+                    for index, chunk in enumerate(chunks)
+                ]
+                result.chunks = [future.result() for future in futures]
+        result.elapsed = time.monotonic() - started
+        self.log(result.summary(), 'INFO' if result.ok else 'ERROR')
+        return result
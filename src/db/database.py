@@ -1,11 +1,22 @@
-from supabase import create_client
 import configparser
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+from .backends import DatabaseBackend, PostgresBackend, SupabaseBackend
 
 class Database:
+    """数据库入口：按config.ini的[database] backend选择后端，原有的表操作接口保持不变
+
+    - supabase: 通过REST接口访问，不支持直接执行SQL
+    - postgres: 通过psycopg2连接池直接连接PostgreSQL，支持参数化SQL、executemany、COPY和事务
+    配置了[postgres] dsn时，即使backend为supabase，execute_query等SQL接口、存储过程（BaseModel.call_rpc）
+    和批量写入（BulkWriter、channel_crawl的批量插入）也会走直连。
+    backend只决定insert/update/query等通用表操作；模型中其余的client.table(...)操作始终使用REST客户端（client属性）。
+    """
     _instance = None
     _client = None
+    # 配置文件路径，为None时使用项目根目录的config.ini；需在第一次创建实例前设置（如负载测试指向本地模拟服务）
+    config_path = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -15,54 +26,101 @@ class Database:
 
     def _initialize(self):
         config = configparser.ConfigParser()
-        config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.ini')
+        config_path = self.config_path or \
+            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.ini')
         config.read(config_path)
 
-        supabase_url = config['supabase']['url']
-        supabase_key = config['supabase']['key']
-        
-        self._client = create_client(supabase_url, supabase_key)
+        self._supabase = None
+        self._postgres = None
+
+        supabase_url = config.get('supabase', 'url', fallback=None)
+        supabase_key = config.get('supabase', 'key', fallback=None)
+        if supabase_url and supabase_key:
+            self._supabase = SupabaseBackend(supabase_url, supabase_key)
+            self._client = self._supabase.client
+
+        dsn = config.get('postgres', 'dsn', fallback=None)
+        if dsn:
+            self._postgres = PostgresBackend(
+                dsn,
+                min_connections=config.getint('postgres', 'min_connections', fallback=1),
+                max_connections=config.getint('postgres', 'max_connections', fallback=10)
+            )
+
+        backend_name = config.get('database', 'backend', fallback='supabase')
+        self._backend = self._postgres if backend_name == 'postgres' else self._supabase
+        if self._backend is None:
+            raise ValueError(f"数据库后端 {backend_name} 未配置，请检查config.ini")
+
+    @property
+    def backend(self) -> DatabaseBackend:
+        """当前用于表操作的后端"""
+        return self._backend
+
+    @property
+    def direct_sql(self) -> bool:
+        """是否配置了直连PostgreSQL"""
+        return self._postgres is not None
+
+    @property
+    def sql_backend(self) -> DatabaseBackend:
+        """用于直接执行SQL的后端，配置了[postgres] dsn时为直连后端"""
+        return self._postgres or self._backend
 
     def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """插入单条数据"""
-        result = self._client.table(table).insert(data).execute()
-        return result.data[0]
+        return self._backend.insert(table, data)
 
     def insert_many(self, table: str, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """批量插入数据"""
-        result = self._client.table(table).insert(data).execute()
-        return result.data
+        return self._backend.insert_many(table, data)
 
     def update(self, table: str, id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """更新单条数据"""
-        result = self._client.table(table).update(data).eq('id', id).execute()
-        return result.data[0]
+        return self._backend.update(table, id, data)
 
     def delete(self, table: str, id: str) -> None:
         """删除单条数据"""
-        self._client.table(table).delete().eq('id', id).execute()
+        self._backend.delete(table, id)
 
     def get_by_id(self, table: str, id: str) -> Optional[Dict[str, Any]]:
         """根据ID查询单条数据"""
-        result = self._client.table(table).select('*').eq('id', id).execute()
-        return result.data[0] if result.data else None
+        return self._backend.get_by_id(table, id)
 
     def get_all(self, table: str) -> List[Dict[str, Any]]:
         """查询所有数据"""
-        result = self._client.table(table).select('*').execute()
-        return result.data
+        return self._backend.get_all(table)
 
     def query(self, table: str, **conditions) -> List[Dict[str, Any]]:
         """通用查询方法"""
-        query = self._client.table(table).select('*')
-        for field, value in conditions.items():
-            query = query.eq(field, value)
-        result = query.execute()
-        return result.data
+        return self._backend.query(table, **conditions)
+
+    def execute_query(self, query: str, params=None, fetch: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """执行参数化SQL（psycopg2参数格式，如 %s、%(name)s）"""
+        return self.sql_backend.execute_query(query, params, fetch)
+
+    def execute_many(self, query: str, params_list: Sequence) -> None:
+        """用多组参数批量执行同一条SQL"""
+        return self.sql_backend.execute_many(query, params_list)
+
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """批量导入数据：直连时使用COPY，否则退化为REST批量插入"""
+        return self.sql_backend.copy_rows(table, columns, rows)
+
+    def transaction(self):
+        """事务上下文管理器，块内的execute_query/execute_many/copy_rows在同一事务中执行"""
+        return self.sql_backend.transaction()
+
+    def close(self):
+        """关闭连接池"""
+        if self._postgres:
+            self._postgres.close()
 
     @property
     def client(self):
+        if self._client is None:
+            raise RuntimeError("未配置[supabase]，无法使用REST客户端")
         return self._client
 
     def get_table(self, table_name):
-        return self._client.table(table_name) 
\ No newline at end of file
+        return self.client.table(table_name) 
\ No newline at end of file
@@ -0,0 +1,104 @@
+from datetime import date, datetime
+from src.db.backends import DatabaseBackend, PostgresBackend, SupabaseBackend, rows_to_csv
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class FakePool:
+    def __init__(self):
+        self.created = 0
+        self.idle = []
+        self.in_use = 0
+
+    def getconn(self):
+        self.in_use += 1
+        if self.idle:
+            return self.idle.pop()
+        self.created += 1
+        return FakeConnection(self.created)
+
+    def putconn(self, conn):
+        self.in_use -= 1
+        self.idle.append(conn)
+
+def make_backend():
+    backend = PostgresBackend('postgresql://localhost/test')
+    backend._pool = FakePool()
+    return backend
+
+def test_rows_to_csv():
+    """测试COPY缓冲区的格式：None写为\\N，空字符串加引号，dict/list编码为JSON，特殊字符被转义"""
+    print(f"\n[{datetime.now()}] 测试COPY缓冲区格式")
+    buffer = rows_to_csv([
+        ('UC1', 'a,b', None, ''),
+        ('UC2', 'say "hi"', 3, {'title': '视频', 'ids': [1, 2]}),
+        ('UC3', True, 1.5, date(2024, 1, 2)),
+    ])
+    content = buffer.getvalue()
+    print(content)
+    assert content == (
+        '"UC1","a,b",\\N,""\n'
+        '"UC2","say ""hi""",3,"{""title"": ""视频"", ""ids"": [1, 2]}"\n'
+        '"UC3",true,1.5,"2024-01-02"\n'
+    )
+
+def test_transaction_pins_connection():
+    """测试事务内的语句复用同一个连接，结束时提交并归还连接池"""
+    backend = make_backend()
+    with backend.transaction():
+        with backend._connection() as first:
+            pass
+        with backend._connection() as second:
+            pass
+        # 嵌套事务并入外层事务
+        with backend.transaction():
+            with backend._connection() as third:
+                pass
+        assert first is second is third
+        assert first.commits == 0
+    assert first.commits == 1
+    assert backend._pool.in_use == 0
+
+    # 事务外每次借用连接都单独提交
+    with backend._connection() as conn:
+        pass
+    assert conn.commits == 2
+
+def test_transaction_rolls_back_on_error():
+    """测试事务出错时回滚并归还连接"""
+    backend = make_backend()
+    try:
+        with backend.transaction():
+            with backend._connection() as conn:
+                raise ValueError("boom")
+    except ValueError:
+        pass
+    assert conn.rollbacks == 1
+    assert conn.commits == 0
+    assert backend._pool.in_use == 0
+    assert getattr(backend._local, 'conn', None) is None
+
+def test_backend_interface_is_abstract():
+    """测试后端基类不能直接实例化，两个实现都完整实现了接口"""
+    try:
+        DatabaseBackend()
+        assert False, "DatabaseBackend应为抽象类"
+    except TypeError:
+        pass
+    assert not SupabaseBackend.__abstractmethods__
+    assert not PostgresBackend.__abstractmethods__
+
+if __name__ == "__main__":
+    test_rows_to_csv()
+    test_transaction_pins_connection()
+    test_transaction_rolls_back_on_error()
+    test_backend_interface_is_abstract()
@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime
+from src.db.bulk_writer import BulkWriter
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+class FakeRequest:
+    def __init__(self, client, rows, ignore_duplicates):
+        self.client = client
+        self.rows = rows
+        self.ignore_duplicates = ignore_duplicates
+
+    def execute(self):
+        with self.client.lock:
+            self.client.requests += 1
+            key = self.rows[0]['id']
+            # 第二块第一次请求失败
+            if key == 2 and key not in self.client.failed:
+                self.client.failed.add(key)
+                raise Exception("timeout")
+            new_rows = [row for row in self.rows if row['id'] not in self.client.existing]
+            self.client.existing.update(row['id'] for row in new_rows)
+        return FakeResult(new_rows if self.ignore_duplicates else self.rows)
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        return FakeRequest(self.client, rows, ignore_duplicates)
+
+    def insert(self, rows):
+        return FakeRequest(self.client, rows, False)
+
+class FakeClient:
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.failed = set()
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return FakeTable(self)
+
+def test_bulk_upsert_chunks_and_retries():
+    """测试分块并发写入、失败分块重试以及每块统计"""
+    print(f"开始测试批量写入 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    client = FakeClient(existing={0, 1})
+    writer = BulkWriter(client, chunk_size=2, max_workers=3, max_retries=2, backoff=0.01)
+    rows = [{'id': i} for i in range(5)]
+
+    result = writer.upsert('channel_base', rows, on_conflict='id', ignore_duplicates=True)
+    print(result.summary())
+
+    assert result.ok
+    assert [chunk.attempted for chunk in result.chunks] == [2, 2, 1]
+    assert result.inserted == 3
+    assert result.skipped == 2
+    assert result.chunks[1].attempts == 2
+    assert client.requests == 4
+
+def test_bulk_upsert_reports_failed_chunks():
+    """测试超过重试次数的分块被标记为失败"""
+    client = FakeClient()
+    writer = BulkWriter(client, chunk_size=2, max_workers=2, max_retries=0, backoff=0.01)
+    result = writer.upsert('channel_base', [{'id': i} for i in range(4)], on_conflict='id')
+    assert not result.ok
+    assert [chunk.index for chunk in result.failed_chunks] == [1]
+    # 冲突时更新的upsert返回全部行，计为upsert而不是新增
+    assert result.upserted == 2
+    assert result.inserted == 0 and result.skipped == 0
+    print(result.summary())
+    assert 'upsert 2 行' in result.summary()
+
+class FakeBackend:
+    """模拟直连后端：upsert_many按ignore_duplicates返回实际写入的行"""
+
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.calls = []
+
+    def upsert_many(self, table, rows, on_conflict=None, ignore_duplicates=False):
+        self.calls.append((table, on_conflict, ignore_duplicates, len(rows)))
+        new_rows = [row for row in rows if row['id'] not in self.existing]
+        self.existing.update(row['id'] for row in new_rows)
+        return new_rows if ignore_duplicates else rows
+
+def test_bulk_writer_uses_backend():
+    """测试配置了后端时通过backend.upsert_many写入，不使用REST客户端"""
+    backend = FakeBackend(existing={1})
+    writer = BulkWriter(backend=backend, chunk_size=2, max_workers=1, max_retries=0)
+    result = writer.upsert('items', [{'id': i} for i in range(1, 4)], on_conflict='id', ignore_duplicates=True)
+    assert result.ok
+    assert result.inserted == 2 and result.skipped == 1
+    assert backend.calls == [('items', 'id', True, 2), ('items', 'id', True, 1)]
+
+if __name__ == "__main__":
+    test_bulk_upsert_chunks_and_retries()
+    test_bulk_upsert_reports_failed_chunks()
+    test_bulk_writer_uses_backend()
@@ -1,6 +1,7 @@
 import os
-from ..db import Database
-from typing import Dict, Any, Optional
+from ..db import BulkWriter, Database
+from ..utils.metrics import db_request
+from typing import Dict, Any, List, Optional
 
 class BaseModel:
     """基础模型类，提供数据库连接和通用方法"""
@@ -25,10 +26,28 @@ class BaseModel:
         """批量执行SQL语句"""
         return self.db.execute_many(query, params_list)
         
+    def copy_rows(self, table, columns, rows):
+        """批量导入数据（直连PostgreSQL时使用COPY）"""
+        return self.db.copy_rows(table, columns, rows)
+        
     def transaction(self):
         """获取事务上下文管理器"""
-        return self.db_client.transaction()
+        return self.db.transaction()
         
+    def _rpc(self, procedure_name: str, params: Optional[Dict[str, Any]]) -> Any:
+        """配置了直连PostgreSQL时用SELECT * FROM procedure(...)调用，否则通过REST"""
+        with db_request('rpc', procedure_name):
+            if self.db.direct_sql:
+                return self.db.sql_backend.call_rpc(procedure_name, params or {})
+            result = self.db.client.rpc(procedure_name, params or {}).execute()
+            return result.data or []
+
+    def new_bulk_writer(self) -> BulkWriter:
+        """创建批量写入工具：配置了直连PostgreSQL时用INSERT ... ON CONFLICT写入，否则通过REST"""
+        if self.db.direct_sql:
+            return BulkWriter(backend=self.db.sql_backend, logger=self.logger)
+        return BulkWriter(self.db.client, logger=self.logger)
+
     def call_rpc(self, procedure_name: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """调用存储过程
         
@@ -40,11 +59,24 @@ class BaseModel:
             存储过程返回的结果，如果失败则返回None
         """
         try:
-            rpc_call = self.db.client.rpc(procedure_name)
-            if params:
-                rpc_call = rpc_call.params(params)
-            result = rpc_call.execute()
-            return result.data[0] if result.data and len(result.data) > 0 else None
+            rows = self._rpc(procedure_name, params)
+            return rows[0] if rows else None
+        except Exception as e:
+            self.log(f"调用存储过程 {procedure_name} 失败: {str(e)}", 'ERROR')
+            return None
+
+    def call_rpc_all(self, procedure_name: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """调用返回多行的存储过程
+        
+        Args:
+            procedure_name: 存储过程名称
+            params: 存储过程参数，可选
+            
+        Returns:
+            存储过程返回的全部行，如果失败则返回None
+        """
+        try:
+            return self._rpc(procedure_name, params)
         except Exception as e:
             self.log(f"调用存储过程 {procedure_name} 失败: {str(e)}", 'ERROR')
-            return None 
\ No newline at end of file
+            return None
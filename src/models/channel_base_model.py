@@ -1,5 +1,5 @@
 from .base_model import BaseModel
-from src.db import Database
+from src.db import Database, BulkResult
 import time
 import random
 from typing import Dict, Any, List, Optional, Set, Tuple
@@ -11,6 +11,8 @@ class ChannelBaseModel(BaseModel):
         super().__init__()
         self.db = Database()
         self.table_name = 'channel_base'
+        self._bulk_writer = None
+        self.last_bulk_result = None
     
     def insert(self, data: Dict[str, Any]) -> bool:
         """插入单条记录"""
@@ -22,15 +24,38 @@ class ChannelBaseModel(BaseModel):
             self.log(f"插入频道基础数据失败: {str(e)}", 'ERROR')
             return False
     
-    def batch_insert(self, channel_ids: Set[str]) -> Tuple[bool, str]:
+    def bulk_upsert(self, rows: List[Dict[str, Any]], ignore_duplicates: bool = False) -> BulkResult:
+        """分块并发upsert到channel_base表，失败的分块按指数退避重试
+        
+        Args:
+            rows: 记录列表，每行必须包含channel_id且字段相同
+            ignore_duplicates: 为True时已存在的行保持不变
+            
+        Returns:
+            BulkResult: 每个分块的写入统计
+        """
+        if self._bulk_writer is None:
+            self._bulk_writer = self.new_bulk_writer()
+        return self._bulk_writer.upsert(
+            self.table_name,
+            rows,
+            on_conflict='channel_id',
+            ignore_duplicates=ignore_duplicates
+        )
+    
+    def batch_insert(self, channel_ids: Set[str], ignore_duplicates: bool = False) -> Tuple[bool, str]:
         """批量插入channel_ids到channel_base表
         
         Args:
             channel_ids: 要插入的channel_id集合
+            ignore_duplicates: 为True时只插入不存在的频道，已存在的行保持不变；
+                为False时已存在的行的is_blacklist和is_benchmark会被重置为False
             
         Returns:
-            Tuple[bool, str]: (是否成功, 消息)
+            Tuple[bool, str]: (是否成功, 消息)，部分分块失败时返回False；
+                每个分块的写入结果保存在last_bulk_result中
         """
+        self.last_bulk_result = None
         try:
             if not channel_ids:
                 return True, "没有需要处理的频道ID"
@@ -45,18 +70,20 @@ class ChannelBaseModel(BaseModel):
                 for channel_id in channel_ids
             ]
             
-            # 使用upsert批量插入
-            result = self.db.client.table(self.table_name)\
-                .upsert(
-                    data,
-                    on_conflict='channel_id'  # 指定冲突解决字段
-                )\
-                .execute()
+            # 分块并发upsert
+            result = self.bulk_upsert(data, ignore_duplicates=ignore_duplicates)
+            self.last_bulk_result = result
             
-            inserted_count = len(result.data)
-            total_count = len(channel_ids)
-            
-            message = f"成功处理 {total_count} 个频道ID，新增 {inserted_count} 条记录"
+            message = (
+                f"成功处理 {result.attempted} 个频道ID，{result.describe_counts()}，"
+                f"分 {len(result.chunks)} 块写入"
+            )
+            if not result.ok:
+                failed_rows = sum(chunk.attempted for chunk in result.failed_chunks)
+                message = f"{message}，其中 {len(result.failed_chunks)} 块（{failed_rows} 个频道ID）写入失败"
+                self.log(message, 'ERROR')
+                return False, message
+                
             self.log(message)
             return True, message
             
@@ -74,6 +101,39 @@ class ChannelBaseModel(BaseModel):
             self.log(f"获取频道基础数据失败: {str(e)}", 'ERROR')
             return None
     
+    def get_flags(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """只查询频道是否存在及黑名单标记，不存在时返回None
+        
+        查询失败时抛出异常，便于调用方区分"频道不存在"和"查询出错"
+        """
+        result = self.db.client.table(self.table_name)\
+            .select('channel_id,is_blacklist')\
+            .eq('channel_id', channel_id)\
+            .limit(1)\
+            .execute()
+        return result.data[0] if result.data else None
+    
+    def iter_flag_pages(self, page_size: int = 1000):
+        """按channel_id分页遍历所有频道的黑名单标记，每次返回一页记录列表
+        
+        使用channel_id作为游标分页，避免offset在大表上越翻越慢
+        """
+        last_channel_id = None
+        while True:
+            query = self.db.client.table(self.table_name)\
+                .select('channel_id,is_blacklist')\
+                .order('channel_id')\
+                .limit(page_size)
+            if last_channel_id is not None:
+                query = query.gt('channel_id', last_channel_id)
+            rows = query.execute().data
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            last_channel_id = rows[-1]['channel_id']
+    
     def update(self, channel_id: str, data: Dict[str, Any]) -> bool:
         """更新记录"""
         try:
@@ -84,6 +144,32 @@ class ChannelBaseModel(BaseModel):
             self.log(f"更新频道基础数据失败: {str(e)}", 'ERROR')
             return False
     
+    def bulk_update(self, rows: List[Dict[str, Any]]) -> bool:
+        """批量更新已存在频道的基础数据，每行必须包含channel_id
+        
+        PostgREST批量upsert要求每行的字段相同，因此按字段组合分组，每组一次请求
+        
+        Args:
+            rows: 要更新的记录列表
+            
+        Returns:
+            bool: 是否全部成功
+        """
+        try:
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for row in rows:
+                groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+                
+            for columns, group_rows in groups.items():
+                if not self.bulk_upsert(group_rows).ok:
+                    self.log(f"批量更新频道基础数据失败: 字段 {columns}", 'ERROR')
+                    return False
+            self.log(f"已批量更新 {len(rows)} 条频道基础数据，共 {len(groups)} 组字段")
+            return True
+        except Exception as e:
+            self.log(f"批量更新频道基础数据失败: {str(e)}", 'ERROR')
+            return False
+    
     def delete(self, channel_id: str) -> bool:
         """删除记录"""
         try:
@@ -1,4 +1,5 @@
 from .base_model import BaseModel
+from ..utils.metrics import db_request
 from datetime import datetime
 
 class ChannelCrawlModel(BaseModel):
@@ -19,6 +20,30 @@ class ChannelCrawlModel(BaseModel):
             self.log(f"插入频道爬取数据失败: {str(e)}", 'ERROR')
             return False
             
+    def batch_insert(self, rows):
+        """批量插入爬取记录，同一天已存在的记录跳过；未指定crawl_date的记录使用当天日期"""
+        try:
+            crawl_date = datetime.now().date().isoformat()
+            for row in rows:
+                row.setdefault('crawl_date', crawl_date)
+                
+            # (channel_id, crawl_date)唯一，重复的记录忽略而不是让整批失败
+            with db_request('upsert', 'channel_crawl', rows=len(rows)):
+                if self.db.direct_sql:
+                    self.db.sql_backend.upsert_many(
+                        'channel_crawl', rows, on_conflict='channel_id,crawl_date', ignore_duplicates=True
+                    )
+                else:
+                    self.db.client.table('channel_crawl')\
+                        .upsert(rows, on_conflict='channel_id,crawl_date', ignore_duplicates=True)\
+                        .execute()
+            self.log(f"已批量插入 {len(rows)} 条频道爬取数据")
+            return True
+            
+        except Exception as e:
+            self.log(f"批量插入频道爬取数据失败: {str(e)}", 'ERROR')
+            return False
+            
     def get_by_id(self, channel_id):
         """根据channel_id获取单条记录"""
         try:
@@ -20,16 +20,18 @@ class KeywordModel(BaseModel):
                 FOR UPDATE SKIP LOCKED
             """
             
-            result = self.execute_query(query)
-            if result:
-                # 更新last_crawl_date
-                update_query = """
-                    UPDATE key_words 
-                    SET last_crawl_date = CURRENT_DATE
-                    WHERE key_words = %s
-                """
-                self.execute_query(update_query, (result[0]['key_words'],), fetch=False)
-                return result[0]['key_words']
+            # 行锁只在事务内有效，查询和更新必须在同一事务中执行
+            with self.transaction():
+                result = self.execute_query(query)
+                if result:
+                    # 更新last_crawl_date
+                    update_query = """
+                        UPDATE key_words 
+                        SET last_crawl_date = CURRENT_DATE
+                        WHERE key_words = %s
+                    """
+                    self.execute_query(update_query, (result[0]['key_words'],), fetch=False)
+                    return result[0]['key_words']
             return None
             
         except Exception as e:
@@ -0,0 +1,45 @@
+from datetime import datetime
+from types import SimpleNamespace
+from src.db import BulkWriter, Database
+from src.models.video_model import VideoModel
+
+class RecordingClient:
+    """模拟REST客户端：记录每次upsert的行"""
+
+    def __init__(self):
+        self.requests = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.requests.append(rows)
+        self.rows = rows
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+def test_rest_upsert_keeps_existing_published_date():
+    """测试REST写入时没有发布时间的视频不带published_date列，不会把已有的值覆盖为空"""
+    print(f"开始测试视频批量写入 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    client = RecordingClient()
+    previous = Database._instance
+    Database._instance = SimpleNamespace(client=client, direct_sql=False)
+    try:
+        model = VideoModel()
+        model._bulk_writer = BulkWriter(client, max_workers=1, max_retries=0)
+        assert model.save_videos_batch([
+            {'video_id': 'a', 'title': 'A', 'published_date': '2024-01-01', 'crawl_date': '2024-01-02'},
+            {'video_id': 'b', 'title': 'B', 'published_date': None, 'crawl_date': '2024-01-02'},
+        ])
+    finally:
+        Database._instance = previous
+
+    assert len(client.requests) == 2
+    dated, undated = client.requests
+    assert [row['video_id'] for row in dated] == ['a'] and dated[0]['published_date'] == '2024-01-01'
+    assert [row['video_id'] for row in undated] == ['b'] and 'published_date' not in undated[0]
+
+if __name__ == "__main__":
+    test_rest_upsert_keeps_existing_published_date()
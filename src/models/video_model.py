@@ -1,8 +1,20 @@
+from datetime import date
 from .base_model import BaseModel
 
+# videos表中由爬虫写入的字段
+VIDEO_COLUMNS = (
+    'video_id', 'title', 'view_count', 'published_date',
+    'crawl_date', 'channel_id', 'channel_name', 'canonical_base_url'
+)
+
 class VideoModel(BaseModel):
     """视频模型类，处理视频相关的数据库操作"""
     
+    def __init__(self):
+        """初始化视频模型"""
+        super().__init__()
+        self._bulk_writer = None
+    
     def save_video_data(self, video_data):
         """保存视频数据到数据库"""
         try:
@@ -12,11 +24,12 @@ class VideoModel(BaseModel):
                     crawl_date, channel_id, channel_name, canonical_base_url
                 ) VALUES (
                     %(video_id)s, %(title)s, %(view_count)s, %(published_date)s,
-                    CURRENT_DATE, %(channel_id)s, %(channel_name)s, %(canonical_base_url)s
+                    COALESCE(%(crawl_date)s::date, CURRENT_DATE),
+                    %(channel_id)s, %(channel_name)s, %(canonical_base_url)s
                 )
             """
             
-            self.execute_query(query, video_data, fetch=False)
+            self.execute_query(query, dict(video_data, crawl_date=video_data.get('crawl_date')), fetch=False)
             return True
             
         except Exception as e:
@@ -24,21 +37,74 @@ class VideoModel(BaseModel):
             return False
             
     def save_videos_batch(self, videos_data):
-        """批量保存视频数据"""
-        try:
-            query = """
-                INSERT INTO videos (
-                    video_id, title, view_count, published_date,
-                    crawl_date, channel_id, channel_name, canonical_base_url
-                ) VALUES (
-                    %(video_id)s, %(title)s, %(view_count)s, %(published_date)s,
-                    CURRENT_DATE, %(channel_id)s, %(channel_name)s, %(canonical_base_url)s
-                )
-            """
+        """批量保存视频数据，同一视频同一天已存在时更新播放量等字段
+        
+        Args:
+            videos_data: 视频数据字典列表
             
-            self.execute_many(query, videos_data)
-            return True
+        Returns:
+            bool: 是否全部保存成功
+        """
+        try:
+            if not videos_data:
+                return True
+                
+            # 回放归档时crawl_date为响应的抓取日期，实时爬取时为当天，缺失时使用当天日期
+            rows = [
+                {column: video.get(column) for column in VIDEO_COLUMNS}
+                for video in videos_data
+            ]
+            if self.db.direct_sql:
+                # COPY到事务内的临时表，再用一条INSERT ... SELECT合并到videos，比逐行执行INSERT快得多
+                with self.transaction():
+                    # CREATE TABLE AS不复制NOT NULL约束，缺少crawl_date的行可以先导入临时表
+                    self.execute_query(
+                        f"CREATE TEMP TABLE videos_stage ON COMMIT DROP AS "
+                        f"SELECT {', '.join(VIDEO_COLUMNS)} FROM videos WITH NO DATA",
+                        fetch=False
+                    )
+                    self.copy_rows('videos_stage', VIDEO_COLUMNS, (
+                        [row[column] for column in VIDEO_COLUMNS] for row in rows
+                    ))
+                    # 同一批中(video_id, crawl_date)重复时ON CONFLICT DO UPDATE会报错，只保留一条
+                    self.execute_query("""
+                        INSERT INTO videos (
+                            video_id, title, view_count, published_date,
+                            crawl_date, channel_id, channel_name, canonical_base_url
+                        )
+                        SELECT DISTINCT ON (video_id, COALESCE(crawl_date, CURRENT_DATE))
+                            video_id, title, view_count, published_date,
+                            COALESCE(crawl_date, CURRENT_DATE), channel_id, channel_name, canonical_base_url
+                        FROM videos_stage
+                        ON CONFLICT (video_id, crawl_date) DO UPDATE SET
+                            title = EXCLUDED.title,
+                            view_count = EXCLUDED.view_count,
+                            -- 部分渲染器（如短视频）没有发布时间，不覆盖已有的值
+                            published_date = COALESCE(EXCLUDED.published_date, videos.published_date),
+                            channel_id = EXCLUDED.channel_id,
+                            channel_name = EXCLUDED.channel_name,
+                            canonical_base_url = EXCLUDED.canonical_base_url
+                    """, fetch=False)
+                return True
+                
+            # 没有直连时通过REST分块upsert
+            today = date.today().isoformat()
+            for row in rows:
+                row['crawl_date'] = row.get('crawl_date') or today
+            if self._bulk_writer is None:
+                self._bulk_writer = self.new_bulk_writer()
+            # 没有发布时间的行去掉该列单独写入，冲突时保留已有的published_date；同一请求中各行的列需一致
+            dated = [row for row in rows if row['published_date'] is not None]
+            undated = [
+                {column: value for column, value in row.items() if column != 'published_date'}
+                for row in rows if row['published_date'] is None
+            ]
+            ok = True
+            for group in (dated, undated):
+                if group:
+                    ok = self._bulk_writer.upsert('videos', group, on_conflict='video_id,crawl_date').ok and ok
+            return ok
             
         except Exception as e:
             self.log(f"批量保存视频数据时出错: {str(e)}", 'ERROR')
-            return False 
\ No newline at end of file
+            return False
\ No newline at end of file
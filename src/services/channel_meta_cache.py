@@ -0,0 +1,94 @@
+import configparser
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+class ChannelMetaCache:
+    """进程内的频道元数据缓存：记录频道是否存在以及是否在黑名单中
+
+    按LRU淘汰、按TTL过期；本进程写入channel_base后由服务层更新或失效对应条目，
+    其他进程的修改最多在TTL之后生效。
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, ttl: float = 3600, max_size: int = 100000, negative_ttl: float = 300):
+        """
+        初始化缓存
+        Args:
+            ttl: 条目有效期（秒）
+            max_size: 最多缓存的频道数
+            negative_ttl: "频道不存在"条目的有效期（秒），通常短于ttl
+        """
+        self.ttl = ttl
+        self.max_size = max(1, int(max_size))
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @classmethod
+    def default(cls) -> 'ChannelMetaCache':
+        """获取进程内共享的缓存实例，参数读取自config.ini的[cache]配置"""
+        with cls._default_lock:
+            if cls._default is None:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                cls._default = cls(
+                    ttl=config.getfloat('cache', 'channel_ttl', fallback=3600),
+                    max_size=config.getint('cache', 'channel_max_size', fallback=100000),
+                    negative_ttl=config.getfloat('cache', 'channel_negative_ttl', fallback=300)
+                )
+            return cls._default
+
+    def get(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存的频道元数据
+        Args:
+            channel_id: 频道ID
+        Returns:
+            Optional[Dict[str, Any]]: {'exists': bool, 'is_blacklist': bool}，未缓存或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(channel_id)
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    del self._entries[channel_id]
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(channel_id)
+            self.stats['hits'] += 1
+            return {'exists': entry[0], 'is_blacklist': entry[1]}
+
+    def set(self, channel_id: str, exists: bool = True, is_blacklist: bool = False):
+        """写入或更新一个频道的元数据"""
+        ttl = self.ttl if exists else self.negative_ttl
+        with self._lock:
+            self._entries[channel_id] = (exists, bool(is_blacklist), time.monotonic() + ttl)
+            self._entries.move_to_end(channel_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def set_many(self, channels: Iterable[Dict[str, Any]]):
+        """批量写入频道元数据，每项需包含channel_id，可选is_blacklist"""
+        for channel in channels:
+            self.set(channel['channel_id'], True, channel.get('is_blacklist') or False)
+
+    def invalidate(self, channel_id: str):
+        """删除一个频道的缓存"""
+        with self._lock:
+            self._entries.pop(channel_id, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def is_full(self) -> bool:
+        return len(self._entries) >= self.max_size
+
+    def __len__(self):
+        return len(self._entries)
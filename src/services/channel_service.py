@@ -1,17 +1,32 @@
 from ..models import ChannelBaseModel, ChannelCrawlModel
+from .lease_buffer import LeaseBuffer, default_lease_owner
+from .channel_write_buffer import ChannelWriteBuffer
+from .channel_meta_cache import ChannelMetaCache
+from .known_channel_set import KnownChannelSet
+from src.utils.metrics import Metrics, timed
 from datetime import datetime, timedelta
+import configparser
 import time
 import random
 
 class ChannelService:
     """频道服务类，处理频道相关的业务逻辑"""
     
-    def __init__(self):
-        """初始化频道服务"""
+    def __init__(self, worker_id=None):
+        """
+        初始化频道服务
+        Args:
+            worker_id: 工作进程ID，用于标识租约持有者
+        """
         self.base_model = ChannelBaseModel()
         self.crawl_model = ChannelCrawlModel()
         from src.utils import Logger
         self.logger = Logger()
+        self.lease_owner = default_lease_owner(worker_id)
+        self._lease_buffer = None
+        self._write_buffer = None
+        self.meta_cache = ChannelMetaCache.default()
+        self.known_channels = KnownChannelSet.default()
         
     def log(self, message, level='INFO'):
         """输出日志"""
@@ -19,9 +34,15 @@ class ChannelService:
         self.logger.log(message, level_int)
         
     def insert_channel_crawl(self, channel_info):
-        """插入频道爬取数据"""
-        # 数据验证
-        if not self._validate_channel_info(channel_info):
+        """
+        保存频道爬取数据：通过存储过程save_channel_crawl在一个事务中校验频道、
+        更新channel_base并插入当天的channel_crawl记录（已存在时忽略）
+        
+        Returns:
+            bool: 保存成功或当天数据已存在时返回True
+        """
+        if not channel_info or not channel_info.get('channel_id'):
+            self.log("缺少channel_id，无法插入数据", 'ERROR')
             return False
             
         # 数据转换
@@ -32,42 +53,164 @@ class ChannelService:
         
         # 分解数据为两部分
         channel_id = processed_data.get('channel_id')
+        base_data, crawl_data = self._split_channel_data(processed_data)
         
-        # 1. 更新channel_base表
+        result = self.base_model.call_rpc('save_channel_crawl', {
+            'p_channel_id': channel_id,
+            'p_base': base_data,
+            'p_crawl': crawl_data
+        })
+        status = result.get('status') if result else None
+        
+        if status == 'saved':
+            self.log(f"已保存频道爬取数据: channel_id={channel_id}")
+            return True
+        if status == 'duplicate':
+            self.log(f"频道今天的爬取数据已存在: channel_id={channel_id}")
+            return True
+        if status == 'not_found':
+            self.log(f"频道 {channel_id} 不存在于基础表中", 'ERROR')
+        elif status == 'blacklisted':
+            self.log(f"频道 {channel_id} 在黑名单中，跳过处理", 'WARNING')
+        else:
+            self.log(f"保存频道爬取数据失败: channel_id={channel_id}", 'ERROR')
+        return False
+        
+    def _split_channel_data(self, processed_data):
+        """把处理后的频道数据拆分为channel_base和channel_crawl两部分，并移除None值"""
+        channel_id = processed_data.get('channel_id')
         base_data = {
+            'channel_id': channel_id,
             'channel_name': processed_data.get('channel_name'),
             'description': processed_data.get('description'),
             'canonical_base_url': processed_data.get('canonical_base_url'),
             'avatar_url': processed_data.get('avatar_url'),
             'joined_date': processed_data.get('joined_date'),
             'country': processed_data.get('country'),
-            'last_crawl_date': datetime.now().date().isoformat(),
+            'last_crawl_date': processed_data.get('crawl_date') or datetime.now().date().isoformat(),
             'new_videos_info': processed_data.get('new_videos_info')
         }
-        
-        # 移除None值
-        base_data = {k: v for k, v in base_data.items() if v is not None}
-        
-        # 更新channel_base表
-        if base_data:
-            update_result = self.base_model.update(channel_id, base_data)
-            if not update_result:
-                self.log(f"更新频道基础数据失败: channel_id={channel_id}", 'ERROR')
-                return False
-        
-        # 2. 插入channel_crawl表
         crawl_data = {
             'channel_id': channel_id,
             'subscriber_count': processed_data.get('subscriber_count'),
             'video_count': processed_data.get('video_count'),
-            'view_count': processed_data.get('view_count')
+            'view_count': processed_data.get('view_count'),
+            # 回放归档时为响应的抓取日期，实时爬取时为空，写入时使用当天日期
+            'crawl_date': processed_data.get('crawl_date')
         }
+        return (
+            {k: v for k, v in base_data.items() if v is not None},
+            {k: v for k, v in crawl_data.items() if v is not None}
+        )
         
-        # 移除None值
-        crawl_data = {k: v for k, v in crawl_data.items() if v is not None}
+    def queue_channel_crawl(self, channel_info, channel=None):
+        """
+        把频道爬取数据加入写缓冲，累积后批量写入
         
-        # 调用模型层方法插入爬取数据
-        return self.crawl_model.insert(crawl_data)
+        Args:
+            channel_info: 爬取到的频道信息
+            channel: 领取任务时得到的channel_base记录，提供时不再查询数据库校验频道
+            
+        Returns:
+            bool: 是否成功加入缓冲（触发写入时为写入是否成功）
+        """
+        if not channel_info or not channel_info.get('channel_id'):
+            self.log("缺少channel_id，无法插入数据", 'ERROR')
+            return False
+        if channel is None and not self._validate_channel_info(channel_info):
+            return False
+        if channel is not None and channel.get('is_blacklist'):
+            self.log(f"频道 {channel_info.get('channel_id')} 在黑名单中，跳过处理", 'WARNING')
+            return False
+            
+        if self._write_buffer is None:
+            config = configparser.ConfigParser()
+            config.read('config.ini', encoding='utf-8')
+            self._write_buffer = ChannelWriteBuffer(
+                self.base_model,
+                # 写入成功后才标记频道已爬取，写入前进程崩溃时租约到期会重新爬取
+                on_flushed=self.complete_channel_leases,
+                max_size=config.getint('crawler', 'write_batch_size', fallback=50),
+                max_age=config.getfloat('crawler', 'write_max_age', fallback=30),
+                logger=self.logger
+            )
+            
+        base_data, crawl_data = self._split_channel_data(self._process_channel_data(channel_info))
+        return self._write_buffer.add(base_data, crawl_data)
+        
+    def save_archived_channel_crawls(self, channel_infos):
+        """
+        写入回放归档得到的频道爬取数据：只按响应的抓取日期插入channel_crawl记录（已存在时忽略），
+        不更新channel_base，也不完成租约，避免旧数据把频道标记为今天已爬取或覆盖较新的频道信息
+
+        Args:
+            channel_infos: 回放解析出的频道信息列表，crawl_date为响应的抓取日期
+
+        Returns:
+            bool: 是否写入成功（没有可写入的记录时返回True）
+        """
+        rows = []
+        for channel_info in channel_infos:
+            if not channel_info.get('crawl_date') or not self._validate_channel_info(channel_info):
+                continue
+            _, crawl_data = self._split_channel_data(self._process_channel_data(channel_info))
+            rows.append(crawl_data)
+        if not rows:
+            return True
+        return self.crawl_model.batch_insert(rows)
+
+    def flush_channel_crawls(self, force=True):
+        """
+        写入缓冲中的频道爬取数据
+        
+        Args:
+            force: 为False时只在达到写入条件时写入
+            
+        Returns:
+            bool: 是否写入成功
+        """
+        if self._write_buffer is None:
+            return True
+        return self._write_buffer.flush() if force else self._write_buffer.flush_if_due()
+        
+    def get_channel_meta(self, channel_id):
+        """
+        获取频道是否存在及黑名单标记，优先使用进程内缓存
+        
+        Returns:
+            Dict: {'channel_id', 'is_blacklist'}，频道不存在时返回None
+        """
+        cached = self.meta_cache.get(channel_id)
+        if cached is not None:
+            return {'channel_id': channel_id, 'is_blacklist': cached['is_blacklist']} if cached['exists'] else None
+            
+        try:
+            channel = self.base_model.get_flags(channel_id)
+        except Exception as e:
+            # 查询失败时不缓存
+            self.log(f"获取频道黑名单标记失败: {str(e)}", 'ERROR')
+            return None
+            
+        if channel is not None:
+            self.meta_cache.set(channel_id, True, channel.get('is_blacklist') or False)
+        else:
+            self.meta_cache.set(channel_id, False)
+        return channel
+        
+    def warm_up_channel_cache(self, page_size=1000):
+        """分页加载频道黑名单标记到缓存，缓存满时停止"""
+        try:
+            loaded = 0
+            for rows in self.base_model.iter_flag_pages(page_size):
+                self.meta_cache.set_many(rows)
+                loaded += len(rows)
+                if self.meta_cache.is_full():
+                    break
+            self.log(f"频道缓存预热完成，共加载 {loaded} 个频道")
+            return loaded
+        except Exception as e:
+            self.log(f"频道缓存预热失败: {str(e)}", 'ERROR')
+            return 0
         
     def _validate_channel_info(self, channel_info):
         """验证频道信息"""
@@ -80,7 +223,7 @@ class ChannelService:
             return False
             
         # 检查频道是否存在于基础表中
-        channel = self.base_model.get_by_id(channel_info.get('channel_id'))
+        channel = self.get_channel_meta(channel_info.get('channel_id'))
         if not channel:
             self.log(f"频道 {channel_info.get('channel_id')} 不存在于基础表中", 'ERROR')
             return False
@@ -112,16 +255,48 @@ class ChannelService:
                     
         return processed_data
         
+    @timed('lease_channels')
+    def lease_channels(self, limit=10, lease_seconds=1800):
+        """
+        批量领取待爬取频道，租约到期前其他进程不会领取这些频道
+        Args:
+            limit: 领取数量
+            lease_seconds: 租约时长（秒）
+        Returns:
+            List[Dict]: 频道列表，出错时返回None
+        """
+        channels = self.base_model.call_rpc_all('lease_uncrawled_channels', {
+            'p_worker': self.lease_owner,
+            'p_limit': limit,
+            'p_lease_seconds': lease_seconds
+        })
+        if channels is None:
+            return None
+            
+        for channel in channels:
+            # 构建URL
+            channel['url'] = f"https://www.youtube.com/channel/{channel['channel_id']}/shorts"
+        self.log(f"领取到 {len(channels)} 个待爬取频道")
+        metrics = Metrics.default()
+        if metrics is not None:
+            metrics.inc('crawler_leased_tasks_total', len(channels), kind='channel')
+        return channels
+        
     def get_uncrawled_channel(self):
-        """获取今天未爬取的频道"""
+        """获取今天未爬取的频道，从本地缓冲中取出，缓冲为空时批量领取"""
         try:
-            # 调用存储过程获取未爬取的频道
-            result = self.base_model.call_rpc('get_next_uncrawled_channel')
+            if self._lease_buffer is None:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                self._lease_buffer = LeaseBuffer(
+                    self.lease_channels,
+                    batch_size=config.getint('crawler', 'lease_batch_size', fallback=10),
+                    lease_seconds=config.getint('crawler', 'lease_seconds', fallback=1800)
+                )
+                
+            result = self._lease_buffer.get()
             
             if result:
-                # 构建URL
-                result['url'] = f"https://www.youtube.com/channel/{result['channel_id']}/shorts"
-                
                 # 记录日志
                 self.log(f"获取到未爬取频道: {result['channel_id']}, 是否对标: {result.get('is_benchmark')}")
                 
@@ -134,11 +309,39 @@ class ChannelService:
             self.log(f"获取未爬取频道时出错: {str(e)}", "ERROR")
             return None
             
+    def complete_channel_lease(self, channel_id):
+        """标记频道今天已爬取（无论成功失败）并清除租约"""
+        return self.complete_channel_leases([channel_id])
+        
+    def complete_channel_leases(self, channel_ids):
+        """批量标记频道今天已爬取并清除租约"""
+        result = self.base_model.call_rpc_all('complete_channel_leases', {
+            'p_worker': self.lease_owner,
+            'p_channel_ids': list(channel_ids)
+        })
+        return result is not None
+        
+    def release_channel_leases(self):
+        """归还本地缓冲中尚未处理的频道，其他进程可以立即领取"""
+        if self._lease_buffer is None:
+            return 0
+        channel_ids = [channel['channel_id'] for channel in self._lease_buffer.drain()]
+        if not channel_ids:
+            return 0
+        result = self.base_model.call_rpc_all('release_channel_leases', {
+            'p_worker': self.lease_owner,
+            'p_channel_ids': channel_ids
+        })
+        self.log(f"已归还 {len(channel_ids)} 个未处理频道的租约")
+        return result or 0
+            
     def delete_channel(self, channel_id):
         """删除频道"""
         try:
             # 删除频道基础数据，crawl表数据会自动级联删除
             base_result = self.base_model.delete(channel_id)
+            self.meta_cache.invalidate(channel_id)
+            self.known_channels.discard(channel_id)
             if not base_result:
                 self.log(f"删除频道基础数据失败: {channel_id}", 'ERROR')
                 return False
@@ -159,7 +362,7 @@ class ChannelService:
                 return False
                 
             # 检查频道是否已存在
-            existing_channel = self.base_model.get_by_id(channel_info.get('channel_id'))
+            existing_channel = self.get_channel_meta(channel_info.get('channel_id'))
             if existing_channel:
                 self.log(f"频道已存在: {channel_info.get('channel_id')}", 'WARNING')
                 return False
@@ -170,6 +373,8 @@ class ChannelService:
                 self.log(f"添加频道基础数据失败: {channel_info.get('channel_id')}", 'ERROR')
                 return False
                 
+            self.meta_cache.set(channel_info['channel_id'], True, channel_info.get('is_blacklist') or False)
+            self.known_channels.add_many([channel_info['channel_id']])
             self.log(f"成功添加频道: {channel_info.get('channel_id')}")
             return True
             
@@ -325,7 +530,7 @@ class ChannelService:
         
     def batch_add_channels(self, channel_ids):
         """
-        批量添加频道
+        批量添加频道，只把不在已知频道集合中的ID写入数据库，已存在的频道保持不变
         
         Args:
             channel_ids: 频道ID列表或集合
@@ -340,8 +545,31 @@ class ChannelService:
             # 记录开始处理
             self.log(f"开始批量添加频道，共 {len(channel_ids_set)} 个唯一频道ID")
             
-            # 调用模型层的batch_insert方法
-            success, message = self.base_model.batch_insert(channel_ids_set)
+            # 首次使用时加载全部已有频道ID；加载失败时全部交给数据库判断
+            try:
+                self.known_channels.ensure_loaded(lambda: self.base_model.iter_flag_pages())
+            except Exception as e:
+                self.log(f"加载已知频道ID失败: {str(e)}", 'WARNING')
+            new_ids = set(self.known_channels.filter_unknown(channel_ids_set))
+            self.log(f"其中 {len(new_ids)} 个为新频道ID")
+            
+            if not new_ids:
+                return True, "没有新的频道ID"
+            
+            # 只插入不存在的频道，不会覆盖已有频道的黑名单和对标标记
+            success, message = self.base_model.batch_insert(new_ids, ignore_duplicates=True)
+            
+            # 失败的分块也可能已经部分写入，这些频道"不存在"的缓存都不再可信
+            for channel_id in new_ids:
+                self.meta_cache.invalidate(channel_id)
+            # 只把写入成功的分块中的频道加入已知集合，失败的下次重新插入
+            result = self.base_model.last_bulk_result
+            if success:
+                self.known_channels.add_many(new_ids)
+            elif result is not None:
+                self.known_channels.add_many(
+                    row['channel_id'] for chunk in result.chunks if chunk.ok for row in chunk.rows
+                )
             
             # 记录处理结果
             if success:
@@ -354,4 +582,4 @@ class ChannelService:
         except Exception as e:
             error_message = f"批量添加频道时出错: {str(e)}"
             self.log(error_message, 'ERROR')
-            return False, error_message 
\ No newline at end of file
+            return False, error_message
@@ -0,0 +1,70 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .write_behind_buffer import WriteBehindBuffer
+
+class ChannelWriteBuffer:
+    """频道爬取结果的写缓冲：累积多条结果后通过存储过程save_channel_crawls一次写入channel_base和channel_crawl
+
+    达到 max_size 条或最早的一条已等待 max_age 秒时写入；写入失败的结果会保留，
+    下次写入时重试，超过 max_pending 条后丢弃最早的结果（对应频道租约到期后会被重新爬取）。
+    """
+
+    def __init__(self, base_model, on_flushed: Optional[Callable[[List[str]], Any]] = None,
+                 max_size: int = 50, max_age: float = 30, max_pending: int = 1000, logger=None):
+        """
+        初始化写缓冲
+        Args:
+            base_model: ChannelBaseModel实例，用于调用存储过程
+            on_flushed: 写入成功后调用的函数，参数为本次写入的channel_id列表
+            max_size: 累积到该数量时写入
+            max_age: 最早的结果等待超过该时间（秒）时写入
+            max_pending: 缓冲中最多保留的结果数
+            logger: 日志记录器实例
+        """
+        self.base_model = base_model
+        self._buffer = WriteBehindBuffer(
+            self._write, max_size=max_size, max_age=max_age, max_pending=max_pending,
+            on_flushed=on_flushed, name='条频道结果', logger=logger
+        )
+        self.stats = self._buffer.stats
+
+    def add(self, base_row: Dict[str, Any], crawl_row: Dict[str, Any]) -> bool:
+        """
+        添加一条频道结果，满足写入条件时立即写入
+        Args:
+            base_row: channel_base表的更新数据，包含channel_id
+            crawl_row: channel_crawl表的数据，包含channel_id
+        Returns:
+            bool: 本次如果触发了写入，返回写入是否成功；否则返回True
+        """
+        # 同一频道在一次写入前出现多次时保留最新的结果
+        return self._buffer.add([(base_row['channel_id'], (base_row, crawl_row))])
+
+    def _write(self, results: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> bool:
+        # 存储过程在一个语句中校验频道、更新基础表并插入爬取记录，两张表保持一致
+        statuses = self.base_model.call_rpc_all('save_channel_crawls', {'p_items': [
+            {'channel_id': base_row['channel_id'], 'base': base_row, 'crawl': crawl_row}
+            for base_row, crawl_row in results
+        ]})
+        if statuses is None:
+            return False
+        for row in statuses:
+            if row.get('status') == 'not_found':
+                self._buffer.log(f"频道 {row.get('channel_id')} 不存在于基础表中", 'ERROR')
+            elif row.get('status') == 'blacklisted':
+                self._buffer.log(f"频道 {row.get('channel_id')} 在黑名单中，跳过处理", 'WARNING')
+        return True
+
+    def flush_if_due(self) -> bool:
+        """缓冲达到写入条件时写入，用于空闲时检查"""
+        return self._buffer.flush_if_due()
+
+    def flush(self) -> bool:
+        """
+        立即写入缓冲中的全部结果
+        Returns:
+            bool: 是否写入成功
+        """
+        return self._buffer.flush()
+
+    def __len__(self):
+        return len(self._buffer)
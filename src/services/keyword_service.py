@@ -1,14 +1,23 @@
 from ..models import KeywordModel
+from .lease_buffer import LeaseBuffer, default_lease_owner
 from src.utils.logger import Logger
+from src.utils.metrics import Metrics, timed
+import configparser
 import logging
 
 class KeywordService:
     """关键词服务类，处理关键词相关的业务逻辑"""
     
-    def __init__(self):
-        """初始化关键词服务"""
+    def __init__(self, worker_id=None):
+        """
+        初始化关键词服务
+        Args:
+            worker_id: 工作进程ID，用于标识租约持有者
+        """
         self.model = KeywordModel()
         self.logger = Logger().get_logger('KeywordService')
+        self.lease_owner = default_lease_owner(worker_id)
+        self._lease_buffer = None
         
     def log(self, message, level='INFO'):
         """输出日志"""
@@ -23,11 +32,41 @@ class KeywordService:
         level_int = level_map.get(level, logging.INFO)
         self.logger.log(level_int, message)
         
+    @timed('lease_keywords')
+    def lease_keywords(self, limit=10, lease_seconds=1800):
+        """
+        批量领取待爬取关键词，租约到期前其他进程不会领取这些关键词
+        Args:
+            limit: 领取数量
+            lease_seconds: 租约时长（秒）
+        Returns:
+            List[Dict]: 关键词列表，出错时返回None
+        """
+        keywords = self.model.call_rpc_all('lease_uncrawled_keywords', {
+            'p_worker': self.lease_owner,
+            'p_limit': limit,
+            'p_lease_seconds': lease_seconds
+        })
+        if keywords is not None:
+            self.log(f"领取到 {len(keywords)} 个待爬取关键词")
+            metrics = Metrics.default()
+            if metrics is not None:
+                metrics.inc('crawler_leased_tasks_total', len(keywords), kind='keyword')
+        return keywords
+        
     def get_uncrawled_keywords(self):
-        """获取未爬取的关键词"""
+        """获取未爬取的关键词，从本地缓冲中取出，缓冲为空时批量领取"""
         try:
-            # 调用存储过程获取未爬取的关键词
-            result = self.model.call_rpc('get_next_uncrawled_keyword')
+            if self._lease_buffer is None:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                self._lease_buffer = LeaseBuffer(
+                    self.lease_keywords,
+                    batch_size=config.getint('crawler', 'lease_batch_size', fallback=10),
+                    lease_seconds=config.getint('crawler', 'lease_seconds', fallback=1800)
+                )
+                
+            result = self._lease_buffer.get()
             
             if result:
                 # 记录日志
@@ -40,6 +79,28 @@ class KeywordService:
         except Exception as e:
             self.log(f"获取未爬取关键词时出错: {str(e)}", "ERROR")
             return None
+            
+    def complete_keyword_lease(self, keyword_id):
+        """标记关键词今天已爬取（无论成功失败）并清除租约"""
+        result = self.model.call_rpc_all('complete_keyword_leases', {
+            'p_worker': self.lease_owner,
+            'p_ids': [keyword_id]
+        })
+        return result is not None
+        
+    def release_keyword_leases(self):
+        """归还本地缓冲中尚未处理的关键词，其他进程可以立即领取"""
+        if self._lease_buffer is None:
+            return 0
+        keyword_ids = [keyword['id'] for keyword in self._lease_buffer.drain()]
+        if not keyword_ids:
+            return 0
+        result = self.model.call_rpc_all('release_keyword_leases', {
+            'p_worker': self.lease_owner,
+            'p_ids': keyword_ids
+        })
+        self.log(f"已归还 {len(keyword_ids)} 个未处理关键词的租约")
+        return result or 0
         
     def save_keyword_data(self, keyword_data):
         """保存关键词数据"""
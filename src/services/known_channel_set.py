@@ -0,0 +1,176 @@
+import base64
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Set
+
+# 频道ID格式为 "UC" + 22位base64url字符，解码后正好16字节
+CHANNEL_ID_PREFIX = 'UC'
+PACKED_SIZE = 16
+
+def pack_channel_id(channel_id: str) -> Optional[bytes]:
+    """把标准格式的频道ID压缩为16字节，格式不符时返回None"""
+    if len(channel_id) != 24 or not channel_id.startswith(CHANNEL_ID_PREFIX):
+        return None
+    try:
+        packed = base64.urlsafe_b64decode(channel_id[2:] + '==')
+    except (ValueError, TypeError):
+        return None
+    # 解码后再编码必须还原，排除末位填充不规范的ID
+    if len(packed) != PACKED_SIZE or base64.urlsafe_b64encode(packed)[:22].decode() != channel_id[2:]:
+        return None
+    return packed
+
+class KnownChannelSet:
+    """已知频道ID集合：用排序后的16字节定长数组精确判断频道是否已在channel_base中
+
+    每个ID只占16字节，百万级频道约16MB；新增的ID先放在小集合中，超过merge_threshold后合并进数组。
+    格式不标准的ID单独保存在普通集合中。
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, merge_threshold: int = 10000):
+        """
+        初始化集合
+        Args:
+            merge_threshold: 新增ID累积到该数量时合并进排序数组
+        """
+        self.merge_threshold = merge_threshold
+        self._packed = b''
+        self._recent: Set[bytes] = set()
+        self._other: Set[str] = set()
+        self._deleted: Set[bytes] = set()
+        self._lock = threading.Lock()
+        # 保证同一时间只有一个线程执行全量加载
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self._last_load_attempt = None
+
+    @classmethod
+    def default(cls) -> 'KnownChannelSet':
+        """获取进程内共享的集合实例"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def _contains_packed(self, packed: bytes) -> bool:
+        if packed in self._recent:
+            return True
+        if packed in self._deleted:
+            return False
+        low, high = 0, len(self._packed) // PACKED_SIZE
+        while low < high:
+            mid = (low + high) // 2
+            offset = mid * PACKED_SIZE
+            value = self._packed[offset:offset + PACKED_SIZE]
+            if value < packed:
+                low = mid + 1
+            elif value > packed:
+                high = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, channel_id: str) -> bool:
+        packed = pack_channel_id(channel_id)
+        with self._lock:
+            if packed is None:
+                return channel_id in self._other
+            return self._contains_packed(packed)
+
+    def filter_unknown(self, channel_ids: Iterable[str]) -> List[str]:
+        """返回不在集合中的频道ID"""
+        return [channel_id for channel_id in channel_ids if channel_id not in self]
+
+    def add_many(self, channel_ids: Iterable[str]):
+        """增量添加频道ID"""
+        with self._lock:
+            for channel_id in channel_ids:
+                packed = pack_channel_id(channel_id)
+                if packed is None:
+                    self._other.add(channel_id)
+                elif not self._contains_packed(packed):
+                    self._recent.add(packed)
+            if len(self._recent) + len(self._deleted) >= self.merge_threshold:
+                self._merge()
+
+    def discard(self, channel_id: str):
+        """删除频道后从集合中移除，之后再次发现时会重新插入"""
+        packed = pack_channel_id(channel_id)
+        with self._lock:
+            if packed is None:
+                self._other.discard(channel_id)
+            elif packed in self._recent:
+                self._recent.discard(packed)
+            else:
+                self._deleted.add(packed)
+
+    def _merge(self):
+        """把新增ID合并进排序数组，同时去掉已删除的ID"""
+        merged = [
+            self._packed[i:i + PACKED_SIZE] for i in range(0, len(self._packed), PACKED_SIZE)
+            if self._packed[i:i + PACKED_SIZE] not in self._deleted
+        ]
+        merged.extend(self._recent)
+        merged.sort()
+        self._packed = b''.join(merged)
+        self._recent = set()
+        self._deleted = set()
+
+    def load(self, pages: Iterable[List[dict]]) -> int:
+        """
+        从分页查询结果批量加载频道ID，替换当前内容
+        Args:
+            pages: 每页为包含channel_id的记录列表
+        Returns:
+            int: 加载的频道数
+        """
+        packed_ids = []
+        other = set()
+        for rows in pages:
+            for row in rows:
+                packed = pack_channel_id(row['channel_id'])
+                if packed is None:
+                    other.add(row['channel_id'])
+                else:
+                    packed_ids.append(packed)
+        packed_ids.sort()
+
+        with self._lock:
+            # 加载期间新增的ID不能丢
+            recent, self._recent = self._recent, set()
+            self._deleted = set()
+            self._packed = b''.join(packed_ids)
+            self._other |= other
+            self.loaded = True
+            for packed in recent:
+                if not self._contains_packed(packed):
+                    self._recent.add(packed)
+        return len(packed_ids) + len(other)
+
+    def ensure_loaded(self, pages_factory: Callable[[], Iterable[List[dict]]], retry_interval: float = 300) -> bool:
+        """
+        尚未加载时加载一次，失败后至少间隔retry_interval秒再重试
+        Args:
+            pages_factory: 返回分页查询结果的函数
+            retry_interval: 加载失败后的重试间隔（秒）
+        Returns:
+            bool: 集合是否已加载
+        """
+        if self.loaded:
+            return True
+        with self._load_lock:
+            # 等待锁期间其他线程可能已经加载完成
+            if self.loaded:
+                return True
+            now = time.monotonic()
+            if self._last_load_attempt is not None and now - self._last_load_attempt < retry_interval:
+                return False
+            self._last_load_attempt = now
+            self.load(pages_factory())
+            return True
+
+    def __len__(self):
+        return len(self._packed) // PACKED_SIZE + len(self._recent) + len(self._other)
@@ -0,0 +1,69 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+def default_lease_owner(worker_id=None) -> str:
+    """生成租约持有者标识：主机名:进程号[:工作进程ID]"""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    return f"{owner}:{worker_id}" if worker_id is not None else owner
+
+class LeaseBuffer:
+    """本地任务缓冲：一次从数据库领取一批带租约的任务，逐个交给爬虫
+
+    每个任务记录本地的租约到期时间，剩余时间不足 safety_margin 的任务直接丢弃
+    （数据库中租约到期后会被其他进程重新领取），避免与其他进程重复爬取。
+    """
+
+    def __init__(self, fetch: Callable[[int, int], Optional[List[Dict[str, Any]]]],
+                 batch_size: int = 10, lease_seconds: int = 1800, safety_margin: int = 60):
+        """
+        初始化任务缓冲
+        Args:
+            fetch: 领取任务的函数，参数为(数量, 租约秒数)，失败时返回None
+            batch_size: 每次领取的任务数
+            lease_seconds: 租约时长（秒）
+            safety_margin: 租约剩余时间少于该值时不再处理该任务（秒）
+        """
+        self.fetch = fetch
+        self.batch_size = max(1, int(batch_size))
+        self.lease_seconds = int(lease_seconds)
+        self.safety_margin = safety_margin
+        self._tasks = deque()
+        self._lock = threading.Lock()
+        self.stats = {'fetches': 0, 'leased': 0, 'expired': 0}
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        获取下一个任务，本地缓冲为空时批量领取
+        Returns:
+            Optional[Dict[str, Any]]: 任务，没有待爬取任务时返回None
+        """
+        with self._lock:
+            while True:
+                while self._tasks:
+                    task, expires_at = self._tasks.popleft()
+                    if time.monotonic() < expires_at - self.safety_margin:
+                        return task
+                    self.stats['expired'] += 1
+
+                leased_at = time.monotonic()
+                tasks = self.fetch(self.batch_size, self.lease_seconds)
+                self.stats['fetches'] += 1
+                if not tasks:
+                    return None
+                self.stats['leased'] += len(tasks)
+                expires_at = leased_at + self.lease_seconds
+                self._tasks.extend((task, expires_at) for task in tasks)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """取出所有尚未处理的任务，用于退出时归还租约"""
+        with self._lock:
+            tasks = [task for task, _ in self._tasks]
+            self._tasks.clear()
+            return tasks
+
+    def __len__(self):
+        return len(self._tasks)
@@ -0,0 +1,38 @@
+import time
+from datetime import datetime
+from src.services.channel_meta_cache import ChannelMetaCache
+
+def test_cache_lru_and_ttl():
+    """测试缓存按LRU淘汰、按TTL过期"""
+    print(f"开始测试频道元数据缓存 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    cache = ChannelMetaCache(ttl=0.2, max_size=2, negative_ttl=0.05)
+    cache.set('UC1', True, False)
+    cache.set('UC2', True, True)
+    # 访问UC1后UC2成为最久未使用的条目
+    assert cache.get('UC1') == {'exists': True, 'is_blacklist': False}
+    cache.set('UC3', False)
+    assert cache.get('UC2') is None
+    assert cache.get('UC3') == {'exists': False, 'is_blacklist': False}
+
+    time.sleep(0.1)
+    # "不存在"条目的有效期更短
+    assert cache.get('UC3') is None
+    assert cache.get('UC1') is not None
+    time.sleep(0.15)
+    assert cache.get('UC1') is None
+    print(f"缓存统计: {cache.stats}")
+    assert cache.stats['evictions'] == 1
+
+def test_cache_invalidate_and_bulk_load():
+    """测试批量写入和失效"""
+    cache = ChannelMetaCache(ttl=60, max_size=10)
+    cache.set_many([{'channel_id': 'UC1', 'is_blacklist': True}, {'channel_id': 'UC2'}])
+    assert cache.get('UC1')['is_blacklist']
+    assert not cache.get('UC2')['is_blacklist']
+    cache.invalidate('UC1')
+    assert cache.get('UC1') is None
+    assert len(cache) == 1
+
+if __name__ == "__main__":
+    test_cache_lru_and_ttl()
+    test_cache_invalidate_and_bulk_load()
@@ -1,6 +1,11 @@
+import base64
 import json
 from datetime import datetime
+from types import SimpleNamespace
+from src.db import BulkWriter, Database
+from src.services.channel_meta_cache import ChannelMetaCache
 from src.services.channel_service import ChannelService
+from src.services.known_channel_set import KnownChannelSet
 
 def test_get_uncrawled_channel():
     """测试获取未爬取频道的功能"""
@@ -139,6 +144,55 @@ def test_delete_channel():
         import traceback
         print(f"错误详情:\n{traceback.format_exc()}")
 
+class FailingChunkClient:
+    """模拟REST客户端：包含fail_id的分块写入失败，其余分块写入成功"""
+
+    def __init__(self, fail_id):
+        self.fail_id = fail_id
+        self.written = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if any(row['channel_id'] == self.fail_id for row in self.rows):
+            raise Exception("timeout")
+        self.written.extend(row['channel_id'] for row in self.rows)
+        return SimpleNamespace(data=self.rows)
+
+def test_batch_add_channels_partial_failure():
+    """测试部分分块写入失败时，成功分块的频道加入已知集合，所有尝试写入的频道的缓存失效"""
+    channel_ids = ['UC' + base64.urlsafe_b64encode(bytes([i]) * 16).decode()[:22] for i in range(4)]
+    client = FailingChunkClient(fail_id=channel_ids[3])
+    previous = Database._instance
+    Database._instance = SimpleNamespace(client=client, direct_sql=False)
+    try:
+        channel_service = ChannelService()
+        channel_service.meta_cache = ChannelMetaCache()
+        channel_service.known_channels = KnownChannelSet()
+        channel_service.known_channels.load([])
+        channel_service.base_model._bulk_writer = BulkWriter(client, chunk_size=2, max_workers=1, max_retries=0)
+        for channel_id in channel_ids:
+            channel_service.meta_cache.set(channel_id, False)
+
+        success, message = channel_service.batch_add_channels(channel_ids)
+    finally:
+        Database._instance = previous
+
+    print(message)
+    assert not success
+    # 分块顺序不固定，失败的是包含fail_id的那一块
+    assert len(client.written) == 2 and channel_ids[3] not in client.written
+    known = channel_service.known_channels
+    assert [channel_id in known for channel_id in channel_ids] == [
+        channel_id in client.written for channel_id in channel_ids
+    ]
+    assert all(channel_service.meta_cache.get(channel_id) is None for channel_id in channel_ids)
+
 if __name__ == "__main__":
     # 测试获取未爬取频道
     # test_get_uncrawled_channel()
@@ -150,4 +204,7 @@ if __name__ == "__main__":
     # test_validate_channel_info()
     
     # 测试删除频道
-    test_delete_channel() 
\ No newline at end of file
+    test_delete_channel()
+    
+    # 测试部分分块写入失败
+    test_batch_add_channels_partial_failure() 
\ No newline at end of file
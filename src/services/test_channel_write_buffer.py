@@ -0,0 +1,54 @@
+from datetime import datetime
+from src.services.channel_write_buffer import ChannelWriteBuffer
+
+class FakeBaseModel:
+    """模拟ChannelBaseModel：记录save_channel_crawls的调用，fail为True时返回None表示调用失败"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def call_rpc_all(self, name, params):
+        assert name == 'save_channel_crawls'
+        if self.fail:
+            return None
+        self.calls.append(params['p_items'])
+        return [{'channel_id': item['channel_id'], 'status': 'saved'} for item in params['p_items']]
+
+def test_buffer_flushes_by_size():
+    """测试累积到指定数量时一次批量写入两张表，写入后回调已完成的频道"""
+    print(f"开始测试频道写缓冲 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    base_model, flushed = FakeBaseModel(), []
+    buffer = ChannelWriteBuffer(base_model, on_flushed=flushed.extend, max_size=3, max_age=3600)
+
+    for i in range(2):
+        buffer.add({'channel_id': f'UC{i}', 'channel_name': f'c{i}'}, {'channel_id': f'UC{i}', 'view_count': i})
+    assert base_model.calls == [] and len(buffer) == 2
+
+    buffer.add({'channel_id': 'UC2'}, {'channel_id': 'UC2'})
+    assert len(base_model.calls) == 1 and len(base_model.calls[0]) == 3
+    assert base_model.calls[0][0] == {
+        'channel_id': 'UC0', 'base': {'channel_id': 'UC0', 'channel_name': 'c0'},
+        'crawl': {'channel_id': 'UC0', 'view_count': 0}
+    }
+    assert flushed == ['UC0', 'UC1', 'UC2']
+    assert len(buffer) == 0
+
+def test_failed_flush_keeps_rows():
+    """测试写入失败时保留结果，下次写入时重试"""
+    base_model, flushed = FakeBaseModel(), []
+    buffer = ChannelWriteBuffer(base_model, on_flushed=flushed.extend, max_size=10, max_age=3600)
+    buffer.add({'channel_id': 'UC0'}, {'channel_id': 'UC0'})
+
+    base_model.fail = True
+    assert not buffer.flush()
+    assert base_model.calls == [] and flushed == [] and len(buffer) == 1
+
+    base_model.fail = False
+    assert buffer.flush()
+    assert flushed == ['UC0']
+    print(f"写缓冲统计: {buffer.stats}")
+
+if __name__ == "__main__":
+    test_buffer_flushes_by_size()
+    test_failed_flush_keeps_rows()
@@ -0,0 +1,62 @@
+import base64
+import os
+import threading
+import time
+from datetime import datetime
+from src.services.known_channel_set import KnownChannelSet, pack_channel_id
+
+def _random_channel_id():
+    return 'UC' + base64.urlsafe_b64encode(os.urandom(16)).decode()[:22]
+
+def test_membership_after_load_and_incremental_add():
+    """测试批量加载和增量添加后的精确判断"""
+    print(f"开始测试已知频道集合 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    loaded_ids = [_random_channel_id() for _ in range(1000)] + ['legacy-channel']
+    known = KnownChannelSet(merge_threshold=50)
+    pages = [[{'channel_id': channel_id} for channel_id in loaded_ids[i:i + 100]]
+             for i in range(0, len(loaded_ids), 100)]
+    assert known.load(pages) == 1001
+
+    new_ids = [_random_channel_id() for _ in range(120)]
+    assert all(channel_id in known for channel_id in loaded_ids)
+    assert known.filter_unknown(new_ids + loaded_ids[:5]) == new_ids
+
+    # 超过合并阈值后合并进排序数组
+    known.add_many(new_ids)
+    assert all(channel_id in known for channel_id in new_ids)
+    assert len(known) == 1121
+
+    known.discard(loaded_ids[0])
+    assert loaded_ids[0] not in known
+    assert loaded_ids[1] in known
+
+def test_pack_rejects_non_standard_ids():
+    """测试格式不标准的ID不做压缩"""
+    assert pack_channel_id('UC' + 'A' * 22) is not None
+    assert pack_channel_id('UC' + 'A' * 21) is None
+    assert pack_channel_id('XX' + 'A' * 22) is None
+    # 末位字符包含多余的填充位，不能还原
+    assert pack_channel_id('UC' + 'A' * 21 + 'B') is None
+
+def test_concurrent_ensure_loaded_loads_once():
+    """测试多个线程同时首次使用时只执行一次全量加载"""
+    known = KnownChannelSet()
+    calls = []
+
+    def pages():
+        calls.append(1)
+        time.sleep(0.05)
+        return [[{'channel_id': _random_channel_id()}]]
+
+    threads = [threading.Thread(target=known.ensure_loaded, args=(pages,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert known.loaded and len(known) == 1
+
+if __name__ == "__main__":
+    test_membership_after_load_and_incremental_add()
+    test_pack_rejects_non_standard_ids()
+    test_concurrent_ensure_loaded_loads_once()
@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+from src.services.lease_buffer import LeaseBuffer
+
+def test_buffer_fetches_in_batches():
+    """测试任务按批领取，本地缓冲取完后才再次领取"""
+    print(f"开始测试批量租约缓冲 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    pool = list(range(7))
+    calls = []
+
+    def fetch(limit, lease_seconds):
+        calls.append(limit)
+        batch = pool[:limit]
+        del pool[:limit]
+        return [{'id': i} for i in batch]
+
+    buffer = LeaseBuffer(fetch, batch_size=3, lease_seconds=600)
+    ids = []
+    while True:
+        task = buffer.get()
+        if task is None:
+            break
+        ids.append(task['id'])
+
+    assert ids == list(range(7))
+    # 3 + 3 + 1，最后一次返回空
+    assert calls == [3, 3, 3, 3]
+    print(f"缓冲统计: {buffer.stats}")
+
+def test_buffer_skips_expired_and_drains():
+    """测试租约即将到期的任务被丢弃，退出时可以取出未处理的任务"""
+    batches = [[{'id': 1}, {'id': 2}], [{'id': 3}, {'id': 4}]]
+    buffer = LeaseBuffer(lambda limit, seconds: batches.pop(0) if batches else [],
+                         batch_size=2, lease_seconds=1, safety_margin=0.5)
+
+    assert buffer.get()['id'] == 1
+    time.sleep(0.6)
+    # 任务2的租约剩余时间不足，重新领取下一批
+    assert buffer.get()['id'] == 3
+    assert buffer.stats['expired'] == 1
+    assert buffer.drain() == [{'id': 4}]
+    assert len(buffer) == 0
+
+if __name__ == "__main__":
+    test_buffer_fetches_in_batches()
+    test_buffer_skips_expired_and_drains()
@@ -0,0 +1,72 @@
+from datetime import datetime
+from src.services.video_ingest_pipeline import VideoIngestPipeline
+from src.utils.youtube_parser import VideoData
+
+def make_video(video_id, view_count=0):
+    return VideoData(
+        video_id=video_id, title=f't-{video_id}', view_count=view_count, published_date='2024-01-01',
+        crawl_date='2024-01-02', channel_id='UCx', channel_name='x', canonical_base_url='/@x'
+    )
+
+class FakeSaver:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, rows):
+        self.calls.append(rows)
+        return not self.fail
+
+def test_pipeline_dedupes_and_flushes_by_size():
+    """测试按video_id去重，缓冲中重复的视频保留最新数据，已写入的视频不再写入"""
+    print(f"开始测试视频写入管道 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    saver = FakeSaver()
+    pipeline = VideoIngestPipeline(saver, max_size=3, max_age=3600)
+
+    pipeline.add([make_video('a', 1), make_video('b'), make_video('a', 5)])
+    assert saver.calls == [] and len(pipeline) == 2
+
+    pipeline.add([make_video('c')])
+    assert len(saver.calls) == 1
+    rows = {row['video_id']: row for row in saver.calls[0]}
+    assert sorted(rows) == ['a', 'b', 'c']
+    assert rows['a']['view_count'] == 5
+
+    # 已写入的视频再次出现时跳过
+    pipeline.add([make_video('a'), make_video('d')])
+    assert len(pipeline) == 1
+    assert pipeline.stats['duplicates'] == 2
+    assert pipeline.flush()
+    assert [row['video_id'] for row in saver.calls[1]] == ['d']
+
+def test_failed_flush_keeps_videos():
+    """测试写入失败时保留视频，下次写入时重试"""
+    saver = FakeSaver()
+    saver.fail = True
+    pipeline = VideoIngestPipeline(saver, max_size=10, max_age=3600)
+    pipeline.add([make_video('a'), {'video_id': 'b', 'title': 'dict'}, {'title': 'no id'}])
+    assert not pipeline.flush()
+    assert len(pipeline) == 2
+
+    saver.fail = False
+    assert pipeline.flush()
+    assert len(pipeline) == 0
+    assert pipeline.stats['flushed'] == 2
+    assert pipeline.stats['failures'] == 1
+
+def test_pending_limit_drops_oldest():
+    """测试缓冲超过上限时丢弃最早的视频"""
+    saver = FakeSaver()
+    saver.fail = True
+    pipeline = VideoIngestPipeline(saver, max_size=100, max_age=3600, max_pending=2)
+    pipeline.add([make_video('a'), make_video('b'), make_video('c')])
+    assert len(pipeline) == 2
+    assert pipeline.stats['dropped'] == 1
+    saver.fail = False
+    pipeline.flush()
+    assert [row['video_id'] for row in saver.calls[-1]] == ['b', 'c']
+
+if __name__ == "__main__":
+    test_pipeline_dedupes_and_flushes_by_size()
+    test_failed_flush_keeps_videos()
+    test_pending_limit_drops_oldest()
@@ -0,0 +1,44 @@
+from datetime import datetime
+from src.services.write_behind_buffer import WriteBehindBuffer
+
+def test_buffer_flushes_by_age_and_keeps_latest():
+    """测试同一个键保留最新数据，等待超过max_age后写入，写入后回调本次的键"""
+    print(f"开始测试写缓冲 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    written, flushed = [], []
+    buffer = WriteBehindBuffer(lambda items: written.append(items) or True, max_size=10, max_age=3600,
+                               on_flushed=flushed.extend)
+    assert buffer.add([('a', 1), ('b', 2), ('a', 3)])
+    assert written == [] and len(buffer) == 2
+    assert buffer.stats['duplicates'] == 1
+
+    buffer.max_age = 0
+    assert buffer.flush_if_due()
+    assert written == [[3, 2]] and flushed == ['a', 'b']
+    assert len(buffer) == 0
+
+def test_failed_or_raising_flush_keeps_items():
+    """测试写入失败或抛出异常时保留数据，超过max_pending后丢弃最早的数据"""
+    results = [False, RuntimeError('boom'), True]
+    written = []
+
+    def flush(items):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        if result:
+            written.append(items)
+        return result
+
+    buffer = WriteBehindBuffer(flush, max_size=100, max_age=3600, max_pending=2)
+    buffer.add([('a', 1), ('b', 2), ('c', 3)])
+    assert buffer.stats['dropped'] == 1
+    assert not buffer.flush()
+    assert not buffer.flush()
+    assert len(buffer) == 2 and buffer.stats['failures'] == 2
+    assert buffer.flush()
+    assert written == [[2, 3]]
+    print(f"写缓冲统计: {buffer.stats}")
+
+if __name__ == "__main__":
+    test_buffer_flushes_by_age_and_keeps_latest()
+    test_failed_or_raising_flush_keeps_items()
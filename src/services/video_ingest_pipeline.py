@@ -0,0 +1,85 @@
+import dataclasses
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List
+from .write_behind_buffer import WriteBehindBuffer
+
+class VideoIngestPipeline:
+    """搜索结果视频的流式写入管道：按(video_id, crawl_date)去重后缓冲，累积后批量写入videos表
+
+    同一次运行中已写入的视频不再重复写入；缓冲中的视频再次出现时保留最新数据。
+    写入失败的视频会保留到下次写入时重试，超过 max_pending 条后丢弃最早的视频。
+    """
+
+    def __init__(self, save_batch: Callable[[List[Dict[str, Any]]], bool], max_size: int = 200,
+                 max_age: float = 30, max_pending: int = 5000, max_seen: int = 200000, logger=None):
+        """
+        初始化写入管道
+        Args:
+            save_batch: 批量保存函数，参数为视频数据字典列表，返回是否成功
+            max_size: 累积到该数量时写入
+            max_age: 最早的视频等待超过该时间（秒）时写入
+            max_pending: 缓冲中最多保留的视频数
+            max_seen: 用于去重的已写入视频最多保留数量，超过后淘汰最早的
+            logger: 日志记录器实例
+        """
+        self.max_seen = max(1, int(max_seen))
+        self._buffer = WriteBehindBuffer(
+            save_batch, max_size=max_size, max_age=max_age, max_pending=max_pending,
+            on_flushed=self._remember, name='个视频', logger=logger
+        )
+        self._seen: "OrderedDict[tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = self._buffer.stats
+
+    @staticmethod
+    def _to_row(video) -> Dict[str, Any]:
+        if dataclasses.is_dataclass(video):
+            return dataclasses.asdict(video)
+        return dict(video)
+
+    def add(self, videos: Iterable[Any]) -> bool:
+        """
+        添加一批解析出的视频，满足写入条件时立即写入
+        Args:
+            videos: VideoData或视频数据字典
+        Returns:
+            bool: 本次如果触发了写入，返回写入是否成功；否则返回True
+        """
+        with self._lock:
+            entries = []
+            for video in videos:
+                row = self._to_row(video)
+                video_id = row.get('video_id')
+                if not video_id:
+                    continue
+                # 与videos表的唯一键一致，同一视频在不同日期的记录（跨午夜或回放归档）都会写入
+                key = (video_id, row.get('crawl_date'))
+                if key in self._seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                entries.append((key, row))
+            return self._buffer.add(entries)
+
+    def _remember(self, keys: List[tuple]):
+        """记录已写入的视频，后续再次出现时跳过"""
+        with self._lock:
+            for key in keys:
+                self._seen[key] = None
+            while len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+
+    def flush_if_due(self) -> bool:
+        """缓冲达到写入条件时写入"""
+        return self._buffer.flush_if_due()
+
+    def flush(self) -> bool:
+        """
+        立即写入缓冲中的全部视频
+        Returns:
+            bool: 是否写入成功
+        """
+        return self._buffer.flush()
+
+    def __len__(self):
+        return len(self._buffer)
@@ -1,6 +1,8 @@
 from ..models import VideoModel
+from .video_ingest_pipeline import VideoIngestPipeline
 from src.utils.logger import Logger
 from datetime import datetime
+import configparser
 import logging
 
 class VideoService:
@@ -10,6 +12,7 @@ class VideoService:
         """初始化视频服务"""
         self.model = VideoModel()
         self.logger = Logger().get_logger('VideoService')
+        self._ingest = None
         
     def log(self, message, level='INFO'):
         """输出日志"""
@@ -34,6 +37,41 @@ class VideoService:
         # 这里可以添加数据验证、转换等业务逻辑
         return self.model.save_videos_batch(videos_data)
         
+    def queue_videos(self, videos):
+        """
+        把解析出的视频加入写入管道，按video_id去重后累积批量写入
+        
+        Args:
+            videos: VideoData列表
+            
+        Returns:
+            bool: 是否成功加入管道（触发写入时为写入是否成功）
+        """
+        if self._ingest is None:
+            config = configparser.ConfigParser()
+            config.read('config.ini', encoding='utf-8')
+            self._ingest = VideoIngestPipeline(
+                self.model.save_videos_batch,
+                max_size=config.getint('crawler', 'video_batch_size', fallback=200),
+                max_age=config.getfloat('crawler', 'video_max_age', fallback=30),
+                logger=self
+            )
+        return self._ingest.add(videos)
+        
+    def flush_videos(self, force=True):
+        """
+        写入管道中的视频
+        
+        Args:
+            force: 为False时只在达到写入条件时写入
+            
+        Returns:
+            bool: 是否写入成功
+        """
+        if self._ingest is None:
+            return True
+        return self._ingest.flush() if force else self._ingest.flush_if_due()
+        
     def get_uncrawled_url(self):
         """获取未爬取的视频URL"""
         try:
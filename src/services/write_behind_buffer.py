@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+class WriteBehindBuffer:
+    """通用的写缓冲：按键累积待写入的数据，达到数量或等待时间后调用 flush_fn 批量写入
+
+    同一个键在写入前再次加入时保留最新的数据。达到 max_size 条或最早的一条已等待 max_age 秒时写入；
+    写入失败的数据会保留，下次写入时重试，超过 max_pending 条后丢弃最早的数据。
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Any]], bool], max_size: int = 50, max_age: float = 30,
+                 max_pending: int = 1000, on_flushed: Optional[Callable[[List[Hashable]], Any]] = None,
+                 name: str = '条记录', logger=None):
+        """
+        初始化写缓冲
+        Args:
+            flush_fn: 批量写入函数，参数为缓冲中的数据列表（按加入顺序），返回是否成功
+            max_size: 累积到该数量时写入
+            max_age: 最早的数据等待超过该时间（秒）时写入
+            max_pending: 缓冲中最多保留的数据条数
+            on_flushed: 写入成功后调用的函数，参数为本次写入的键列表
+            name: 日志中的数量单位和名称，如 '条频道结果'
+            logger: 日志记录器实例
+        """
+        self.flush_fn = flush_fn
+        self.max_size = max(1, int(max_size))
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.on_flushed = on_flushed
+        self.name = name
+        self.logger = logger
+        self._pending: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._oldest = None
+        self._lock = threading.RLock()
+        self.stats = {'added': 0, 'duplicates': 0, 'flushed': 0, 'flushes': 0, 'failures': 0, 'dropped': 0}
+
+    def log(self, message, level='INFO'):
+        if self.logger:
+            self.logger.log(message, level)
+
+    def add(self, entries: Iterable[Tuple[Hashable, Any]]) -> bool:
+        """
+        加入一批(键, 数据)，满足写入条件时立即写入
+        Returns:
+            bool: 本次如果触发了写入，返回写入是否成功；否则返回True
+        """
+        with self._lock:
+            for key, item in entries:
+                if key in self._pending:
+                    self.stats['duplicates'] += 1
+                self._pending[key] = item
+                self.stats['added'] += 1
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+
+            while len(self._pending) > self.max_pending:
+                dropped, _ = self._pending.popitem(last=False)
+                self.stats['dropped'] += 1
+                self.log(f"写缓冲已满，丢弃最早的数据: {dropped}", 'WARNING')
+
+            if self._is_due():
+                return self.flush()
+            return True
+
+    def _is_due(self) -> bool:
+        if not self._pending:
+            return False
+        return len(self._pending) >= self.max_size or time.monotonic() - self._oldest >= self.max_age
+
+    def flush_if_due(self) -> bool:
+        """缓冲达到写入条件时写入，用于空闲时检查"""
+        with self._lock:
+            return self.flush() if self._is_due() else True
+
+    def flush(self) -> bool:
+        """
+        立即写入缓冲中的全部数据
+        Returns:
+            bool: 是否写入成功
+        """
+        with self._lock:
+            if not self._pending:
+                return True
+
+            keys = list(self._pending)
+            self.stats['flushes'] += 1
+            try:
+                ok = self.flush_fn(list(self._pending.values()))
+            except Exception as e:
+                self.log(f"批量写入出错: {str(e)}", 'ERROR')
+                ok = False
+            if not ok:
+                self.stats['failures'] += 1
+                # 推迟下次写入，避免数据库异常时每次添加都触发重试
+                self._oldest = time.monotonic()
+                self.log(f"批量写入 {len(keys)} {self.name}失败，稍后重试", 'ERROR')
+                return False
+
+            self._pending.clear()
+            self._oldest = None
+            self.stats['flushed'] += len(keys)
+            self.log(f"批量写入 {len(keys)} {self.name}成功")
+
+        if self.on_flushed:
+            try:
+                self.on_flushed(keys)
+            except Exception as e:
+                self.log(f"写入后回调出错: {str(e)}", 'ERROR')
+        return True
+
+    def __len__(self):
+        return len(self._pending)
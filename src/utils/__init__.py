@@ -3,7 +3,11 @@ from .response_processor import ResponseProcessor
 from .youtube_parser import YouTubeParser
 from .data_converter import DataConverter
 from .file_handler import FileHandler
+from .response_archive import ResponseArchive, ArchiveReader
+from .metrics import Metrics, MetricsServer
 from .selector_utils import SelectorUtils
+from .selector_stats import SelectorStats
+from .wait_utils import WaitUtils, WaitResult
 
 __all__ = [
     'Logger',
@@ -11,5 +15,12 @@ __all__ = [
     'YouTubeParser',
     'DataConverter',
     'FileHandler',
-    'SelectorUtils'
+    'ResponseArchive',
+    'ArchiveReader',
+    'Metrics',
+    'MetricsServer',
+    'SelectorUtils',
+    'SelectorStats',
+    'WaitUtils',
+    'WaitResult'
 ] 
\ No newline at end of file
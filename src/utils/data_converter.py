@@ -37,17 +37,17 @@ class DataConverter:
             self.logger.log(f"转换观看次数时出错: {str(e)}", 'ERROR')
             return 0
     
-    def convert_relative_time(self, relative_time_str: str) -> str:
+    def convert_relative_time(self, relative_time_str: str, now: Optional[float] = None) -> str:
         """
         将相对时间字符串转换为日期
         Args:
             relative_time_str: 相对时间字符串，如"1个月前"、"2周前"、"3天前"等
+            now: 相对时间的基准时间戳，默认为当前时间（回放归档时为响应的抓取时间）
         Returns:
             str: 转换后的日期字符串，格式为'%Y-%m-%d'
         """
+        current_time = now if now is not None else time.time()
         try:
-            current_time = time.time()
-            
             if not relative_time_str:
                 return time.strftime('%Y-%m-%d', time.localtime(current_time))
                 
@@ -1,35 +1,37 @@
 import json
-import time
-import os
 from typing import Dict, Any
+from .response_archive import ResponseArchive
 
 class FileHandler:
     """文件处理类"""
-    
+
     def __init__(self):
         from .logger import Logger
         self.logger = Logger()
-        # 确保responses目录存在
         self.responses_dir = "responses"
-        if not os.path.exists(self.responses_dir):
-            os.makedirs(self.responses_dir)
-    
+        self._archive = None
+
+    @property
+    def archive(self) -> ResponseArchive:
+        """响应归档：启用了[archive]时使用共享归档，否则在responses目录下单独归档"""
+        if self._archive is None:
+            self._archive = ResponseArchive.default() or ResponseArchive(self.responses_dir, logger=self.logger)
+        return self._archive
+
     def save_response_json(self, json_data: Dict[str, Any], request_count: int, is_initial: bool = False) -> None:
         """
-        保存原始响应JSON到文件
+        把原始响应JSON追加到响应归档（紧凑JSON，压缩后按段写入，不再每个响应单独保存一个格式化文件）
         Args:
             json_data: JSON数据
             request_count: 请求计数
             is_initial: 是否是初始请求
         """
-        timestamp = time.strftime('%Y%m%d_%H%M%S')
         request_type = "initial" if is_initial else "continuation"
-        filename = f"response_json_{timestamp}_{request_type}_{request_count}.json"
-        filepath = os.path.join(self.responses_dir, filename)
-        
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
-            self.logger.log(f"已保存响应JSON到文件: {filepath}")
+            body = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
+            if self.archive.append(body, kind=request_type, task_id=str(request_count)):
+                self.logger.log(f"已将第 {request_count} 个响应JSON加入归档: {self.archive.directory}", 'DEBUG')
+            else:
+                self.logger.log("响应归档队列已满，丢弃本次响应JSON", 'WARNING')
         except Exception as e:
-            self.logger.log(f"保存响应JSON时出错: {str(e)}", 'ERROR') 
\ No newline at end of file
+            self.logger.log(f"保存响应JSON时出错: {str(e)}", 'ERROR')
@@ -0,0 +1,79 @@
+from typing import Dict, Sequence, Tuple, Union
+
+_MISSING = object()
+
+Steps = Tuple[Union[str, int], ...]
+
+def _parse_steps(path: str) -> Steps:
+    """把 'runs.0.text' 拆分为 ('runs', 0, 'text')，数字表示列表下标"""
+    if not path:
+        return ()
+    return tuple(int(step) if step.lstrip('-').isdigit() else step for step in path.split('.'))
+
+def _walk(node, steps: Steps):
+    """沿路径逐级取值：下标要求当前节点是列表且不越界，键要求当前节点是字典，不满足时返回_MISSING"""
+    for step in steps:
+        if step.__class__ is int:
+            if node.__class__ is not list or not -len(node) <= step < len(node):
+                return _MISSING
+            node = node[step]
+        else:
+            if node.__class__ is not dict:
+                return _MISSING
+            node = node.get(step, _MISSING)
+            if node is _MISSING:
+                return _MISSING
+    return node
+
+class JsonPath:
+    """预先拆分的JSON路径，如 'longBylineText.runs.0.text'
+
+    缺少任意一级或类型不符时返回默认值，不创建中间的空字典，也不依赖异常。
+    """
+
+    __slots__ = ('path', 'steps')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.steps = _parse_steps(path)
+
+    def get(self, data, default=None):
+        node = _walk(data, self.steps)
+        return default if node is _MISSING else node
+
+    def __repr__(self):
+        return f"JsonPath({self.path!r})"
+
+class FieldExtractor:
+    """一组预先拆分的字段路径：每个字段可以有多个候选路径，依次尝试，取第一个非空值
+
+    一次调用按声明顺序返回所有字段组成的元组，缺少的字段返回默认值。
+
+    示例:
+        BYLINE = FieldExtractor({
+            'channel_id': 'navigationEndpoint.browseEndpoint.browseId',
+            'channel_name': ('text', 'simpleText'),
+        })
+        channel_id, channel_name = BYLINE.extract(run)
+    """
+
+    __slots__ = ('fields', 'names', 'candidates')
+
+    def __init__(self, spec: Dict[str, Union[str, Sequence[str]]]):
+        self.fields = tuple(
+            (name, (paths,) if isinstance(paths, str) else tuple(paths)) for name, paths in spec.items()
+        )
+        self.names = tuple(name for name, _ in self.fields)
+        self.candidates = tuple(tuple(_parse_steps(path) for path in paths) for _, paths in self.fields)
+
+    def extract(self, data, default=None) -> tuple:
+        values = []
+        for candidates in self.candidates:
+            value = default
+            for steps in candidates:
+                node = _walk(data, steps)
+                if node is not _MISSING and node is not None and node != '':
+                    value = node
+                    break
+            values.append(value)
+        return tuple(values)
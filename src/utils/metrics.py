@@ -0,0 +1,402 @@
+import asyncio
+import configparser
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 直方图的桶上限（秒），覆盖毫秒级的解析到分钟级的浏览器爬取
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 指标说明，导出时作为HELP行
+METRIC_HELP = {
+    'crawler_stage_seconds': '各环节的耗时（爬取频道、处理Shorts、领取任务、解码、解析）',
+    'crawler_stage_results_total': '各环节的调用次数，result为ok、empty（无结果）或error（抛出异常）',
+    'crawler_leased_tasks_total': '从数据库领取到的任务数',
+    'crawler_decoded_bytes_total': '解码的响应字节数，direction为in（压缩）或out（解压后）',
+    'crawler_db_request_seconds': '数据库请求的耗时，operation为rpc、upsert或insert，target为存储过程名或表名',
+    'crawler_db_requests_total': '数据库请求次数',
+    'crawler_db_rows_total': '成功的写入请求中的行数',
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+class Metrics:
+    """进程内的计数器和延迟直方图
+
+    每个进程在内存中累积，后台线程定期把快照原子写入 directory/metrics-进程号.json；
+    主进程的MetricsServer读取目录中所有进程的快照，合并后以Prometheus文本格式输出。
+    """
+
+    _default = None
+    _default_pid = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, directory: Optional[str] = 'data/metrics', flush_interval: float = 10,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        初始化指标
+        Args:
+            directory: 快照目录，为None时只在内存中统计
+            flush_interval: 写入快照的间隔（秒）
+            buckets: 直方图的桶上限（秒）
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(sorted(buckets))
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        # (名称, 标签) -> [各桶计数（最后一个为+Inf）, 总和]
+        self._histograms: Dict[Tuple[str, LabelKey], List[Any]] = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def default(cls) -> Optional['Metrics']:
+        """获取进程内共享的指标实例，参数读取自config.ini的[metrics]配置；未启用时返回None
+
+        fork出的子进程不沿用父进程的实例，各自写自己的快照文件
+        """
+        pid = os.getpid()
+        if cls._default_pid == pid:
+            return cls._default
+        with cls._default_lock:
+            if cls._default_pid != pid:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                cls._default = None
+                if config.getboolean('metrics', 'enabled', fallback=False):
+                    cls._default = cls(
+                        directory=config.get('metrics', 'directory', fallback='data/metrics'),
+                        flush_interval=config.getfloat('metrics', 'flush_interval', fallback=10)
+                    )
+                cls._default_pid = pid
+            return cls._default
+
+    @classmethod
+    def flush_default(cls):
+        """写入当前进程共享实例的快照并停止后台线程"""
+        if cls._default_pid == os.getpid() and cls._default is not None:
+            cls._default.close()
+
+    def _start_flusher(self):
+        if self.directory and self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """计数器增加value"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+            self._dirty = True
+        self._start_flusher()
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一次观测值（秒）"""
+        key = (name, _label_key(labels))
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            self._dirty = True
+        self._start_flusher()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前进程的指标快照
+        Returns:
+            Dict[str, Any]: buckets、counters（[名称, 标签, 值]）和histograms（[名称, 标签, 各桶计数, 总和]）
+        """
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'buckets': list(self.buckets),
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, dict(labels), list(counts), total]
+                               for (name, labels), (counts, total) in self._histograms.items()],
+            }
+
+    def flush(self) -> bool:
+        """把快照原子写入快照目录，没有新数据时不写"""
+        if not self.directory or not self._dirty:
+            return False
+        try:
+            with self._lock:
+                self._dirty = False
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'metrics-{self.pid}.json')
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            # 指标写入失败不影响爬取，下次重试
+            self._dirty = True
+            return False
+
+    def close(self):
+        """停止后台线程并写入最后的快照"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._stop.clear()
+        self.flush()
+
+def flush_metrics_on_exit(func: Callable) -> Callable:
+    """工作进程入口函数的装饰器：函数返回或抛出异常后写入当前进程最后的指标快照
+
+    multiprocessing子进程退出时不执行atexit，后台线程最后一次写入之后的数据需要在这里写入
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            Metrics.flush_default()
+    return wrapper
+
+def _result_of(value: Any) -> str:
+    if value is None or value is False:
+        return 'empty'
+    if isinstance(value, (list, dict, tuple, set)) and not value:
+        return 'empty'
+    return 'ok'
+
+def _record_stage(metrics: Metrics, stage: str, started: float, result: str):
+    metrics.observe('crawler_stage_seconds', time.perf_counter() - started, stage=stage)
+    metrics.inc('crawler_stage_results_total', stage=stage, result=result)
+
+def timed(stage: str) -> Callable:
+    """
+    记录函数耗时和结果的装饰器，支持普通函数和协程函数；未启用指标时直接调用原函数
+    Args:
+        stage: 环节名称，作为crawler_stage_seconds的stage标签
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                metrics = Metrics.default()
+                if metrics is None:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    value = await func(*args, **kwargs)
+                except BaseException:
+                    _record_stage(metrics, stage, started, 'error')
+                    raise
+                _record_stage(metrics, stage, started, _result_of(value))
+                return value
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = Metrics.default()
+            if metrics is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                value = func(*args, **kwargs)
+            except BaseException:
+                _record_stage(metrics, stage, started, 'error')
+                raise
+            _record_stage(metrics, stage, started, _result_of(value))
+            return value
+        return wrapper
+    return decorator
+
+@contextmanager
+def db_request(operation: str, target: str, rows: int = 0):
+    """
+    记录一次数据库请求的耗时和结果，块内抛出异常时记为error并继续抛出
+    Args:
+        operation: rpc或upsert等
+        target: 存储过程名或表名
+        rows: 成功时计入crawler_db_rows_total的行数
+    """
+    metrics = Metrics.default()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        metrics.observe('crawler_db_request_seconds', time.perf_counter() - started, operation=operation, target=target)
+        metrics.inc('crawler_db_requests_total', operation=operation, target=target, result='error')
+        raise
+    metrics.observe('crawler_db_request_seconds', time.perf_counter() - started, operation=operation, target=target)
+    metrics.inc('crawler_db_requests_total', operation=operation, target=target, result='ok')
+    if rows:
+        metrics.inc('crawler_db_rows_total', rows, operation=operation, target=target)
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多个进程的快照：计数器和直方图按名称和标签相加，桶上限不同的直方图跳过"""
+    merged = {'buckets': None, 'processes': 0, 'counters': {}, 'histograms': {}}
+    for snapshot in snapshots:
+        merged['processes'] += 1
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, _label_key(labels))
+            merged['counters'][key] = merged['counters'].get(key, 0.0) + value
+        if merged['buckets'] is None:
+            merged['buckets'] = snapshot.get('buckets')
+        if snapshot.get('buckets') != merged['buckets']:
+            continue
+        for name, labels, counts, total in snapshot.get('histograms', []):
+            key = (name, _label_key(labels))
+            current = merged['histograms'].get(key)
+            if current is None:
+                merged['histograms'][key] = [list(counts), total]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def render_prometheus(merged: Dict[str, Any]) -> str:
+    """把merge_snapshots的结果输出为Prometheus文本格式"""
+    lines = [
+        '# HELP crawler_metrics_processes 写入了指标快照的进程数',
+        '# TYPE crawler_metrics_processes gauge',
+        f"crawler_metrics_processes {merged['processes']}",
+    ]
+    by_name: Dict[str, List] = {}
+    for (name, labels), value in sorted(merged['counters'].items()):
+        by_name.setdefault(name, []).append((labels, value))
+    for name, series in by_name.items():
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in series)
+
+    bounds = [_format_value(bound) for bound in merged['buckets'] or []] + ['+Inf']
+    by_name = {}
+    for (name, labels), histogram in sorted(merged['histograms'].items()):
+        by_name.setdefault(name, []).append((labels, histogram))
+    for name, series in by_name.items():
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+def read_snapshots(directory: str) -> List[Dict[str, Any]]:
+    """读取快照目录中所有进程的快照，正在写入或损坏的文件跳过"""
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+class MetricsServer:
+    """在本地端口以Prometheus文本格式输出所有工作进程合并后的指标（GET /metrics）"""
+
+    def __init__(self, directory: str = 'data/metrics', host: str = '127.0.0.1', port: int = 9108):
+        """
+        初始化指标服务
+        Args:
+            directory: 工作进程写入快照的目录
+            host: 监听地址，默认只监听本机
+            port: 监听端口，为0时使用随机端口
+        """
+        self.directory = directory
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def clear(self):
+        """删除上次运行遗留的快照，启动工作进程前调用"""
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json*')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def render(self) -> str:
+        """合并快照目录和当前进程的指标，输出Prometheus文本"""
+        snapshots = read_snapshots(self.directory)
+        metrics = Metrics.default()
+        if metrics is not None and not any(snapshot.get('pid') == metrics.pid for snapshot in snapshots):
+            snapshots.append(metrics.snapshot())
+        return render_prometheus(merge_snapshots(snapshots))
+
+    def start(self) -> int:
+        """
+        在后台线程中启动HTTP服务
+        Returns:
+            int: 实际监听的端口
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = server.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 抓取请求不写入爬虫日志
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """停止HTTP服务"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
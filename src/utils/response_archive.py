@@ -0,0 +1,302 @@
+import atexit
+import configparser
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# 可选的zstd压缩库，未安装时使用zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 段文件扩展名 -> 压缩格式
+SEGMENT_CODECS = {'.zst': 'zstd', '.zz': 'zlib'}
+INDEX_SUFFIX = '.idx'
+
+def _compressor(codec: str, level: int):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress
+    return lambda data: zlib.compress(data, level)
+
+def _decompressor(codec: str):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("归档使用zstd压缩，需要安装zstandard")
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+class ResponseArchive:
+    """原始响应归档：按段追加写入压缩后的响应体，每个段附带一个索引文件
+
+    目录结构为 {directory}/{YYYYMMDD}/seg-{HHMMSS}-{pid}-{序号}.zst，同名 .idx 文件每行一条JSON索引，
+    包含 offset、length、raw_length、kind（search/browse/page等）、task_id、url、ts。
+    每条响应单独压缩，可以按索引随机读取；每个进程写自己的段文件，不需要跨进程加锁。
+    写入在后台线程完成，队列满时丢弃并计数，不阻塞爬虫。
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, directory: str = 'archive', segment_max_bytes: int = 64 * 1024 * 1024,
+                 segment_max_age: float = 3600, compression: str = 'zstd', level: int = 3,
+                 queue_size: int = 1000, logger=None):
+        """
+        初始化归档
+        Args:
+            directory: 归档根目录
+            segment_max_bytes: 段文件超过该大小（字节）后切换到新段
+            segment_max_age: 段文件写入超过该时间（秒）后切换到新段
+            compression: zstd或zlib，未安装zstandard时自动使用zlib
+            level: 压缩级别
+            queue_size: 后台写入队列的长度
+            logger: 日志记录器实例
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.codec = 'zstd' if compression == 'zstd' and zstandard is not None else 'zlib'
+        self.level = level
+        self.logger = logger
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'errors': 0,
+                      'bytes_in': 0, 'bytes_out': 0, 'segments': 0}
+
+        self._compress = _compressor(self.codec, level)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._segment = None
+        self._index = None
+        self._segment_path = None
+        self._segment_started = 0.0
+        self._segment_day = None
+        self._sequence = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='ResponseArchive', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+        if compression == 'zstd' and self.codec != 'zstd':
+            self.log("未安装zstandard，响应归档改用zlib压缩", 'WARNING')
+
+    @classmethod
+    def default(cls) -> Optional['ResponseArchive']:
+        """获取进程内共享的归档实例，参数读取自config.ini的[archive]配置；未启用时返回None"""
+        with cls._default_lock:
+            if cls._default is None:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                if not config.getboolean('archive', 'enabled', fallback=False):
+                    return None
+                from .logger import Logger
+                cls._default = cls(
+                    directory=config.get('archive', 'directory', fallback='archive'),
+                    segment_max_bytes=config.getint('archive', 'segment_max_mb', fallback=64) * 1024 * 1024,
+                    segment_max_age=config.getfloat('archive', 'segment_max_age', fallback=3600),
+                    compression=config.get('archive', 'compression', fallback='zstd'),
+                    level=config.getint('archive', 'level', fallback=3),
+                    queue_size=config.getint('archive', 'queue_size', fallback=1000),
+                    logger=Logger()
+                )
+            return cls._default
+
+    def log(self, message, level='INFO'):
+        if self.logger:
+            self.logger.log(message, level)
+
+    def append(self, body: Union[bytes, str], kind: str, task_id: Optional[str] = None,
+               url: Optional[str] = None, timestamp: Optional[float] = None) -> bool:
+        """
+        把一条响应加入写入队列
+        Args:
+            body: 解码后的响应体（JSON或HTML）
+            kind: 响应类型，如search、browse、page
+            task_id: 任务标识，如关键词或频道URL
+            url: 请求地址
+            timestamp: 响应时间，默认为当前时间
+        Returns:
+            bool: 是否加入队列，队列已满或归档已关闭时返回False
+        """
+        if self._closed:
+            return False
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        meta = {'kind': kind, 'task_id': task_id, 'url': url, 'ts': timestamp or time.time()}
+        try:
+            self._queue.put_nowait((bytes(body), meta))
+            self.stats['queued'] += 1
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    self._close_segment()
+                    return
+                batch = [item]
+                # 一次取出队列中已有的全部记录，合并写入后再刷新文件
+                while len(batch) < 256:
+                    try:
+                        next_item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_item is None:
+                        self._write_batch(batch)
+                        self._close_segment()
+                        self._queue.task_done()
+                        return
+                    batch.append(next_item)
+                    self._queue.task_done()
+                self._write_batch(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.log(f"写入响应归档时出错: {str(e)}", 'ERROR')
+            finally:
+                self._queue.task_done()
+
+    def _open_segment(self, now: float):
+        day = time.strftime('%Y%m%d', time.localtime(now))
+        directory = os.path.join(self.directory, day)
+        os.makedirs(directory, exist_ok=True)
+        self._sequence += 1
+        extension = '.zst' if self.codec == 'zstd' else '.zz'
+        name = f"seg-{time.strftime('%H%M%S', time.localtime(now))}-{os.getpid()}-{self._sequence}{extension}"
+        self._segment_path = os.path.join(directory, name)
+        self._segment = open(self._segment_path, 'ab')
+        self._index = open(self._segment_path + INDEX_SUFFIX, 'a', encoding='utf-8')
+        self._segment_started = now
+        self._segment_day = day
+        self.stats['segments'] += 1
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = self._index = None
+
+    def _needs_rotation(self, now: float) -> bool:
+        if self._segment is None:
+            return True
+        return (self._segment.tell() >= self.segment_max_bytes
+                or now - self._segment_started >= self.segment_max_age
+                or time.strftime('%Y%m%d', time.localtime(now)) != self._segment_day)
+
+    def _write_batch(self, batch: List[Tuple[bytes, Dict[str, Any]]]):
+        for body, meta in batch:
+            now = time.time()
+            if self._needs_rotation(now):
+                self._close_segment()
+                self._open_segment(now)
+            compressed = self._compress(body)
+            offset = self._segment.tell()
+            self._segment.write(compressed)
+            entry = {'offset': offset, 'length': len(compressed), 'raw_length': len(body)}
+            entry.update(meta)
+            self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stats['written'] += 1
+            self.stats['bytes_in'] += len(body)
+            self.stats['bytes_out'] += len(compressed)
+        # 先落盘数据再落盘索引，索引中的记录总能读到完整数据
+        self._segment.flush()
+        self._index.flush()
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待队列中的记录全部写入"""
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        """写入剩余记录并关闭当前段"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['codec'] = self.codec
+        stats['ratio'] = stats['bytes_in'] / stats['bytes_out'] if stats['bytes_out'] else 0.0
+        return stats
+
+class ArchiveReader:
+    """读取ResponseArchive写入的段文件"""
+
+    def __init__(self, directory: str = 'archive'):
+        self.directory = directory
+
+    def segments(self, days: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        列出段文件
+        Args:
+            days: 只列出这些日期（YYYYMMDD）的段，默认全部
+        Returns:
+            List[str]: 段文件路径，按日期和文件名排序
+        """
+        patterns = [os.path.join(self.directory, day, 'seg-*') for day in days] if days \
+            else [os.path.join(self.directory, '*', 'seg-*')]
+        paths = []
+        for pattern in patterns:
+            paths.extend(path for path in glob.glob(pattern) if os.path.splitext(path)[1] in SEGMENT_CODECS)
+        return sorted(paths)
+
+    @staticmethod
+    def read_index(segment_path: str) -> List[Dict[str, Any]]:
+        """读取段的索引，忽略写入中断留下的不完整行"""
+        entries = []
+        try:
+            with open(segment_path + INDEX_SUFFIX, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def read_segment(segment_path: str, kinds: Optional[Sequence[str]] = None, task_id: Optional[str] = None,
+                     since: Optional[float] = None, until: Optional[float] = None
+                     ) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """
+        按索引依次读取段中的记录
+        Args:
+            segment_path: 段文件路径
+            kinds: 只读取这些类型
+            task_id: 只读取该任务的记录
+            since: 只读取该时间之后的记录
+            until: 只读取该时间之前的记录
+        Yields:
+            Tuple[Dict[str, Any], bytes]: (索引记录, 解压后的响应体)
+        """
+        decompress = _decompressor(SEGMENT_CODECS[os.path.splitext(segment_path)[1]])
+        entries = [
+            entry for entry in ArchiveReader.read_index(segment_path)
+            if (not kinds or entry.get('kind') in kinds)
+            and (task_id is None or entry.get('task_id') == task_id)
+            and (since is None or entry.get('ts', 0) >= since)
+            and (until is None or entry.get('ts', 0) < until)
+        ]
+        if not entries:
+            return
+        with open(segment_path, 'rb') as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                yield entry, decompress(f.read(entry['length']))
+
+    def records(self, days: Optional[Sequence[str]] = None, **filters) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """依次读取所有段中的记录，过滤条件同read_segment"""
+        for segment_path in self.segments(days):
+            yield from self.read_segment(segment_path, **filters)
@@ -1,14 +1,88 @@
 import base64
 import brotli
 import json
-from typing import Dict, Any, List, Optional
+import time
+import zlib
+from typing import Dict, Any, List, Optional, Union
 from .logger import Logger
+from .metrics import Metrics
+
+# 可选的快速JSON解析库，未安装时使用标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选的zstd解压库，未安装时遇到zstd编码的响应会报错
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def loads_json(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """解析JSON，安装了orjson时使用orjson；bytes直接解析，不先转换为str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def _decompress_gzip(data: bytes) -> bytes:
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+def _decompress_deflate(data: bytes) -> bytes:
+    # HTTP的deflate通常带zlib头，少数服务端发送不带头的原始deflate数据
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+def _decompress_zstd(data: bytes) -> bytes:
+    if zstandard is None:
+        raise ValueError("响应使用zstd压缩，需要安装zstandard")
+    # 流式解压，兼容帧头中没有原始大小的数据
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+# Content-Encoding -> 解压函数
+DECOMPRESSORS = {
+    'br': brotli.decompress,
+    'gzip': _decompress_gzip,
+    'x-gzip': _decompress_gzip,
+    'deflate': _decompress_deflate,
+    'zstd': _decompress_zstd,
+    'identity': None,
+}
+
+def accepted_encodings() -> str:
+    """请求头Accept-Encoding的取值：只声明能够解压的编码"""
+    encodings = ['br', 'gzip', 'deflate']
+    if zstandard is not None:
+        encodings.append('zstd')
+    return ', '.join(encodings)
+
+def _content_encodings(headers) -> List[str]:
+    """读取Content-Encoding，多个编码按应用顺序排列（解压时需倒序）"""
+    encodings = []
+    for header in headers or []:
+        if header['name'].lower() == 'content-encoding':
+            encodings.extend(value.strip().lower() for value in header['value'].split(',') if value.strip())
+    return encodings
 
 class ResponseProcessor:
     """响应处理类"""
     
-    def __init__(self):
+    def __init__(self, verbose: bool = False, archive=None):
+        """
+        初始化响应处理器
+        Args:
+            verbose: 为True时记录每个解码步骤的日志（调试用，热路径上默认关闭）
+            archive: ResponseArchive实例，设置后解码时可以把解压后的响应体写入归档
+        """
         self.logger = Logger()
+        self.verbose = verbose
+        self.archive = archive
+        self.stats = {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'decode_seconds': 0.0, 'errors': 0}
+        self.last_stats: Dict[str, Any] = {}
     
     def process_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -68,32 +142,123 @@ class ResponseProcessor:
             self.logger.log(f"获取下一页token时出错: {str(e)}", 'ERROR')
             return None
     
-    def process_response_content(self, response: Dict[str, Any]) -> str:
+    def _decode_body(self, response: Dict[str, Any]) -> Union[str, bytes]:
+        """
+        按content的encoding和响应头的Content-Encoding解码响应体
+        Returns:
+            Union[str, bytes]: 未经base64和压缩时为原始str，否则为解压后的bytes
+        """
+        body = response['content']['text']
+        
+        if response['content'].get('encoding') == 'base64':
+            body = base64.b64decode(body)
+            if self.verbose:
+                self.logger.log(f"已解码base64内容: {len(body)} 字节")
+        
+        for encoding in reversed(_content_encodings(response.get('headers'))):
+            if encoding not in DECOMPRESSORS:
+                raise ValueError(f"不支持的Content-Encoding: {encoding}")
+            decompress = DECOMPRESSORS[encoding]
+            if decompress is None:
+                continue
+            if isinstance(body, str):
+                # 未经base64的压缩内容在HAR中以latin-1文本保存
+                body = body.encode('latin-1')
+            body = decompress(body)
+            if self.verbose:
+                self.logger.log(f"已解压{encoding}内容: {len(body)} 字节")
+        
+        return body
+    
+    def archive_body(self, body: Union[str, bytes], archive_as: Optional[Dict[str, Any]]):
+        """
+        把响应体写入归档，未设置归档或archive_as为空时不做任何事
+        Args:
+            body: 解压后的响应体
+            archive_as: ResponseArchive.append的参数，如 {'kind': 'search', 'task_id': 关键词, 'url': 请求地址}
+        """
+        if self.archive is not None and archive_as:
+            self.archive.append(body, **archive_as)
+    
+    def _record(self, bytes_in: int, bytes_out: int, started: float):
+        elapsed = time.perf_counter() - started
+        self.last_stats = {'bytes_in': bytes_in, 'bytes_out': bytes_out, 'decode_seconds': elapsed}
+        self.stats['responses'] += 1
+        self.stats['bytes_in'] += bytes_in
+        self.stats['bytes_out'] += bytes_out
+        self.stats['decode_seconds'] += elapsed
+        metrics = Metrics.default()
+        if metrics is not None:
+            metrics.observe('crawler_stage_seconds', elapsed, stage='decode')
+            metrics.inc('crawler_stage_results_total', stage='decode', result='ok')
+            metrics.inc('crawler_decoded_bytes_total', bytes_in, direction='in')
+            metrics.inc('crawler_decoded_bytes_total', bytes_out, direction='out')
+    
+    def _record_error(self):
+        self.stats['errors'] += 1
+        metrics = Metrics.default()
+        if metrics is not None:
+            metrics.inc('crawler_stage_results_total', stage='decode', result='error')
+    
+    def decode_response(self, response: Dict[str, Any], archive_as: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        把HAR/CDP响应直接解码为JSON对象：解码base64、解压后直接解析bytes，不再转换为str
+        
+        本次的输入字节数、解压后字节数和耗时记录在last_stats，累计值记录在stats
+        Args:
+            response: 响应对象，包含content和headers信息
+            archive_as: 归档参数，见archive_body
+        Returns:
+            Any: 解析后的JSON对象
+        """
+        started = time.perf_counter()
+        try:
+            raw = response['content']['text']
+            body = self._decode_body(response)
+            data = loads_json(body)
+        except Exception as e:
+            self._record_error()
+            self.logger.log(f"解码响应时出错: {str(e)}", 'ERROR')
+            raise
+        self._record(len(raw), len(body), started)
+        self.archive_body(body, archive_as)
+        if self.verbose:
+            self.logger.log(f"已解析JSON响应: {self.last_stats}")
+        return data
+    
+    def process_response_content(self, response: Dict[str, Any], archive_as: Optional[Dict[str, Any]] = None) -> str:
         """
         处理响应内容的通用函数（处理编码和压缩）
         Args:
             response: 响应对象，包含content和headers信息
+            archive_as: 归档参数，见archive_body
         Returns:
             str: 处理后的响应文本
         """
+        started = time.perf_counter()
         try:
-            response_text = response['content']['text']
-            
-            if response['content'].get('encoding') == 'base64':
-                response_text = base64.b64decode(response_text)
-                self.logger.log("已解码base64内容")
-            
-            if any(h['name'].lower() == 'content-encoding' and 'br' in h['value'].lower() 
-                  for h in response['headers']):
-                response_text = brotli.decompress(response_text)
-                self.logger.log("已解压brotli内容")
+            raw = response['content']['text']
+            response_text = self._decode_body(response)
             
             if isinstance(response_text, bytes):
                 response_text = response_text.decode('utf-8')
-                self.logger.log("已将bytes转换为字符串")
+                if self.verbose:
+                    self.logger.log("已将bytes转换为字符串")
             
+            self._record(len(raw), len(response_text), started)
+            self.archive_body(response_text, archive_as)
             return response_text
             
         except Exception as e:
+            self._record_error()
             self.logger.log(f"处理响应内容时出错: {str(e)}", 'ERROR')
-            raise 
\ No newline at end of file
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取累计的解码统计，包括平均每个响应的耗时"""
+        stats = dict(self.stats)
+        stats['json_backend'] = 'orjson' if orjson is not None else 'json'
+        stats['avg_decode_ms'] = (
+            stats['decode_seconds'] * 1000 / stats['responses'] if stats['responses'] else 0.0
+        )
+        return stats
@@ -0,0 +1,211 @@
+import configparser
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+class SelectorStats:
+    """选择器命中统计：记录每个选择器的成功率和耗时，按近期命中率排序候选选择器
+
+    统计按分组（如 shorts_chip、channel_name）保存在JSON文件中，多个工作进程共享同一个文件：
+    每个进程先在内存中累积结果，定期加锁读取文件、合并自己的新结果后再原子写回。
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: str = 'data/selector_stats.json', decay: float = 0.8,
+                 flush_interval: float = 60, dead_threshold: float = 0.05, dead_min_attempts: int = 20):
+        """
+        初始化选择器统计
+        Args:
+            path: 统计文件路径，为None时只在内存中统计
+            decay: 命中率的衰减系数，越小越偏重最近的结果
+            flush_interval: 自动写回文件的间隔（秒）
+            dead_threshold: 命中率低于该值时视为失效
+            dead_min_attempts: 判定失效所需的最少尝试次数
+        """
+        self.path = path
+        self.decay = decay
+        self.flush_interval = flush_interval
+        self.dead_threshold = dead_threshold
+        self.dead_min_attempts = dead_min_attempts
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._pending: Dict[Tuple[str, str], List[Tuple[bool, float, float]]] = {}
+        self._last_flush = time.monotonic()
+        self._stats = self._read_file()
+
+    @classmethod
+    def default(cls) -> 'SelectorStats':
+        """获取进程内共享的统计实例，参数读取自config.ini的[selector]配置"""
+        with cls._default_lock:
+            if cls._default is None:
+                config = configparser.ConfigParser()
+                config.read('config.ini', encoding='utf-8')
+                section = config['selector'] if config.has_section('selector') else {}
+                cls._default = cls(
+                    path=section.get('stats_path', 'data/selector_stats.json'),
+                    decay=float(section.get('decay', 0.8)),
+                    flush_interval=float(section.get('flush_interval', 60))
+                )
+            return cls._default
+
+    @staticmethod
+    def _new_entry() -> Dict[str, Any]:
+        # 未使用过的选择器命中率先按0.5计，排在已失效的选择器之前
+        return {'attempts': 0, 'hits': 0, 'hit_rate': 0.5, 'avg_latency': None, 'last_hit': None}
+
+    def _apply(self, entry: Dict[str, Any], ok: bool, elapsed: float, timestamp: float):
+        """把一次结果合并进统计条目"""
+        entry['attempts'] += 1
+        entry['hit_rate'] = entry['hit_rate'] * self.decay + (1.0 if ok else 0.0) * (1 - self.decay)
+        if ok:
+            entry['hits'] += 1
+            entry['last_hit'] = timestamp
+            if entry['avg_latency'] is None:
+                entry['avg_latency'] = elapsed
+            else:
+                entry['avg_latency'] = entry['avg_latency'] * self.decay + elapsed * (1 - self.decay)
+
+    def record(self, group: str, selector: str, ok: bool, elapsed: float = 0.0):
+        """
+        记录一次选择器尝试
+        Args:
+            group: 选择器分组
+            selector: 选择器
+            ok: 是否找到元素
+            elapsed: 耗时（秒）
+        """
+        timestamp = time.time()
+        with self._lock:
+            entry = self._stats.setdefault(group, {}).setdefault(selector, self._new_entry())
+            self._apply(entry, ok, elapsed, timestamp)
+            self._pending.setdefault((group, selector), []).append((ok, elapsed, timestamp))
+
+        if self.path and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def rank(self, group: str, selectors: List[str]) -> List[str]:
+        """
+        按近期命中率从高到低排序候选选择器，命中率相同时按平均耗时，再按原有顺序
+        Args:
+            group: 选择器分组
+            selectors: 候选选择器
+        Returns:
+            List[str]: 排序后的选择器
+        """
+        with self._lock:
+            group_stats = self._stats.get(group, {})
+            entries = [group_stats.get(selector) or self._new_entry() for selector in selectors]
+
+        order = sorted(
+            range(len(selectors)),
+            key=lambda i: (
+                -round(entries[i]['hit_rate'], 3),
+                entries[i]['avg_latency'] if entries[i]['avg_latency'] is not None else float('inf'),
+                i
+            )
+        )
+        return [selectors[i] for i in order]
+
+    def _read_file(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _acquire_file_lock(self, timeout: float = 5) -> Optional[str]:
+        """通过创建锁文件在进程间互斥，超时时返回None"""
+        lock_path = f"{self.path}.lock"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return lock_path
+            except FileExistsError:
+                # 清理异常退出的进程遗留的锁文件
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > timeout * 2:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    pass
+                time.sleep(0.05)
+        return None
+
+    def flush(self) -> bool:
+        """
+        把内存中的新结果合并到统计文件，并加载其他进程写入的结果
+        Returns:
+            bool: 是否写入了文件；加锁超时时不写入，新结果保留到下次写入
+        """
+        if not self.path:
+            return False
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        lock_path = self._acquire_file_lock()
+        if lock_path is None:
+            # 不加锁写入会覆盖其他进程同时写入的结果，放回待写入队列（排在期间新产生的结果之前）
+            with self._lock:
+                for key, results in self._pending.items():
+                    pending.setdefault(key, []).extend(results)
+                self._pending = pending
+            return False
+        try:
+            merged = self._read_file()
+            for (group, selector), results in pending.items():
+                entry = merged.setdefault(group, {}).setdefault(selector, self._new_entry())
+                for ok, elapsed, timestamp in results:
+                    self._apply(entry, ok, elapsed, timestamp)
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+        with self._lock:
+            # 合并期间新产生的结果也要体现在内存统计中
+            for (group, selector), results in self._pending.items():
+                entry = merged.setdefault(group, {}).setdefault(selector, self._new_entry())
+                for ok, elapsed, timestamp in results:
+                    self._apply(entry, ok, elapsed, timestamp)
+            self._stats = merged
+        return True
+
+    def get_stats(self, group: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        获取选择器统计
+        Args:
+            group: 只返回该分组，为None时返回全部
+        Returns:
+            Dict: 分组 -> 选择器 -> 统计，dead为True表示该选择器近期基本不再命中
+        """
+        with self._lock:
+            groups = {group: self._stats.get(group, {})} if group else dict(self._stats)
+            return {
+                name: {
+                    selector: dict(
+                        entry,
+                        dead=entry['attempts'] >= self.dead_min_attempts and entry['hit_rate'] < self.dead_threshold
+                    )
+                    for selector, entry in selectors.items()
+                }
+                for name, selectors in groups.items()
+            }
@@ -1,10 +1,97 @@
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
+import time
+from .selector_stats import SelectorStats
+
+# 在页面内一次性执行所有字段的XPath选择器（含备选），返回每个字段第一个非空的值及命中的选择器序号
+EXTRACT_FIELDS_SCRIPT = """
+const fields = arguments[0];
+const readValue = (xpath, attribute) => {
+    let node;
+    try {
+        node = document.evaluate(
+            xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+    if (!node) return null;
+    if (!attribute) return (node.innerText || node.textContent || '').trim() || null;
+    const value = node[attribute] !== undefined && node[attribute] !== null
+        ? node[attribute] : node.getAttribute(attribute);
+    return value ? String(value) : null;
+};
+const result = {};
+const matched = {};
+for (const field of fields) {
+    const values = [];
+    for (let index = 1; index <= field.count; index++) {
+        let value = null;
+        for (let i = 0; i < field.selectors.length; i++) {
+            value = readValue(field.selectors[i].split('{index}').join(String(index)), field.attribute);
+            if (value) {
+                if (index === 1) matched[field.name] = i;
+                break;
+            }
+        }
+        values.push(value);
+    }
+    result[field.name] = field.multiple ? values : values[0];
+}
+return {values: result, matched: matched};
+"""
 
 class SelectorUtils:
     @staticmethod
-    def get_text_by_selectors(driver, selectors, logger=None, attribute=None, wait_time=5):
+    def _make_log(logger):
+        def log(message, level='INFO'):
+            if logger:
+                logger.log(message, level)
+            else:
+                print(f"[{level}] {message}")
+        return log
+
+    @staticmethod
+    def find_element(driver, selectors, logger=None, group=None, condition=EC.presence_of_element_located,
+                     wait_time=5, fallback_wait_time=None, stats=None):
+        """
+        通过多个选择器查找元素，指定分组时按近期命中率排序选择器并记录每个选择器的结果
+        
+        Args:
+            driver: WebDriver实例
+            selectors (list): XPath选择器列表
+            logger: 日志记录器实例
+            group (str, optional): 选择器分组，用于命中统计
+            condition: 等待条件，如EC.element_to_be_clickable
+            wait_time (int): 第一个选择器等待元素出现的最大时间（秒）
+            fallback_wait_time (int, optional): 之后的选择器的等待时间，默认与wait_time相同
+            stats (SelectorStats, optional): 统计实例，默认使用进程内共享实例
+            
+        Returns:
+            tuple: (元素, 命中的选择器)，所有选择器都失败时返回(None, None)
+        """
+        log = SelectorUtils._make_log(logger)
+        if group:
+            stats = stats or SelectorStats.default()
+            selectors = stats.rank(group, selectors)
+        
+        for i, selector in enumerate(selectors):
+            timeout = wait_time if i == 0 or fallback_wait_time is None else fallback_wait_time
+            started = time.monotonic()
+            try:
+                element = WebDriverWait(driver, timeout).until(condition((By.XPATH, selector)))
+                if group:
+                    stats.record(group, selector, True, time.monotonic() - started)
+                return element, selector
+            except Exception as selector_error:
+                if group:
+                    stats.record(group, selector, False, time.monotonic() - started)
+                log(f"选择器 {selector} 未找到元素: {str(selector_error)}")
+        return None, None
+
+    @staticmethod
+    def get_text_by_selectors(driver, selectors, logger=None, attribute=None, wait_time=5, group=None, stats=None):
         """
         通过多个选择器尝试获取元素文本或属性值
         
@@ -14,26 +101,111 @@ class SelectorUtils:
             logger: 日志记录器实例
             attribute (str, optional): 要获取的属性名，如果为None则获取文本内容
             wait_time (int): 等待元素出现的最大时间（秒）
+            group (str, optional): 选择器分组，指定时按近期命中率排序选择器并记录结果
+            stats (SelectorStats, optional): 统计实例，默认使用进程内共享实例
             
         Returns:
             str: 获取到的文本或属性值，如果所有选择器都失败则返回None
         """
-        def log(message, level='INFO'):
-            if logger:
-                logger.log(message, level)
-            else:
-                print(f"[{level}] {message}")
+        log = SelectorUtils._make_log(logger)
+        if group:
+            stats = stats or SelectorStats.default()
+            selectors = stats.rank(group, selectors)
                 
         for selector in selectors:
+            started = time.monotonic()
             try:
                 element = WebDriverWait(driver, wait_time).until(
                     EC.presence_of_element_located((By.XPATH, selector))
                 )
                 value = element.get_attribute(attribute) if attribute else element.text
+                if group:
+                    stats.record(group, selector, bool(value), time.monotonic() - started)
                 if value:
                     log(f"从选择器 {selector} 获取到{'属性' if attribute else '文本'}: {value}")
                     return value
             except Exception as selector_error:
+                if group:
+                    stats.record(group, selector, False, time.monotonic() - started)
                 log(f"选择器 {selector} 未找到元素: {str(selector_error)}")
                 continue
-        return None 
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def extract_fields(driver, spec, logger=None, stats=None):
+        """
+        通过一次execute_script批量提取多个字段，缺失的字段不会阻塞等待
+        
+        Args:
+            driver: WebDriver实例
+            spec (dict): 字段名到提取规则的映射，规则包含：
+                selectors (list): XPath选择器列表，按顺序尝试
+                attribute (str, optional): 要获取的属性名，为None时获取文本内容
+                count (int, optional): 指定时提取多个元素，选择器中的{index}依次替换为1..count，结果为列表
+                group (str, optional): 选择器分组，指定时按近期命中率排序选择器并记录命中情况
+            logger: 日志记录器实例
+            stats (SelectorStats, optional): 统计实例，默认使用进程内共享实例
+            
+        Returns:
+            dict: 字段名到值的映射，未找到的字段值为None（多元素字段为对应位置为None的列表）
+        """
+        log = SelectorUtils._make_log(logger)
+        if any(rule.get('group') for rule in spec.values()):
+            stats = stats or SelectorStats.default()
+                
+        fields = [
+            {
+                'name': name,
+                'group': rule.get('group'),
+                'selectors': stats.rank(rule['group'], list(rule['selectors'])) if rule.get('group')
+                             else list(rule['selectors']),
+                'attribute': rule.get('attribute'),
+                'count': int(rule.get('count', 1)),
+                'multiple': 'count' in rule
+            }
+            for name, rule in spec.items()
+        ]
+        
+        started = time.monotonic()
+        try:
+            output = driver.execute_script(EXTRACT_FIELDS_SCRIPT, fields) or {}
+        except Exception as e:
+            log(f"批量提取页面字段失败: {str(e)}", 'ERROR')
+            output = None
+        elapsed = time.monotonic() - started
+        result = (output or {}).get('values') or {}
+        matched = (output or {}).get('matched') or {}
+        
+        # 命中的选择器记一次成功，排在它之前的选择器记一次失败；脚本执行失败时不记录
+        if output is not None:
+            for field in fields:
+                if not field['group']:
+                    continue
+                hit_index = matched.get(field['name'])
+                tried = field['selectors'] if hit_index is None else field['selectors'][:int(hit_index) + 1]
+                for i, selector in enumerate(tried):
+                    stats.record(field['group'], selector, hit_index is not None and i == int(hit_index), elapsed)
+            
+        values = {}
+        for field in fields:
+            value = result.get(field['name'])
+            if field['multiple']:
+                value = list(value or [None] * field['count'])
+                log(f"字段 {field['name']} 获取到 {sum(1 for v in value if v)}/{field['count']} 个值")
+            else:
+                log(f"字段 {field['name']} {'获取到: ' + str(value) if value else '未找到'}")
+            values[field['name']] = value
+        return values
+
+    @staticmethod
+    def get_selector_stats(group=None):
+        """
+        获取选择器命中统计，用于发现已失效的选择器
+        
+        Args:
+            group (str, optional): 只返回该分组
+            
+        Returns:
+            dict: 分组 -> 选择器 -> 统计
+        """
+        return SelectorStats.default().get_stats(group)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from src.utils.json_path import FieldExtractor, JsonPath
+
+def test_json_path_get():
+    """测试路径取值：类型不符或缺少任意一级时返回默认值"""
+    print(f"开始测试JSON路径 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    data = {'runs': [{'text': 'a'}, {'text': 'b'}], 'title': 'plain'}
+    assert JsonPath('runs.0.text').get(data) == 'a'
+    assert JsonPath('runs.-1.text').get(data) == 'b'
+    assert JsonPath('runs.2.text').get(data, 'missing') == 'missing'
+    assert JsonPath('title.runs').get(data) is None
+    assert JsonPath('runs.text').get(data) is None
+    assert JsonPath('runs.0').get([]) is None
+
+def test_field_extractor_candidates():
+    """测试多个候选路径按优先级取第一个非空值，共同前缀只取一次"""
+    extractor = FieldExtractor({
+        'video_id': ('videoId', 'navigationEndpoint.reelWatchEndpoint.videoId'),
+        'channel_id': ('longBylineText.runs.0.browseId', 'ownerText.runs.0.browseId'),
+        'channel_name': ('longBylineText.runs.0.text', 'ownerText.runs.0.text'),
+        'views': 'viewCountText.simpleText',
+    })
+    assert extractor.extract({
+        'videoId': '',
+        'navigationEndpoint': {'reelWatchEndpoint': {'videoId': 'v1'}},
+        'longBylineText': {'runs': [{'text': 'Alpha'}]},
+        'ownerText': {'runs': [{'text': 'Owner', 'browseId': 'UCowner'}]},
+    }) == ('v1', 'UCowner', 'Alpha', None)
+
+    # 高优先级的候选出现在数据中较后的位置时仍然优先
+    assert extractor.extract({
+        'ownerText': {'runs': [{'text': 'Owner', 'browseId': 'UCowner'}]},
+        'longBylineText': {'runs': [{'text': 'Alpha', 'browseId': 'UCalpha'}]},
+    }, '') == ('', 'UCalpha', 'Alpha', '')
+
+    assert extractor.extract(['not', 'a', 'dict'], '') == ('', '', '', '')
+
+if __name__ == "__main__":
+    test_json_path_get()
+    test_field_extractor_candidates()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import tempfile
+import urllib.request
+from datetime import datetime
+from src.utils.metrics import (
+    Metrics, MetricsServer, db_request, flush_metrics_on_exit, merge_snapshots, render_prometheus, timed
+)
+
+def _use_metrics(metrics):
+    """把测试用的实例设为当前进程的共享实例，返回原来的状态"""
+    previous = (Metrics._default, Metrics._default_pid)
+    Metrics._default, Metrics._default_pid = metrics, os.getpid()
+    return previous
+
+def _restore(previous):
+    Metrics._default, Metrics._default_pid = previous
+
+def test_timed_records_stage_and_result():
+    """测试装饰器记录普通函数和协程函数的耗时和结果"""
+    print(f"开始测试环节计时 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    metrics = Metrics(directory=None, buckets=(0.1, 1.0))
+    previous = _use_metrics(metrics)
+    try:
+        @timed('parse')
+        def parse(items):
+            return items
+
+        @timed('crawl')
+        async def crawl(fail):
+            if fail:
+                raise ValueError('boom')
+            return {'id': 1}
+
+        parse([1])
+        parse([])
+        asyncio.run(crawl(False))
+        try:
+            asyncio.run(crawl(True))
+        except ValueError:
+            pass
+        with db_request('upsert', 'videos', rows=3):
+            pass
+    finally:
+        _restore(previous)
+
+    snapshot = metrics.snapshot()
+    counters = {(name, tuple(sorted(labels.items()))): value for name, labels, value in snapshot['counters']}
+    print(f"计数器: {counters}")
+    assert counters[('crawler_stage_results_total', (('result', 'ok'), ('stage', 'parse')))] == 1
+    assert counters[('crawler_stage_results_total', (('result', 'empty'), ('stage', 'parse')))] == 1
+    assert counters[('crawler_stage_results_total', (('result', 'ok'), ('stage', 'crawl')))] == 1
+    assert counters[('crawler_stage_results_total', (('result', 'error'), ('stage', 'crawl')))] == 1
+    assert counters[('crawler_db_rows_total', (('operation', 'upsert'), ('target', 'videos')))] == 3
+    histograms = {labels['stage']: counts for name, labels, counts, _ in snapshot['histograms']
+                  if name == 'crawler_stage_seconds'}
+    assert sum(histograms['parse']) == 2
+    assert sum(histograms['crawl']) == 2
+
+def test_server_merges_process_snapshots():
+    """测试多个进程的快照合并后通过HTTP端点输出"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        worker_a = Metrics(directory=tmp_dir, buckets=(0.1, 1.0))
+        worker_b = Metrics(directory=tmp_dir, buckets=(0.1, 1.0))
+        worker_b.pid = worker_a.pid + 1
+        worker_a.inc('crawler_leased_tasks_total', 5, kind='channel')
+        worker_b.inc('crawler_leased_tasks_total', 3, kind='channel')
+        worker_a.observe('crawler_stage_seconds', 0.05, stage='crawl_channel')
+        worker_b.observe('crawler_stage_seconds', 0.5, stage='crawl_channel')
+        worker_b.observe('crawler_stage_seconds', 5.0, stage='crawl_channel')
+        worker_a.close()
+        worker_b.close()
+
+        text = render_prometheus(merge_snapshots([worker_a.snapshot(), worker_b.snapshot()]))
+        assert 'crawler_leased_tasks_total{kind="channel"} 8' in text
+
+        server = MetricsServer(directory=tmp_dir, port=0)
+        previous = _use_metrics(None)
+        port = server.start()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.stop()
+            _restore(previous)
+
+        print(body)
+        assert body == text
+        assert 'crawler_metrics_processes 2' in body
+        assert 'crawler_stage_seconds_bucket{stage="crawl_channel",le="0.1"} 1' in body
+        assert 'crawler_stage_seconds_bucket{stage="crawl_channel",le="1"} 2' in body
+        assert 'crawler_stage_seconds_bucket{stage="crawl_channel",le="+Inf"} 3' in body
+        assert 'crawler_stage_seconds_count{stage="crawl_channel"} 3' in body
+
+        server.clear()
+        assert not os.listdir(tmp_dir)
+
+def test_default_reads_boolean_enabled():
+    """测试[metrics] enabled按布尔值读取，true/yes/on都视为启用"""
+    cwd = os.getcwd()
+    previous = _use_metrics(None)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            os.chdir(tmp_dir)
+            for value, enabled in (('true', True), ('on', True), ('no', False)):
+                with open('config.ini', 'w', encoding='utf-8') as f:
+                    f.write(f"[metrics]\nenabled = {value}\ndirectory = metrics\n")
+                Metrics._default, Metrics._default_pid = None, None
+                metrics = Metrics.default()
+                assert (metrics is not None) == enabled
+                if metrics is not None:
+                    assert metrics.directory == 'metrics'
+        finally:
+            os.chdir(cwd)
+            _restore(previous)
+
+def test_flush_on_exit_writes_snapshot_when_worker_fails():
+    """测试工作进程入口抛出异常时也写入最后的快照"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        metrics = Metrics(directory=tmp_dir, flush_interval=3600)
+        previous = _use_metrics(metrics)
+        try:
+            @flush_metrics_on_exit
+            def worker():
+                metrics.inc('crawler_leased_tasks_total', kind='channel')
+                raise RuntimeError('boom')
+
+            try:
+                worker()
+            except RuntimeError:
+                pass
+        finally:
+            _restore(previous)
+        assert os.listdir(tmp_dir) == [f'metrics-{metrics.pid}.json']
+
+if __name__ == "__main__":
+    test_timed_records_stage_and_result()
+    test_server_merges_process_snapshots()
+    test_default_reads_boolean_enabled()
+    test_flush_on_exit_writes_snapshot_when_worker_fails()
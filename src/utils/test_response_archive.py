@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from src.utils.response_archive import ResponseArchive, ArchiveReader
+from src.utils.response_processor import ResponseProcessor
+
+def test_append_and_read_back():
+    """测试追加写入后按索引读回，并按类型、任务和时间过滤"""
+    print(f"开始测试响应归档 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(directory, compression='zlib')
+        now = time.time()
+        archive.append(b'{"page": 1}', kind='search', task_id='cats', url='u1', timestamp=now - 10)
+        archive.append('{"page": "二"}', kind='search', task_id='dogs', url='u2', timestamp=now)
+        archive.append(b'<html></html>', kind='page', task_id='https://www.youtube.com/@alpha/shorts')
+        archive.close()
+
+        reader = ArchiveReader(directory)
+        assert len(reader.segments()) == 1
+        records = list(reader.records())
+        assert [entry['task_id'] for entry, _ in records] == ['cats', 'dogs', 'https://www.youtube.com/@alpha/shorts']
+        assert json.loads(records[1][1]) == {'page': '二'}
+
+        assert [body for _, body in reader.records(kinds=['page'])] == [b'<html></html>']
+        assert [entry['url'] for entry, _ in reader.records(task_id='cats')] == ['u1']
+        assert [entry['task_id'] for entry, _ in reader.records(kinds=['search'], since=now - 1)] == ['dogs']
+
+        stats = archive.get_stats()
+        print(stats)
+        assert stats['written'] == 3 and stats['dropped'] == 0
+        assert not archive.append(b'{}', kind='search')
+
+def test_segments_rotate_by_size():
+    """测试段文件超过大小上限后切换，所有记录仍可读回"""
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(directory, segment_max_bytes=1, compression='zlib')
+        for index in range(3):
+            archive.append(json.dumps({'index': index}), kind='browse', task_id=str(index))
+        archive.close()
+
+        reader = ArchiveReader(directory)
+        segments = reader.segments()
+        assert len(segments) == 3
+        assert all(os.path.exists(path + '.idx') for path in segments)
+        assert sorted(json.loads(body)['index'] for _, body in reader.records()) == [0, 1, 2]
+
+def test_processor_archives_decoded_body():
+    """测试ResponseProcessor解码时把解压后的响应体写入归档"""
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(directory, compression='zlib')
+        processor = ResponseProcessor(archive=archive)
+        response = {'content': {'text': b'{"ok": true}'}, 'headers': []}
+        assert processor.decode_response(response, {'kind': 'search', 'task_id': 'cats'}) == {'ok': True}
+        # 未提供归档参数时不写入
+        processor.decode_response(response)
+        archive.close()
+
+        records = list(ArchiveReader(directory).records())
+        assert [(entry['kind'], body) for entry, body in records] == [('search', b'{"ok": true}')]
+
+if __name__ == "__main__":
+    test_append_and_read_back()
+    test_segments_rotate_by_size()
+    test_processor_archives_decoded_body()
@@ -0,0 +1,75 @@
+import base64
+import gzip
+import json
+import zlib
+from datetime import datetime
+import brotli
+from src.utils import response_processor
+from src.utils.response_processor import ResponseProcessor
+
+DOCUMENT = {'contents': {'items': [{'videoId': 'v1', 'title': '标题'}]}}
+RAW = json.dumps(DOCUMENT, ensure_ascii=False).encode('utf-8')
+
+def make_response(body, encoding=None, base64_encoded=True):
+    headers = [{'name': 'Content-Type', 'value': 'application/json'}]
+    if encoding:
+        headers.append({'name': 'Content-Encoding', 'value': encoding})
+    content = {'text': base64.b64encode(body).decode('ascii') if base64_encoded else body}
+    if base64_encoded:
+        content['encoding'] = 'base64'
+    return {'content': content, 'headers': headers}
+
+def test_decode_response_supports_encodings():
+    """测试base64加各种压缩格式直接解码为JSON对象"""
+    print(f"开始测试响应解码 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    processor = ResponseProcessor()
+    raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw_deflate_body = raw_deflate.compress(RAW) + raw_deflate.flush()
+    cases = [
+        (brotli.compress(RAW), 'br'),
+        (gzip.compress(RAW), 'gzip'),
+        (zlib.compress(RAW), 'deflate'),
+        (raw_deflate_body, 'deflate'),
+        (brotli.compress(gzip.compress(RAW)), 'gzip, br'),
+        (RAW, None),
+    ]
+    for body, encoding in cases:
+        assert processor.decode_response(make_response(body, encoding)) == DOCUMENT, encoding
+
+    # 未经base64的文本
+    assert processor.decode_response(make_response(RAW.decode('utf-8'), base64_encoded=False)) == DOCUMENT
+    # aiohttp直接读取的未压缩bytes
+    assert processor.decode_response({'content': {'text': RAW}, 'headers': []}) == DOCUMENT
+
+    stats = processor.get_stats()
+    print(stats)
+    assert stats['responses'] == len(cases) + 2
+    assert processor.last_stats['bytes_out'] == len(RAW)
+    assert stats['bytes_out'] >= len(RAW) * len(cases)
+
+def test_unsupported_encoding_raises():
+    """测试不支持的压缩格式报错并计数"""
+    processor = ResponseProcessor()
+    try:
+        processor.decode_response(make_response(RAW, 'compress'))
+        assert False, "应当抛出异常"
+    except ValueError:
+        pass
+    if response_processor.zstandard is None:
+        try:
+            processor.decode_response(make_response(RAW, 'zstd'))
+            assert False, "应当抛出异常"
+        except ValueError:
+            pass
+    assert processor.stats['errors'] >= 1
+
+def test_process_response_content_returns_text():
+    """测试原有的文本接口"""
+    processor = ResponseProcessor()
+    text = processor.process_response_content(make_response(brotli.compress(RAW), 'br'))
+    assert json.loads(text) == DOCUMENT
+
+if __name__ == "__main__":
+    test_decode_response_supports_encodings()
+    test_unsupported_encoding_raises()
+    test_process_response_content_returns_text()
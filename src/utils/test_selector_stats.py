@@ -0,0 +1,65 @@
+import os
+import tempfile
+from datetime import datetime
+from src.utils.selector_stats import SelectorStats
+
+def test_rank_prefers_recent_hits():
+    """测试失效的选择器被排到后面"""
+    print(f"开始测试选择器排序 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    stats = SelectorStats(path=None)
+    selectors = ['//old', '//new', '//unused']
+    for _ in range(5):
+        stats.record('shorts_chip', '//old', False, 10.0)
+        stats.record('shorts_chip', '//new', True, 0.5)
+
+    assert stats.rank('shorts_chip', selectors) == ['//new', '//unused', '//old']
+
+    for _ in range(20):
+        stats.record('shorts_chip', '//old', False, 10.0)
+    result = stats.get_stats('shorts_chip')['shorts_chip']
+    print(f"选择器统计: {result}")
+    assert result['//old']['dead']
+    assert not result['//new']['dead']
+
+def test_flush_merges_between_workers():
+    """测试多个进程的统计合并到同一个文件"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'selector_stats.json')
+        worker_a = SelectorStats(path=path, flush_interval=3600)
+        worker_b = SelectorStats(path=path, flush_interval=3600)
+
+        worker_a.record('channel_name', '//h1', True, 0.1)
+        worker_b.record('channel_name', '//h1', False, 0.1)
+        worker_b.record('channel_name', '//span', True, 0.2)
+        worker_a.flush()
+        worker_b.flush()
+
+        merged = SelectorStats(path=path).get_stats('channel_name')['channel_name']
+        assert merged['//h1']['attempts'] == 2
+        assert merged['//h1']['hits'] == 1
+        assert merged['//span']['hits'] == 1
+        assert not os.path.exists(f"{path}.lock")
+
+def test_flush_keeps_results_when_lock_times_out():
+    """测试加锁超时时不写文件，新结果保留到下次写入"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'selector_stats.json')
+        stats = SelectorStats(path=path, flush_interval=3600)
+        stats.record('channel_name', '//h1', True, 0.1)
+
+        acquire = stats._acquire_file_lock
+        stats._acquire_file_lock = lambda: None
+        assert not stats.flush()
+        assert not os.path.exists(path)
+        stats.record('channel_name', '//h1', False, 0.1)
+
+        stats._acquire_file_lock = acquire
+        assert stats.flush()
+        merged = SelectorStats(path=path).get_stats('channel_name')['channel_name']
+        assert merged['//h1']['attempts'] == 2
+        assert merged['//h1']['hits'] == 1
+
+if __name__ == "__main__":
+    test_rank_prefers_recent_hits()
+    test_flush_merges_between_workers()
+    test_flush_keeps_results_when_lock_times_out()
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+from src.utils.wait_utils import WaitUtils
+
+class FakeReader:
+    """模拟CaptureReader，在指定时间后返回新条目"""
+
+    def __init__(self, delay):
+        self.ready_at = time.monotonic() + delay
+        self.returned = False
+
+    def read_new(self):
+        if not self.returned and time.monotonic() >= self.ready_at:
+            self.returned = True
+            return [{'id': 1}]
+        return []
+
+def test_wait_for_response_returns_as_soon_as_entries_arrive():
+    """测试响应到达后立即结束等待，而不是等满超时时间"""
+    print(f"开始测试事件驱动等待 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    waits = WaitUtils(poll_interval=0.02)
+    result = waits.wait_for_response(FakeReader(0.1), timeout=5)
+    assert result.ok
+    assert result.value == [{'id': 1}]
+    assert result.elapsed < 1
+
+    result = waits.wait_for_response(FakeReader(10), timeout=0.1)
+    assert not result.ok
+    assert result.value == []
+
+    stats = waits.get_stats()['response']
+    print(f"等待统计: {stats}")
+    assert stats['count'] == 2
+    assert stats['timeouts'] == 1
+
+class SlowCapture:
+    """模拟每次读取代价较高的捕获（如HAR），记录读取次数"""
+
+    poll_interval = 0.2
+
+    def __init__(self):
+        self.reads = 0
+
+    def get_entries(self):
+        self.reads += 1
+        return []
+
+def test_expensive_capture_polls_at_its_own_interval():
+    """测试捕获声明了poll_interval时按该间隔轮询，而不是默认间隔"""
+    waits = WaitUtils(poll_interval=0.01)
+    capture = SlowCapture()
+    result = waits.wait_for_network_idle(capture, idle_time=0.5, timeout=5)
+    assert result.ok
+    print(f"读取次数: {capture.reads}")
+    # 0.5秒内按0.2秒间隔轮询只读取几次，按默认间隔会读取约50次
+    assert capture.reads <= 6
+
+if __name__ == "__main__":
+    test_wait_for_response_returns_as_soon_as_entries_arrive()
+    test_expensive_capture_polls_at_its_own_interval()
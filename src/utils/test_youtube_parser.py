@@ -0,0 +1,71 @@
+from datetime import datetime
+from src.utils.youtube_parser import YouTubeParser
+
+def channel_endpoint(channel_id, handle):
+    return {'browseEndpoint': {'browseId': channel_id, 'canonicalBaseUrl': f'/@{handle}'}}
+
+def video_renderer(video_id):
+    return {'videoRenderer': {
+        'videoId': video_id,
+        'title': {'runs': [{'text': f'title {video_id}'}]},
+        'viewCountText': {'simpleText': '1,234次观看'},
+        'publishedTimeText': {'simpleText': '3天前'},
+        'longBylineText': {'runs': [{'text': 'Alpha', 'navigationEndpoint': channel_endpoint('UCalpha', 'alpha')}]}
+    }}
+
+def reel_item(video_id):
+    return {'reelItemRenderer': {
+        'videoId': video_id,
+        'headline': {'simpleText': f'reel {video_id}'},
+        'viewCountText': {'simpleText': '2.5万次观看'},
+        'navigationEndpoint': {'reelWatchEndpoint': {'videoId': video_id}},
+        'shortBylineText': {'runs': [{'text': 'Beta', 'navigationEndpoint': channel_endpoint('UCbeta', 'beta')}]}
+    }}
+
+def shorts_lockup(video_id):
+    return {'shortsLockupViewModel': {
+        'entityId': f'shorts-shelf-item-{video_id}',
+        'onTap': {'innertubeCommand': {'reelWatchEndpoint': {'videoId': video_id}}},
+        'overlayMetadata': {
+            'primaryText': {'content': f'lockup {video_id}'},
+            'secondaryText': {'content': '3万次观看'}
+        },
+        'inlinePlayerData': {'onVisible': {'innertubeCommand': channel_endpoint('UCgamma', 'gamma')}}
+    }}
+
+def test_shorts_search_response_parses_all_renderers():
+    """测试Shorts筛选搜索结果中的各种渲染器和货架都能在一次遍历中解析"""
+    print(f"开始测试Shorts搜索结果解析 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    data = {'contents': {'twoColumnSearchResultsRenderer': {'primaryContents': {'sectionListRenderer': {'contents': [
+        {'itemSectionRenderer': {'contents': [
+            video_renderer('v1'),
+            {'reelShelfRenderer': {'items': [reel_item('r1'), shorts_lockup('s1')]}},
+            {'gridShelfViewModel': {'contents': [shorts_lockup('s2')]}},
+            {'adSlotRenderer': {}}
+        ]}},
+        {'itemSectionRenderer': {'contents': [reel_item('r2')]}},
+        {'continuationItemRenderer': {}}
+    ]}}}}}
+
+    videos = YouTubeParser().extract_videos_from_json(data)
+    assert [v.video_id for v in videos] == ['v1', 'r1', 's1', 's2', 'r2']
+
+    by_id = {v.video_id: v for v in videos}
+    assert by_id['v1'].channel_id == 'UCalpha' and by_id['v1'].view_count == 1234
+    assert by_id['r1'].title == 'reel r1' and by_id['r1'].view_count == 25000
+    assert by_id['r1'].channel_id == 'UCbeta' and by_id['r1'].channel_name == 'Beta'
+    assert by_id['s1'].title == 'lockup s1' and by_id['s1'].view_count == 30000
+    assert by_id['s1'].channel_id == 'UCgamma' and by_id['s1'].canonical_base_url == '/@gamma'
+    assert by_id['s1'].published_date is None
+
+def test_continuation_response_parses_shelves():
+    """测试continuation响应中的Shorts货架"""
+    data = {'onResponseReceivedCommands': [{'appendContinuationItemsAction': {'continuationItems': [
+        {'itemSectionRenderer': {'contents': [shorts_lockup('s3'), video_renderer('v2')]}}
+    ]}}]}
+    videos = YouTubeParser().extract_videos_from_json(data)
+    assert [v.video_id for v in videos] == ['s3', 'v2']
+
+if __name__ == "__main__":
+    test_shorts_search_response_parses_all_renderers()
+    test_continuation_response_parses_shelves()
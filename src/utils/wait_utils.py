@@ -0,0 +1,181 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# 在页面内用MutationObserver等待XPath对应的元素出现，避免固定时长的轮询
+WAIT_FOR_ELEMENT_SCRIPT = """
+const xpath = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const find = () => document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (find()) { done(true); return; }
+const observer = new MutationObserver(() => {
+    if (find()) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
+@dataclass
+class WaitResult:
+    """等待结果"""
+    name: str
+    ok: bool
+    elapsed: float
+    value: Any = None
+
+@dataclass
+class WaitStats:
+    """某类等待的累计统计"""
+    count: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+class WaitUtils:
+    """基于真实条件的等待工具：等待网络响应、DOM变化、网络空闲或超时，并记录每次等待的实际耗时"""
+
+    def __init__(self, logger=None, worker_id=None, poll_interval: float = 0.2):
+        """
+        初始化等待工具
+        Args:
+            logger: 日志记录器实例
+            worker_id: 工作进程ID，用于日志区分
+            poll_interval: 轮询条件的间隔（秒）
+        """
+        if logger is None:
+            from .logger import Logger
+            logger = Logger()
+        self.logger = logger
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        self.stats: Dict[str, WaitStats] = {}
+
+    def _finish(self, name: str, ok: bool, started: float, value: Any = None) -> WaitResult:
+        """记录等待耗时并返回结果"""
+        elapsed = time.monotonic() - started
+        stats = self.stats.setdefault(name, WaitStats())
+        stats.count += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if not ok:
+            stats.timeouts += 1
+
+        message = f"等待[{name}]{'完成' if ok else '超时'}，耗时 {elapsed:.2f} 秒"
+        if self.worker_id is not None:
+            self.logger.log(message, 'INFO', self.worker_id)
+        else:
+            self.logger.log(message, 'INFO')
+        return WaitResult(name=name, ok=ok, elapsed=elapsed, value=value)
+
+    def wait_until(self, name: str, condition: Callable[[], Any], timeout: float,
+                   poll_interval: Optional[float] = None) -> WaitResult:
+        """
+        轮询等待条件成立
+        Args:
+            name: 等待名称，用于日志和统计
+            condition: 条件函数，返回真值时等待结束
+            timeout: 超时时间（秒）
+            poll_interval: 轮询间隔，默认使用初始化时的设置
+        Returns:
+            WaitResult: value为条件函数最后一次的返回值
+        """
+        interval = poll_interval or self.poll_interval
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            value = condition()
+            if value:
+                return self._finish(name, True, started, value)
+            if time.monotonic() >= deadline:
+                return self._finish(name, False, started, value)
+            time.sleep(interval)
+
+    def wait_for_response(self, reader, timeout: float = 10, name: str = 'response') -> WaitResult:
+        """
+        等待捕获到新的匹配响应
+        Args:
+            reader: CaptureReader实例
+            timeout: 超时时间（秒）
+            name: 等待名称
+        Returns:
+            WaitResult: value为读取到的新条目列表（已从reader中取出，需由调用方处理）
+        """
+        collected: List[Dict[str, Any]] = []
+
+        def condition():
+            collected.extend(reader.read_new())
+            return collected
+
+        # 读取开销大的捕获方式（HAR）按其自身的间隔轮询
+        interval = getattr(getattr(reader, 'capture', None), 'poll_interval', None)
+        result = self.wait_until(name, condition, timeout, poll_interval=interval)
+        result.value = collected
+        return result
+
+    def wait_for_network_idle(self, capture, idle_time: float = 1.0, timeout: float = 10,
+                              name: str = 'network_idle') -> WaitResult:
+        """
+        等待网络空闲：在idle_time内没有新的捕获条目
+        Args:
+            capture: 网络捕获实例
+            idle_time: 判定为空闲所需的静默时间（秒）
+            timeout: 超时时间（秒）
+            name: 等待名称
+        Returns:
+            WaitResult: value为当前捕获条目数
+        """
+        state = {'count': len(capture.get_entries()), 'changed_at': time.monotonic()}
+
+        def condition():
+            count = len(capture.get_entries())
+            if count != state['count']:
+                state['count'] = count
+                state['changed_at'] = time.monotonic()
+                return None
+            return time.monotonic() - state['changed_at'] >= idle_time
+
+        result = self.wait_until(name, condition, timeout, poll_interval=getattr(capture, 'poll_interval', None))
+        result.value = state['count']
+        return result
+
+    def wait_for_document_ready(self, driver, timeout: float = 10, name: str = 'document_ready') -> WaitResult:
+        """等待页面document.readyState变为complete"""
+        return self.wait_until(
+            name,
+            lambda: driver.execute_script("return document.readyState") == 'complete',
+            timeout
+        )
+
+    def wait_for_element(self, driver, xpath: str, timeout: float = 10, name: Optional[str] = None) -> WaitResult:
+        """
+        通过DOM变化监听等待元素出现
+        Args:
+            driver: WebDriver实例
+            xpath: 元素XPath
+            timeout: 超时时间（秒），需小于driver的脚本超时
+            name: 等待名称，默认使用xpath
+        Returns:
+            WaitResult: 元素出现时ok为True
+        """
+        started = time.monotonic()
+        try:
+            found = bool(driver.execute_async_script(WAIT_FOR_ELEMENT_SCRIPT, xpath, int(timeout * 1000)))
+        except Exception as e:
+            self.logger.log(f"等待元素时出错: {xpath}, 错误: {str(e)}", 'WARNING')
+            found = False
+        return self._finish(name or f"element:{xpath}", found, started)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取各类等待的累计统计"""
+        return {
+            name: {
+                'count': stats.count,
+                'timeouts': stats.timeouts,
+                'avg_seconds': stats.total_seconds / stats.count if stats.count else 0.0,
+                'max_seconds': stats.max_seconds
+            }
+            for name, stats in self.stats.items()
+        }
@@ -1,9 +1,12 @@
 import json
+import re
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from .data_converter import DataConverter
+from .json_path import FieldExtractor, JsonPath
 from .logger import Logger
+from .metrics import timed
 
 @dataclass
 class VideoData:
@@ -17,12 +20,91 @@ class VideoData:
     channel_name: str
     canonical_base_url: str
 
+# 页面HTML中ytInitialData的赋值位置
+INITIAL_DATA_PATTERN = re.compile(r'(?:var\s+ytInitialData|window\[["\']ytInitialData["\']\])\s*=\s*')
+
+# 视频渲染器类型 -> YouTubeParser中的解析方法
+VIDEO_RENDERERS = {
+    'videoRenderer': '_parse_video_renderer',
+    'reelItemRenderer': '_parse_reel_item_renderer',
+    'shortsLockupViewModel': '_parse_shorts_lockup',
+}
+
+# 包含视频项的容器（区块、货架）-> 子项列表的候选路径
+CONTAINER_RENDERERS = {
+    'itemSectionRenderer': (JsonPath('contents'),),
+    'reelShelfRenderer': (JsonPath('items'),),
+    'gridShelfViewModel': (JsonPath('contents'),),
+    'richItemRenderer': (JsonPath('content'),),
+    'richSectionRenderer': (JsonPath('content'),),
+    'shelfRenderer': (JsonPath('content.verticalListRenderer.items'), JsonPath('content.horizontalListRenderer.items')),
+}
+
+# 各渲染器的字段路径，模块加载时拆分一次；extract按声明顺序返回元组
+_BYLINE_RUNS = ('longBylineText.runs.0', 'ownerText.runs.0', 'shortBylineText.runs.0')
+_REEL_BYLINE_RUNS = ('shortBylineText.runs.0', 'longBylineText.runs.0', 'channelTitleText.runs.0')
+
+def _under(prefixes, suffix):
+    return tuple(f'{prefix}.{suffix}' for prefix in prefixes)
+
+VIDEO_RENDERER_FIELDS = FieldExtractor({
+    'video_id': 'videoId',
+    'title': 'title.runs.0.text',
+    'view_count': 'viewCountText.simpleText',
+    'published_date': 'publishedTimeText.simpleText',
+    'channel_id': _under(_BYLINE_RUNS, 'navigationEndpoint.browseEndpoint.browseId'),
+    'channel_name': _under(_BYLINE_RUNS, 'text'),
+    'canonical_base_url': _under(_BYLINE_RUNS, 'navigationEndpoint.browseEndpoint.canonicalBaseUrl'),
+})
+
+REEL_ITEM_FIELDS = FieldExtractor({
+    'video_id': ('videoId', 'navigationEndpoint.reelWatchEndpoint.videoId'),
+    'title': ('headline.simpleText', 'headline.runs.0.text'),
+    'view_count': 'viewCountText.simpleText',
+    'channel_id': _under(_REEL_BYLINE_RUNS, 'navigationEndpoint.browseEndpoint.browseId'),
+    'channel_name': _under(_REEL_BYLINE_RUNS, 'text'),
+    'canonical_base_url': _under(_REEL_BYLINE_RUNS, 'navigationEndpoint.browseEndpoint.canonicalBaseUrl'),
+})
+
+SHORTS_LOCKUP_FIELDS = FieldExtractor({
+    'video_id': 'onTap.innertubeCommand.reelWatchEndpoint.videoId',
+    'entity_id': 'entityId',
+    'title': 'overlayMetadata.primaryText.content',
+    'view_count': 'overlayMetadata.secondaryText.content',
+})
+
+# 查找频道时跳过的子树：缩略图、无障碍文本、日志等不会包含频道链接
+CHANNEL_SCAN_SKIP = frozenset((
+    'thumbnail', 'thumbnails', 'accessibility', 'accessibilityText', 'accessibilityData',
+    'loggingDirectives', 'trackingParams', 'overlayMetadata', 'menuOnTap', 'menu'
+))
+
+SHORTS_ENTITY_PREFIX = 'shorts-shelf-item-'
+
 class YouTubeParser:
     """YouTube数据解析类"""
     
     def __init__(self):
         self.logger = Logger()
         self.data_converter = DataConverter()
+        self._today = None
+        self._today_expires = 0.0
+        # 相对时间和抓取日期的基准时间戳，为None时使用当前时间；回放归档时设为响应的抓取时间
+        self.reference_time: Optional[float] = None
+        self._renderer_parsers = {
+            renderer_type: getattr(self, method) for renderer_type, method in VIDEO_RENDERERS.items()
+        }
+    
+    def _crawl_date(self) -> str:
+        """当天日期，缓存到本地时间的午夜，避免每个视频都格式化一次时间"""
+        if self.reference_time is not None:
+            return time.strftime('%Y-%m-%d', time.localtime(self.reference_time))
+        now = time.time()
+        if now >= self._today_expires:
+            local = time.localtime(now)
+            self._today = time.strftime('%Y-%m-%d', local)
+            self._today_expires = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        return self._today
     
     def analyze_and_store_json_response_first(self, json_data: Dict[str, Any]) -> List[VideoData]:
         """分析第一次JSON响应数据"""
@@ -97,6 +179,7 @@ class YouTubeParser:
             self.logger.log(f"分析后续JSON响应时出错: {str(e)}", 'ERROR')
             return []
     
+    @timed('parse_channel')
     def analyze_channel_json_response(self, json_data: Dict[str, Any], page_channel_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """分析频道JSON响应数据"""
         self.logger.log("\n分析频道JSON响应数据...")
@@ -119,36 +202,106 @@ class YouTubeParser:
             return None
     
     def _extract_video_data(self, item: Dict[str, Any]) -> Optional[VideoData]:
-        """从视频项中提取数据"""
-        try:
-            video_renderer = item.get('videoRenderer', {})
-            if not video_renderer:
-                return None
-                
-            video_id = video_renderer.get('videoId', '')
-            if not video_id:
-                return None
-                
-            return VideoData(
-                video_id=video_id,
-                title=video_renderer.get('title', {}).get('runs', [{}])[0].get('text', ''),
-                view_count=self.data_converter.convert_view_count(
-                    video_renderer.get('viewCountText', {}).get('simpleText', '')
-                ),
-                published_date=self.data_converter.convert_relative_time(
-                    video_renderer.get('publishedTimeText', {}).get('simpleText', '')
-                ),
-                crawl_date=time.strftime('%Y-%m-%d'),
-                channel_id=video_renderer.get('longBylineText', {}).get('runs', [{}])[0]
-                    .get('navigationEndpoint', {}).get('browseEndpoint', {}).get('browseId', ''),
-                channel_name=video_renderer.get('longBylineText', {}).get('runs', [{}])[0].get('text', ''),
-                canonical_base_url=video_renderer.get('longBylineText', {}).get('runs', [{}])[0]
-                    .get('navigationEndpoint', {}).get('browseEndpoint', {}).get('canonicalBaseUrl', '')
-            )
-            
-        except Exception as e:
-            self.logger.log(f"提取视频数据时出错: {str(e)}", 'ERROR')
+        """从视频项中提取数据，按渲染器类型分发到对应的解析函数"""
+        for renderer_type, renderer in item.items():
+            if renderer_type in VIDEO_RENDERERS:
+                return self._renderer_parsers[renderer_type](renderer)
+        return None
+    
+    def _iter_video_renderers(self, items: List[Any]):
+        """按顺序展开货架类容器，依次返回(渲染器类型, 渲染器数据)"""
+        stack = list(reversed(items))
+        while stack:
+            item = stack.pop()
+            if item.__class__ is not dict:
+                continue
+            for renderer_type, renderer in item.items():
+                if renderer_type in VIDEO_RENDERERS:
+                    yield renderer_type, renderer
+                elif renderer_type in CONTAINER_RENDERERS:
+                    for path in CONTAINER_RENDERERS[renderer_type]:
+                        children = path.get(renderer)
+                        if children.__class__ is list:
+                            stack.extend(reversed(children))
+                            break
+                        if children.__class__ is dict:
+                            stack.append(children)
+                            break
+    
+    def _find_channel(self, renderer: Dict[str, Any]) -> Tuple[str, str]:
+        """在渲染器中深度优先查找第一个指向频道的browseEndpoint，用于没有固定署名字段的Shorts结构
+        
+        Returns:
+            Tuple[str, str]: (channel_id, canonical_base_url)，找不到时为空字符串
+        """
+        stack = [renderer]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is dict:
+                endpoint = node.get('browseEndpoint')
+                if endpoint.__class__ is dict:
+                    browse_id = endpoint.get('browseId')
+                    if browse_id.__class__ is str and browse_id.startswith('UC'):
+                        return browse_id, endpoint.get('canonicalBaseUrl') or ''
+                stack.extend([value for key, value in reversed(node.items())
+                              if (value.__class__ is dict or value.__class__ is list) and key not in CHANNEL_SCAN_SKIP])
+            elif node.__class__ is list:
+                stack.extend(reversed(node))
+        return '', ''
+    
+    def _parse_video_renderer(self, renderer: Dict[str, Any]) -> Optional[VideoData]:
+        """普通搜索结果：videoRenderer"""
+        video_id, title, views, published, channel_id, channel_name, canonical_url = \
+            VIDEO_RENDERER_FIELDS.extract(renderer, '')
+        if not video_id:
+            return None
+        return VideoData(
+            video_id=video_id,
+            title=title,
+            view_count=self.data_converter.convert_view_count(views),
+            published_date=self.data_converter.convert_relative_time(published, self.reference_time),
+            crawl_date=self._crawl_date(),
+            channel_id=channel_id,
+            channel_name=channel_name,
+            canonical_base_url=canonical_url
+        )
+    
+    def _parse_reel_item_renderer(self, renderer: Dict[str, Any]) -> Optional[VideoData]:
+        """Shorts货架中的reelItemRenderer，没有发布时间"""
+        video_id, title, views, channel_id, channel_name, canonical_url = REEL_ITEM_FIELDS.extract(renderer, '')
+        if not video_id:
             return None
+        if not channel_id:
+            channel_id, canonical_url = self._find_channel(renderer)
+        return VideoData(
+            video_id=video_id,
+            title=title,
+            view_count=self.data_converter.convert_view_count(views),
+            published_date=None,
+            crawl_date=self._crawl_date(),
+            channel_id=channel_id,
+            channel_name=channel_name,
+            canonical_base_url=canonical_url
+        )
+    
+    def _parse_shorts_lockup(self, renderer: Dict[str, Any]) -> Optional[VideoData]:
+        """Shorts筛选搜索结果中的shortsLockupViewModel，没有发布时间和频道名称"""
+        video_id, entity_id, title, views = SHORTS_LOCKUP_FIELDS.extract(renderer, '')
+        if not video_id:
+            if not entity_id.startswith(SHORTS_ENTITY_PREFIX):
+                return None
+            video_id = entity_id[len(SHORTS_ENTITY_PREFIX):]
+        channel_id, canonical_url = self._find_channel(renderer)
+        return VideoData(
+            video_id=video_id,
+            title=title,
+            view_count=self.data_converter.convert_view_count(views),
+            published_date=None,
+            crawl_date=self._crawl_date(),
+            channel_id=channel_id,
+            channel_name='',
+            canonical_base_url=canonical_url
+        )
     
     def _get_about_renderer(self, json_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """获取频道about信息"""
@@ -390,6 +543,7 @@ class YouTubeParser:
             self.logger.log(f"解析播放列表信息时出错: {str(e)}", 'ERROR')
             return {}
 
+    @timed('parse_search')
     def extract_videos_from_json(self, json_data: Dict[str, Any]) -> List[VideoData]:
         """
         统一的JSON视频数据提取方法
@@ -398,47 +552,171 @@ class YouTubeParser:
         Returns:
             List[VideoData]: 视频数据列表
         """
-        self.logger.log("\n分析JSON响应...")
+        self.logger.log("\n分析JSON响应...", 'DEBUG')
         
         try:
             # 使用统一的路径选择器获取视频内容
             commands = json_data.get('onResponseReceivedCommands', [{}])[0]
-            
-            # 尝试不同的路径获取contents
+
+            # 尝试不同的路径获取区块列表，区块和货架在遍历时展开
             contents = None
-            if 'reloadContinuationItemsCommand' in commands:
+            if 'contents' in json_data:
+                # search接口首页响应或页面的ytInitialData
+                contents = json_data['contents'].get('twoColumnSearchResultsRenderer', {}) \
+                    .get('primaryContents', {}).get('sectionListRenderer', {}).get('contents')
+            elif 'reloadContinuationItemsCommand' in commands:
                 contents = commands['reloadContinuationItemsCommand']['continuationItems'][0] \
-                    ['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer'] \
-                    ['contents'][0]['itemSectionRenderer']['contents']
+                    .get('twoColumnSearchResultsRenderer', {}).get('primaryContents', {}) \
+                    .get('sectionListRenderer', {}).get('contents')
             elif 'appendContinuationItemsAction' in commands:
-                contents = commands['appendContinuationItemsAction']['continuationItems'][0] \
-                    ['itemSectionRenderer']['contents']
+                contents = commands['appendContinuationItemsAction'].get('continuationItems')
             
             if not contents:
                 self.logger.log("未找到视频内容", 'WARNING')
                 return []
             
-            self.logger.log(f"\n找到 {len(contents)} 个视频内容")
-            
             results = []
-            for item in contents:
-                video_data = self._extract_video_data(item)
+            renderer_counts = {}
+            for renderer_type, renderer in self._iter_video_renderers(contents):
+                renderer_counts[renderer_type] = renderer_counts.get(renderer_type, 0) + 1
+                video_data = self._renderer_parsers[renderer_type](renderer)
                 if video_data:
                     results.append(video_data)
-                    # 打印每个视频的详细信息
-                    # print("\n视频信息:")
-                    # print(f"视频ID: {video_data.video_id}")
-                    # print(f"标题: {video_data.title}")
-                    # print(f"观看次数: {video_data.view_count}")
-                    # print(f"发布日期: {video_data.published_date}")
-                    # print(f"频道ID: {video_data.channel_id}")
-                    # print(f"频道名称: {video_data.channel_name}")
-                    # print(f"规范URL: {video_data.canonical_base_url}")
-                    # print("-" * 50)
             
+            self.logger.log(f"\n找到视频内容: {renderer_counts}", 'DEBUG')
             self.logger.log(f"\n总共解析了 {len(results)} 个视频的数据")
             return results
             
         except Exception as e:
             self.logger.log(f"分析JSON响应时出错: {str(e)}", 'ERROR')
-            return [] 
\ No newline at end of file
+            return []
+
+    def extract_continuation_token(self, json_data: Dict[str, Any]) -> Optional[str]:
+        """
+        从搜索响应中提取下一页的continuation token
+        Args:
+            json_data: JSON响应数据
+        Returns:
+            Optional[str]: continuation token，没有下一页时返回None
+        """
+        try:
+            items = []
+            if 'contents' in json_data:
+                items = json_data['contents'].get('twoColumnSearchResultsRenderer', {}) \
+                    .get('primaryContents', {}).get('sectionListRenderer', {}).get('contents', [])
+            else:
+                for command in json_data.get('onResponseReceivedCommands', []):
+                    if 'appendContinuationItemsAction' in command:
+                        items = command['appendContinuationItemsAction'].get('continuationItems', [])
+                    elif 'reloadContinuationItemsCommand' in command:
+                        continuation_items = command['reloadContinuationItemsCommand'].get('continuationItems', [{}])
+                        items = continuation_items[0].get('twoColumnSearchResultsRenderer', {}) \
+                            .get('primaryContents', {}).get('sectionListRenderer', {}).get('contents', [])
+                    if items:
+                        break
+            
+            for item in items:
+                token = item.get('continuationItemRenderer', {}).get('continuationEndpoint', {}) \
+                    .get('continuationCommand', {}).get('token')
+                if token:
+                    return token
+            return None
+            
+        except Exception as e:
+            self.logger.log(f"提取continuation token时出错: {str(e)}", 'ERROR')
+            return None
+
+
+    @timed('parse_initial_data')
+    def extract_initial_data(self, html: str) -> Optional[Dict[str, Any]]:
+        """
+        从页面HTML中提取ytInitialData
+        Args:
+            html: 页面HTML
+        Returns:
+            Optional[Dict[str, Any]]: ytInitialData，找不到时返回None
+        """
+        match = INITIAL_DATA_PATTERN.search(html)
+        if not match:
+            self.logger.log("页面中未找到ytInitialData", 'WARNING')
+            return None
+        try:
+            data, _ = json.JSONDecoder().raw_decode(html, match.end())
+            return data
+        except ValueError as e:
+            self.logger.log(f"解析ytInitialData时出错: {str(e)}", 'ERROR')
+            return None
+
+    def _find_values(self, data: Any, key: str):
+        """深度优先遍历JSON，依次返回指定键对应的值"""
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if key in node:
+                    yield node[key]
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+
+    def extract_about_continuation(self, initial_data: Dict[str, Any]) -> Optional[str]:
+        """
+        提取频道"关于"面板的continuation token（即点击"显示更多"时发送的browse请求）
+        Args:
+            initial_data: 频道页面的ytInitialData
+        Returns:
+            Optional[str]: continuation token，找不到时返回None
+        """
+        # 优先在页面头部查找，避免误取视频列表的翻页token
+        for scope in (initial_data.get('header', {}), initial_data):
+            for endpoint in self._find_values(scope, 'showEngagementPanelEndpoint'):
+                for command in self._find_values(endpoint, 'continuationCommand'):
+                    token = command.get('token') if isinstance(command, dict) else None
+                    if token:
+                        return token
+        return None
+
+    def extract_channel_page_info(self, initial_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """
+        从频道页面的ytInitialData中提取频道名称和头像
+        Args:
+            initial_data: 频道页面的ytInitialData
+        Returns:
+            Dict[str, Optional[str]]: 包含channel_name和avatar_url
+        """
+        metadata = initial_data.get('metadata', {}).get('channelMetadataRenderer', {})
+        thumbnails = metadata.get('avatar', {}).get('thumbnails', [])
+        return {
+            'channel_name': metadata.get('title') or None,
+            'avatar_url': thumbnails[0].get('url') if thumbnails else None
+        }
+
+    def extract_new_videos_info(self, initial_data: Dict[str, Any], limit: int = 3) -> List[Dict[str, Optional[str]]]:
+        """
+        从频道Shorts标签页的ytInitialData中提取最新视频信息
+        Args:
+            initial_data: 频道Shorts页面的ytInitialData
+            limit: 最多提取的视频数量
+        Returns:
+            List[Dict[str, Optional[str]]]: 每项包含thumbnail_url、title、views、url
+        """
+        new_videos_info = []
+        for grid in self._find_values(initial_data.get('contents', {}), 'richGridRenderer'):
+            for item in grid.get('contents', []):
+                lockup = item.get('richItemRenderer', {}).get('content', {}).get('shortsLockupViewModel')
+                if not lockup:
+                    continue
+                video_id = lockup.get('onTap', {}).get('innertubeCommand', {}) \
+                    .get('reelWatchEndpoint', {}).get('videoId')
+                overlay = lockup.get('overlayMetadata', {})
+                sources = lockup.get('thumbnail', {}).get('sources', [])
+                new_videos_info.append({
+                    'thumbnail_url': sources[0].get('url') if sources else None,
+                    'title': overlay.get('primaryText', {}).get('content'),
+                    'views': overlay.get('secondaryText', {}).get('content'),
+                    'url': f"https://www.youtube.com/shorts/{video_id}" if video_id else None
+                })
+                if len(new_videos_info) >= limit:
+                    return new_videos_info
+            break
+        return new_videos_info